@@ -0,0 +1,329 @@
+#!/usr/bin/env python3.12
+"""
+Benchmark suite for filtering, scoring and the full pairing pipeline.
+
+    python -m benchmarks.run --sizes 1000 100000 --output bench.json
+    python -m benchmarks.run --sizes 1000 100000 --baseline bench.json
+
+Every case runs the same seeded policies against a seeded synthetic provider
+set and records throughput, latency percentiles and peak traced memory.
+With --baseline the results are compared against a previous run and the
+exit status is 1 if any case regressed by more than --tolerance.
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from benchmarks.synthetic import StubGeocoder, generate_policies, generate_providers
+from filters.feature_filter import FeatureFilter
+from filters.location_filter import LocationFilter
+from filters.stake_filter import StakeFilter
+from geo.distance import DISTANCE_MODELS, GEODESIC
+from models.policy import ConsumerPolicy
+from pairing_system.system import PairingSystem
+from scoring.feature_score import FeatureScore
+from scoring.location_score import LocationScore
+from scoring.stake_score import StakeScore
+
+DEFAULT_SIZES = (1_000, 10_000, 100_000)
+DEFAULT_TOLERANCE = 0.25
+
+# Per-provider scorers run over a fixed sample so their cost is comparable
+# across sizes; ranking cases are skipped when a policy keeps more candidates.
+SCORE_SAMPLE = 10_000
+
+
+@dataclass
+class CaseResult:
+    case: str
+    providers: int
+    queries: int
+    items_per_query: float
+    throughput_qps: float
+    latency_ms: Dict[str, float]
+    peak_memory_bytes: int
+
+
+@dataclass
+class Case:
+    name: str
+    # Runs one query and returns the number of items it processed
+    run: Callable[[ConsumerPolicy], int]
+
+
+def _percentiles(latencies: Sequence[float]) -> Dict[str, float]:
+    ms = np.asarray(latencies) * 1000
+    return {
+        "mean": float(ms.mean()),
+        "p50": float(np.percentile(ms, 50)),
+        "p90": float(np.percentile(ms, 90)),
+        "p99": float(np.percentile(ms, 99)),
+        "max": float(ms.max()),
+    }
+
+
+def measure(case: Case, policies: Sequence[ConsumerPolicy], n: int) -> CaseResult:
+    case.run(policies[0])  # warm up lazily built indexes and caches
+
+    latencies = []
+    items = 0
+    for policy in policies:
+        start = time.perf_counter()
+        items += case.run(policy)
+        latencies.append(time.perf_counter() - start)
+
+    # Memory is traced in a separate pass: tracing distorts the timings
+    tracemalloc.start()
+    case.run(policies[0])
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    total = sum(latencies)
+    return CaseResult(
+        case=case.name,
+        providers=n,
+        queries=len(policies),
+        items_per_query=items / len(policies),
+        throughput_qps=len(policies) / total if total else float("inf"),
+        latency_ms=_percentiles(latencies),
+        peak_memory_bytes=peak,
+    )
+
+
+def build_cases(
+    table,
+    geocoder: StubGeocoder,
+    distance_model: str,
+    max_distance_km: float,
+    policies: Sequence[ConsumerPolicy],
+) -> List[Case]:
+    systems = {
+        mode: PairingSystem(
+            strict=strict,
+            max_distance_km=max_distance_km,
+            geocoder=geocoder,
+            distance_model=distance_model,
+            backend="serial",
+            result_cache_size=0,
+        )
+        for mode, strict in (("strict", True), ("flexible", False))
+    }
+    indexes = systems["strict"]._indexes_for(table)
+    location_filter = LocationFilter(geocoder)
+    # The distance table flexible filtering and location scoring read in
+    # PairingSystem, kept warm across queries
+    distances = systems["flexible"]._distances()
+    sample = table.take(range(min(len(table), SCORE_SAMPLE)))
+    max_stake = max((p.stake for p in sample), default=1)
+    max_features = max((len(p.features) for p in sample), default=1)
+
+    def location_select(strict: bool):
+        return lambda policy: len(
+            location_filter.select(
+                indexes,
+                policy,
+                strict,
+                max_distance_km,
+                distance_model,
+                distance_table=distances,
+            )
+        )
+
+    def stake_scores(policy):
+        for p in sample:
+            StakeScore.score(p, max_stake)
+        return len(sample)
+
+    def feature_scores(policy):
+        for p in sample:
+            FeatureScore.score(p, policy, max_features)
+        return len(sample)
+
+    def location_scores(policy):
+        LocationScore.score_batch(
+            sample, policy, max_distance_km, distance_table=distances
+        )
+        return len(sample)
+
+    cases = [
+        Case("filter.location.strict", location_select(True)),
+        Case("filter.location.flexible", location_select(False)),
+        Case("filter.feature", lambda p: len(FeatureFilter().select(indexes, p))),
+        Case("filter.stake", lambda p: len(StakeFilter().select(indexes, p))),
+        Case("score.stake", stake_scores),
+        Case("score.feature", feature_scores),
+        Case("score.location", location_scores),
+    ]
+    for mode, system in systems.items():
+        filtered: Dict[tuple, list] = {}
+        # Candidates ranked by get_pairing_list, counted before timing
+        candidates = {
+            policy.canonical(): len(system.filter_providers(table, policy))
+            for policy in policies
+        }
+
+        def filter_providers(policy, system=system):
+            return len(system.filter_providers(table, policy))
+
+        def rank_providers(policy, system=system, filtered=filtered):
+            key = policy.canonical()
+            if key not in filtered:
+                # Broad policies are ranked over their first SCORE_SAMPLE
+                # candidates, so every query times a real ranking
+                filtered[key] = system.filter_providers(table, policy)[:SCORE_SAMPLE]
+            return len(system.rank_providers(filtered[key], policy))
+
+        def get_pairing_list(policy, system=system, candidates=candidates):
+            system.get_pairing_list(table, policy)
+            return candidates[policy.canonical()]
+
+        cases += [
+            Case(f"pipeline.filter_providers.{mode}", filter_providers),
+            Case(f"pipeline.rank_providers.{mode}", rank_providers),
+            Case(f"pipeline.get_pairing_list.{mode}", get_pairing_list),
+        ]
+    return cases
+
+
+def run_suite(
+    sizes: Sequence[int],
+    queries: int = 50,
+    seed: int = 0,
+    distance_model: str = GEODESIC,
+    max_distance_km: float = 2000.0,
+    case_filter: Optional[str] = None,
+    log: Callable[[str], None] = lambda message: None,
+) -> dict:
+    results = []
+    policies = generate_policies(queries, seed)
+    for n in sizes:
+        start = time.perf_counter()
+        table = generate_providers(n, seed)
+        log(f"Generated {n} providers in {time.perf_counter() - start:.2f}s")
+        geocoder = StubGeocoder.for_locations(
+            table.locations + [p.required_location for p in policies]
+        )
+        cases = build_cases(table, geocoder, distance_model, max_distance_km, policies)
+        for case in cases:
+            if case_filter and case_filter not in case.name:
+                continue
+            result = measure(case, policies, n)
+            log(
+                f"{case.name:<36} n={n:<9} {result.throughput_qps:>10.1f} q/s  "
+                f"p50 {result.latency_ms['p50']:.3f} ms  "
+                f"p99 {result.latency_ms['p99']:.3f} ms"
+            )
+            results.append(asdict(result))
+
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "seed": seed,
+            "queries": queries,
+            "distance_model": distance_model,
+            "max_distance_km": max_distance_km,
+        },
+        "results": results,
+    }
+
+
+def compare(
+    current: dict, baseline: dict, tolerance: float = DEFAULT_TOLERANCE
+) -> List[str]:
+    """
+    Describe every case whose p50 latency grew by more than `tolerance`
+    (relative) against the baseline run; cases missing from either run are ignored.
+    """
+    previous = {(r["case"], r["providers"]): r for r in baseline["results"]}
+    regressions = []
+    for result in current["results"]:
+        before = previous.get((result["case"], result["providers"]))
+        if before is None:
+            continue
+        old, new = before["latency_ms"]["p50"], result["latency_ms"]["p50"]
+        if old > 0 and new > old * (1 + tolerance):
+            regressions.append(
+                f"{result['case']} (n={result['providers']}): p50 {old:.3f} ms -> "
+                f"{new:.3f} ms (+{(new / old - 1) * 100:.0f}%)"
+            )
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run the pairing benchmark suite")
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=list(DEFAULT_SIZES),
+        help="Provider counts to benchmark (default: 1000 10000 100000)",
+    )
+    parser.add_argument(
+        "--queries", type=int, default=50, help="Policies per case (default: 50)"
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Generator seed")
+    parser.add_argument(
+        "--distance-model", choices=DISTANCE_MODELS, default=GEODESIC
+    )
+    parser.add_argument("--max-distance", type=float, default=2000.0)
+    parser.add_argument(
+        "--cases", type=str, default=None, help="Only run cases containing this text"
+    )
+    parser.add_argument(
+        "--output", type=str, default=None, help="Write results JSON here"
+    )
+    parser.add_argument(
+        "--baseline", type=str, default=None, help="Results JSON to compare against"
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=DEFAULT_TOLERANCE,
+        help="Allowed relative p50 latency increase (default: 0.25)",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    results = run_suite(
+        args.sizes,
+        args.queries,
+        args.seed,
+        args.distance_model,
+        args.max_distance,
+        args.cases,
+        log=print,
+    )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print("Regressions against the baseline:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print("No regressions against the baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
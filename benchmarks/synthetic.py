@@ -0,0 +1,149 @@
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from geo.distance import Coordinates
+from geo.gazetteer import Gazetteer
+from models.policy import ConsumerPolicy
+from models.provider_table import ProviderTable
+
+# Providers cluster in a few countries and a few features are far more common
+# than the rest, so both popularities follow a Zipf-like law.
+LOCATION_SKEW = 1.1
+FEATURE_SKEW = 0.8
+MAX_FEATURES_PER_PROVIDER = 8
+
+# Rows generated at once when sampling features, bounding temporary memory
+_CHUNK_ROWS = 1_000_000
+
+
+def zipf_weights(k: int, skew: float) -> np.ndarray:
+    weights = 1.0 / np.arange(1, k + 1) ** skew
+    return weights / weights.sum()
+
+
+def location_catalog(n_locations: int = 60) -> List[str]:
+    """
+    The first `n_locations` gazetteer country codes in a fixed shuffled
+    order; earlier codes are the more popular ones.
+    """
+    codes = sorted(entry.alpha2 for entry in Gazetteer.default())
+    if not 0 < n_locations <= len(codes):
+        raise ValueError(f"n_locations must be between 1 and {len(codes)}")
+    order = np.random.default_rng(12345).permutation(len(codes))
+    return [codes[i] for i in order[:n_locations]]
+
+
+def feature_catalog(n_features: int = 32) -> List[str]:
+    return [f"feature{i}" for i in range(1, n_features + 1)]
+
+
+def _sample_features(
+    rng: np.random.Generator, counts: np.ndarray, weights: np.ndarray
+) -> np.ndarray:
+    # Weighted sampling without replacement per row (Gumbel top-k), row-major
+    log_weights = np.log(weights)
+    ids = []
+    for start in range(0, len(counts), _CHUNK_ROWS):
+        chunk = counts[start : start + _CHUNK_ROWS]
+        keys = log_weights + rng.gumbel(size=(len(chunk), len(weights)))
+        order = np.argsort(-keys, axis=1)
+        ids.append(order[np.arange(len(weights)) < chunk[:, None]])
+    return np.concatenate(ids) if ids else np.empty(0, dtype=np.int64)
+
+
+def generate_providers(
+    n: int,
+    seed: int = 0,
+    n_locations: int = 60,
+    n_features: int = 32,
+) -> ProviderTable:
+    """
+    Seeded synthetic provider set as a ProviderTable (10^7 rows fit in memory
+    because no Provider objects are created).
+
+    Locations and features follow Zipf popularities, stakes are log-normal
+    and each provider lists 0 to MAX_FEATURES_PER_PROVIDER distinct features.
+    """
+    rng = np.random.default_rng(seed)
+    locations = location_catalog(n_locations)
+    features = feature_catalog(n_features)
+
+    location_ids = rng.choice(
+        n_locations, size=n, p=zipf_weights(n_locations, LOCATION_SKEW)
+    )
+    stakes = rng.lognormal(mean=6.0, sigma=1.5, size=n).astype(np.int64)
+    counts = np.minimum(
+        rng.binomial(MAX_FEATURES_PER_PROVIDER, 0.3, size=n), n_features
+    )
+    feature_ids = _sample_features(rng, counts, zipf_weights(n_features, FEATURE_SKEW))
+    offsets = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+
+    return ProviderTable(
+        addresses=[f"provider{i}" for i in range(n)],
+        stakes=stakes,
+        locations=locations,
+        location_ids=location_ids,
+        features=features,
+        feature_offsets=offsets,
+        feature_ids=feature_ids,
+        validated=True,
+    )
+
+
+def generate_policies(
+    n: int,
+    seed: int = 0,
+    n_locations: int = 60,
+    n_features: int = 32,
+    max_required_features: int = 3,
+) -> List[ConsumerPolicy]:
+    """
+    Seeded consumer policies drawn from the same location and feature
+    popularities as `generate_providers`; popular policies repeat.
+    """
+    rng = np.random.default_rng(seed + 1)
+    locations = location_catalog(n_locations)
+    features = feature_catalog(n_features)
+    location_weights = zipf_weights(n_locations, LOCATION_SKEW)
+    feature_weights = zipf_weights(n_features, FEATURE_SKEW)
+
+    policies = []
+    for _ in range(n):
+        count = int(rng.integers(0, max_required_features + 1))
+        required = rng.choice(n_features, size=count, replace=False, p=feature_weights)
+        policies.append(
+            ConsumerPolicy(
+                required_location=locations[rng.choice(n_locations, p=location_weights)],
+                required_features=[features[i] for i in sorted(required.tolist())],
+                min_stake=int(rng.choice([0, 50, 100, 250, 500])),
+            )
+        )
+    return policies
+
+
+class StubGeocoder:
+    """
+    Offline geocoder over a fixed location -> coordinates mapping, so that
+    benchmarks never touch the network or the geocoder's caches.
+    """
+
+    def __init__(self, coordinates: Dict[str, Coordinates]):
+        self.coordinates = coordinates
+        self.calls = 0
+
+    @classmethod
+    def for_locations(
+        cls, locations: Sequence[str], gazetteer: Optional[Gazetteer] = None
+    ) -> "StubGeocoder":
+        gazetteer = gazetteer or Gazetteer.default()
+        resolved = {location: gazetteer.lookup(location) for location in locations}
+        return cls({loc: coords for loc, coords in resolved.items() if coords})
+
+    def geocode(self, location: str) -> Optional[Coordinates]:
+        self.calls += 1
+        return self.coordinates.get(location)
+
+    def prefetch(self, locations: Iterable[str]) -> int:
+        return 0
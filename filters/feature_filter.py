@@ -1,6 +1,9 @@
-from typing import List
+from typing import List, Optional
+
+import numpy as np
 
 from filters.base_filter import BaseFilter
+from indexes.provider_indexes import ProviderIndexes
 from models.policy import ConsumerPolicy
 from models.provider import Provider
 
@@ -14,3 +17,15 @@ class FeatureFilter(BaseFilter):
             for p in providers
             if all(f in p.features for f in policy.required_features)
         ]
+
+    def select(
+        self,
+        indexes: ProviderIndexes,
+        policy: ConsumerPolicy,
+        within: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """
+        Index-backed variant of `filter`: intersects the feature posting lists,
+        rarest first, optionally restricted to the candidate ids in `within`.
+        """
+        return indexes.features.candidates(policy.required_features, within)
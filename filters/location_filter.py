@@ -1,27 +1,30 @@
-from functools import lru_cache
-from typing import List
+from typing import List, Optional
 
-from geopy.distance import geodesic
-from geopy.extra.rate_limiter import RateLimiter
-from geopy.geocoders import Nominatim
+import numpy as np
 
 from filters.base_filter import BaseFilter
+from geo.distance import GEODESIC, batch_distances, resolve_coordinates
+from geo.distance_table import DistanceTable
+from geo.geocoder import Geocoder, SharedGeocoderAttribute
+from indexes.postings import intersect_sorted
+from indexes.provider_indexes import ProviderIndexes
 from models.policy import ConsumerPolicy
 from models.provider import Provider
 
 
 class LocationFilter(BaseFilter):
-    _geolocator = Nominatim(user_agent="location_filter")
-    _rate_limited_geocode = RateLimiter(_geolocator.geocode, min_delay_seconds=1)
+    _geocoder = SharedGeocoderAttribute()
+
+    def __init__(self, geocoder: Optional[Geocoder] = None):
+        """
+        :param geocoder: Geocoder used in flexible mode (default: the shared
+                         process-wide geocoder)
+        """
+        self.geocoder = geocoder if geocoder is not None else LocationFilter._geocoder
 
     @staticmethod
-    @lru_cache(maxsize=128)
     def geocode(location: str):
-        try:
-            loc = LocationFilter._rate_limited_geocode(location)
-            return (loc.latitude, loc.longitude) if loc else None
-        except Exception:
-            return None
+        return LocationFilter._geocoder.geocode(location)
 
     def filter(
         self,
@@ -29,6 +32,7 @@ class LocationFilter(BaseFilter):
         policy: ConsumerPolicy,
         strict: bool = True,
         max_distance_km: float = 2000.0,
+        distance_model: str = GEODESIC,
     ) -> List[Provider]:
         """
         Filters providers based on their location.
@@ -38,22 +42,56 @@ class LocationFilter(BaseFilter):
         :param strict: If True, filters only exact string matches.
                        If False, includes providers within `max_distance_km`.
         :param max_distance_km: Distance threshold for flexible matching (in km)
+        :param distance_model: Distance model for flexible matching (see geo.distance)
         :return: Filtered list of Provider objects
         """
         if strict:
             return [p for p in providers if p.location == policy.required_location]
 
-        # Flexible match: filter based on geodesic distance
-        policy_coords = self.geocode(policy.required_location)
+        # Flexible match: filter based on distance, computed for all providers at once
+        policy_coords = self.geocoder.geocode(policy.required_location)
         if not policy_coords:
             return []
 
-        filtered = []
-        for provider in providers:
-            provider_coords = self.geocode(provider.location)
-            if provider_coords:
-                distance = geodesic(provider_coords, policy_coords).kilometers
-                if distance <= max_distance_km:
-                    filtered.append(provider)
+        provider_coords = resolve_coordinates(
+            (p.location for p in providers), self.geocoder
+        )
+        distances = batch_distances(policy_coords, provider_coords, distance_model)
+        # Unresolved providers have NaN distances, which never compare as within range
+        return [p for p, d in zip(providers, distances) if d <= max_distance_km]
+
+    def select(
+        self,
+        indexes: ProviderIndexes,
+        policy: ConsumerPolicy,
+        strict: bool = True,
+        max_distance_km: float = 2000.0,
+        distance_model: str = GEODESIC,
+        within: Optional[np.ndarray] = None,
+        distance_table: Optional[DistanceTable] = None,
+    ) -> np.ndarray:
+        """
+        Index-backed variant of `filter`: returns the sorted ids (positions in
+        `indexes.providers`) of the providers that pass the location check.
+
+        :param within: Optional sorted candidate ids; when given, only these are
+                       checked instead of querying the whole index
+        :param distance_table: Table flexible matching reads the distances of
+                               the distinct locations from, merging the
+                               postings of those within range (default: a
+                               table built for this call)
+        """
+        if strict:
+            ids = indexes.locations.postings(policy.required_location)
+            return ids if within is None else intersect_sorted(within, ids)
 
-        return filtered
+        if distance_table is None:
+            distance_table = DistanceTable(self.geocoder, distance_model)
+        locations = list(indexes.locations.keys())
+        distances = distance_table.distances(policy.required_location, locations)
+        near = np.flatnonzero(distances <= max_distance_km).tolist()
+        postings = [indexes.locations.postings(locations[i]) for i in near]
+        if not postings:
+            return np.empty(0, dtype=np.intp)
+        ids = np.sort(np.concatenate(postings))
+        return ids if within is None else intersect_sorted(within, ids)
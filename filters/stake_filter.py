@@ -1,6 +1,9 @@
-from typing import List
+from typing import List, Optional
+
+import numpy as np
 
 from filters.base_filter import BaseFilter
+from indexes.provider_indexes import ProviderIndexes
 from models.policy import ConsumerPolicy
 from models.provider import Provider
 
@@ -10,3 +13,15 @@ class StakeFilter(BaseFilter):
         self, providers: List[Provider], policy: ConsumerPolicy
     ) -> List[Provider]:
         return [p for p in providers if p.stake >= policy.min_stake]
+
+    def select(
+        self,
+        indexes: ProviderIndexes,
+        policy: ConsumerPolicy,
+        within: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """
+        Index-backed variant of `filter`: bisects the sorted stake index,
+        or checks only the candidate ids in `within` when given.
+        """
+        return indexes.stakes.ids_at_least(policy.min_stake, within)
@@ -0,0 +1,123 @@
+from importlib import import_module
+from typing import Iterable, Optional, Tuple
+
+import numpy as np
+
+from geo.geocoder import Geocoder
+
+Coordinates = Tuple[float, float]
+
+EARTH_RADIUS_KM = 6371.0088  # IUGG mean Earth radius
+
+GEODESIC = "geodesic"
+HAVERSINE = "haversine"
+EQUIRECTANGULAR = "equirectangular"
+
+# Available distance models and their error against the WGS-84 ellipsoid:
+#
+# - geodesic: exact ellipsoidal distance (Karney), the reference. Evaluated once
+#   per distinct coordinate pair, so it stays affordable when many providers
+#   share a location, but it is not vectorized.
+# - haversine: great circle on a sphere of radius EARTH_RADIUS_KM. Relative error
+#   is below 0.5% for any pair of points (about 10 km at 2000 km).
+# - equirectangular: flat projection around the mean latitude. Within 0.1-0.5% of
+#   haversine up to a few hundred km at mid latitudes, but the error grows with
+#   distance and latitude (tens of percent across continents or near the poles);
+#   only use it for short radii.
+DISTANCE_MODELS = (GEODESIC, HAVERSINE, EQUIRECTANGULAR)
+
+
+def resolve_coordinates(locations: Iterable[str], geocoder: Geocoder) -> np.ndarray:
+    """
+    Geocode location strings into an (n, 2) array of (latitude, longitude).
+
+    Every distinct location is geocoded once. Unresolved locations become NaN rows.
+    """
+    resolved = {}
+    rows = []
+    for location in locations:
+        if location not in resolved:
+            coords = geocoder.geocode(location)
+            resolved[location] = coords if coords else (np.nan, np.nan)
+        rows.append(resolved[location])
+    return np.array(rows, dtype=np.float64).reshape(-1, 2)
+
+
+def _haversine(origin: np.ndarray, coords: np.ndarray) -> np.ndarray:
+    lat1, lon1 = np.radians(origin)
+    lat2 = np.radians(coords[:, 0])
+    dlat = lat2 - lat1
+    dlon = np.radians(coords[:, 1]) - lon1
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def _equirectangular(origin: np.ndarray, coords: np.ndarray) -> np.ndarray:
+    lat1, lon1 = np.radians(origin)
+    lat2 = np.radians(coords[:, 0])
+    # Wrap the longitude difference into [-pi, pi) so the antimeridian is handled
+    dlon = (np.radians(coords[:, 1]) - lon1 + np.pi) % (2 * np.pi) - np.pi
+    x = dlon * np.cos((lat1 + lat2) / 2)
+    y = lat2 - lat1
+    return EARTH_RADIUS_KM * np.hypot(x, y)
+
+
+def _geodesic(origin: np.ndarray, coords: np.ndarray) -> np.ndarray:
+    distances = np.full(len(coords), np.nan)
+    valid = ~np.isnan(coords).any(axis=1)
+    if not valid.any():
+        return distances
+    unique, inverse = np.unique(coords[valid], axis=0, return_inverse=True)
+    # Points at the origin are exactly 0 km away; strict queries, whose
+    # candidates all share the policy location, never need geopy
+    elsewhere = (unique != origin).any(axis=1)
+    unique_distances = np.zeros(len(unique))
+    if elsewhere.any():
+        geodesic = import_module("geopy.distance").geodesic
+        origin_point = tuple(origin)
+        unique_distances[elsewhere] = [
+            geodesic(origin_point, tuple(point)).kilometers
+            for point in unique[elsewhere]
+        ]
+    distances[valid] = unique_distances[inverse.reshape(-1)]
+    return distances
+
+
+_MODELS = {
+    GEODESIC: _geodesic,
+    HAVERSINE: _haversine,
+    EQUIRECTANGULAR: _equirectangular,
+}
+
+
+def batch_distances(
+    origin: Coordinates, coords: np.ndarray, model: str = GEODESIC
+) -> np.ndarray:
+    """
+    Compute the distance in km from one point to many points in a single call.
+
+    :param origin: (latitude, longitude) of the reference point, in degrees
+    :param coords: Array of shape (n, 2) holding (latitude, longitude) rows in degrees;
+                   NaN rows (unresolved locations) yield NaN distances
+    :param model: One of DISTANCE_MODELS
+    :return: Array of n distances in kilometers
+    """
+    if model not in _MODELS:
+        raise ValueError(
+            f"Unknown distance model '{model}', expected one of {DISTANCE_MODELS}"
+        )
+    coords = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+    if not len(coords):
+        return np.empty(0)
+    return _MODELS[model](np.asarray(origin, dtype=np.float64), coords)
+
+
+def distance(
+    a: Optional[Coordinates], b: Optional[Coordinates], model: str = GEODESIC
+) -> float:
+    """
+    Distance in km between two points using the given model (NaN if either is None).
+    """
+    if a is None or b is None:
+        return float("nan")
+    return float(batch_distances(a, np.array([b]), model)[0])
@@ -0,0 +1,275 @@
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Union
+
+import numpy as np
+
+from geo.distance import DISTANCE_MODELS, GEODESIC, batch_distances
+from geo.geocoder import Coordinates, Geocoder
+
+# Default number of origin rows kept; each holds one float64 per column
+DEFAULT_MAX_ROWS = 512
+
+# Seconds before an unresolved location is geocoded again
+DEFAULT_RETRY_SECONDS = 60.0
+
+
+class _Row:
+    """
+    Distances from one origin: `values[:filled]` are computed, the rest of
+    the buffer is spare capacity for columns interned later. A row whose
+    origin is unresolved is all NaN and dropped once `retry_at` has passed.
+    """
+
+    __slots__ = ("coords", "values", "filled", "retry_at")
+
+    def __init__(
+        self, coords: Optional[Coordinates], capacity: int, retry_at: float = 0.0
+    ):
+        self.coords = coords
+        self.values = np.full(capacity, np.nan)
+        self.filled = 0
+        self.retry_at = retry_at
+
+
+class DistanceTable:
+    """
+    Distances (km) from origin locations to interned column locations.
+
+    Columns are the locations distances are asked for (provider locations,
+    in practice): each gets an id and is geocoded once. The row of an origin
+    (a policy location) holds its distance to every column, computed in one
+    batch the first time the row is needed and extended only by the columns
+    interned since. A row is always computed from its own origin, so values
+    are exactly those of `batch_distances`. Unresolved locations give NaN
+    distances; they are geocoded again once `retry_seconds` have passed (a
+    failed lookup may be a transient outage) and are never saved.
+
+    Origins are not interned: rows are kept for at most `max_rows` origins,
+    least recently used dropped first, so arbitrary client locations cannot
+    grow the table without bound. Memory is about 8 bytes per row and column.
+    """
+
+    def __init__(
+        self,
+        geocoder: Geocoder,
+        distance_model: str = GEODESIC,
+        locations: Iterable[str] = (),
+        max_rows: int = DEFAULT_MAX_ROWS,
+        retry_seconds: float = DEFAULT_RETRY_SECONDS,
+    ):
+        """
+        :param geocoder: Geocoder used to resolve new locations
+        :param distance_model: One of geo.distance.DISTANCE_MODELS
+        :param locations: Column locations interned up front
+        :param max_rows: Maximum number of origin rows kept
+        :param retry_seconds: Delay before unresolved locations are geocoded again
+        """
+        if distance_model not in DISTANCE_MODELS:
+            raise ValueError(
+                f"Unknown distance model '{distance_model}', "
+                f"expected one of {DISTANCE_MODELS}"
+            )
+        if max_rows <= 0:
+            raise ValueError("max_rows must be a positive integer")
+        self.geocoder = geocoder
+        self.distance_model = distance_model
+        self.max_rows = max_rows
+        self.retry_seconds = retry_seconds
+        self._ids: Dict[str, int] = {}
+        self._locations: List[str] = []
+        self._coords = np.empty((0, 2))
+        self._rows: "OrderedDict[str, _Row]" = OrderedDict()
+        # Unresolved column id -> time after which it is geocoded again
+        self._unresolved: Dict[int, float] = {}
+        self.ids(locations)
+
+    def __len__(self) -> int:
+        return len(self._locations)
+
+    def __contains__(self, location: str) -> bool:
+        """
+        Whether `location` is an interned (hence already geocoded) column.
+        """
+        return location in self._ids
+
+    @property
+    def locations(self) -> List[str]:
+        return list(self._locations)
+
+    @property
+    def origins(self) -> List[str]:
+        """
+        Origins whose rows are kept, least recently used first.
+        """
+        return list(self._rows)
+
+    def _retry_unresolved(self) -> None:
+        # Geocode the unresolved columns that are due again, and fill in their
+        # distances in the rows that already cover them
+        now = time.time()
+        for i in [i for i, retry_at in self._unresolved.items() if retry_at <= now]:
+            coords = self.geocoder.geocode(self._locations[i])
+            if coords is None:
+                self._unresolved[i] = now + self.retry_seconds
+                continue
+            del self._unresolved[i]
+            self._coords[i] = coords
+            for row in self._rows.values():
+                if row.coords is not None and i < row.filled:
+                    row.values[i] = batch_distances(
+                        row.coords, self._coords[i : i + 1], self.distance_model
+                    )[0]
+
+    def id_of(self, location: str) -> int:
+        """
+        Column id of `location`, interning (and geocoding) it if it is new.
+        """
+        i = self._ids.get(location)
+        if i is None:
+            i = len(self._locations)
+            if i == len(self._coords):
+                coords = np.full((max(16, 2 * i), 2), np.nan)
+                coords[:i] = self._coords
+                self._coords = coords
+            coords = self.geocoder.geocode(location)
+            if coords is None:
+                self._coords[i] = np.nan
+                self._unresolved[i] = time.time() + self.retry_seconds
+            else:
+                self._coords[i] = coords
+            self._ids[location] = i
+            self._locations.append(location)
+        return i
+
+    def ids(self, locations: Iterable[str]) -> np.ndarray:
+        """
+        Column ids of many locations, interning the new ones.
+        """
+        ids = self._ids
+        id_of = self.id_of
+        return np.array(
+            [ids[loc] if loc in ids else id_of(loc) for loc in locations],
+            dtype=np.intp,
+        )
+
+    def _row(self, origin: str) -> _Row:
+        row = self._rows.get(origin)
+        if row is not None and row.coords is None and row.retry_at <= time.time():
+            del self._rows[origin]
+            row = None
+        if row is None:
+            i = self._ids.get(origin)
+            if i is None or i in self._unresolved:
+                coords = self.geocoder.geocode(origin)
+            else:
+                # Already a column: reuse its coordinates
+                coords = tuple(self._coords[i].tolist())
+            row = self._rows[origin] = _Row(
+                coords,
+                len(self._coords),
+                time.time() + self.retry_seconds if coords is None else 0.0,
+            )
+            while len(self._rows) > self.max_rows:
+                self._rows.popitem(last=False)
+        else:
+            self._rows.move_to_end(origin)
+        return row
+
+    def row(self, origin: str) -> np.ndarray:
+        """
+        Distances from `origin` to every column, indexed by column id
+        (read-only view; interning more columns does not extend it).
+        """
+        if self._unresolved:
+            self._retry_unresolved()
+        row = self._row(origin)
+        size = len(self._locations)
+        if row.filled < size:
+            if len(row.values) < size:
+                values = np.full(len(self._coords), np.nan)
+                values[: row.filled] = row.values[: row.filled]
+                row.values = values
+            if row.coords is None:
+                row.values[row.filled : size] = np.nan
+            else:
+                row.values[row.filled : size] = batch_distances(
+                    row.coords, self._coords[row.filled : size], self.distance_model
+                )
+            row.filled = size
+        values = row.values[:size]
+        values.flags.writeable = False
+        return values
+
+    def distances(self, origin: str, locations: Iterable[str]) -> np.ndarray:
+        """
+        Distances from `origin` to each of `locations`, in order.
+        """
+        ids = self.ids(locations)
+        return self.row(origin)[ids]
+
+    def save(self, path: Union[str, Path]) -> None:
+        """
+        Write the resolved column locations, their coordinates and the kept
+        rows of resolved origins to an .npz file.
+        """
+        size = len(self._locations)
+        resolved = ~np.isnan(self._coords[:size]).any(axis=1)
+        rows = {o: row for o, row in self._rows.items() if row.coords is not None}
+        matrix = np.full((len(rows), int(resolved.sum())), np.nan)
+        filled = []
+        for r, row in enumerate(rows.values()):
+            values = row.values[: row.filled][resolved[: row.filled]]
+            matrix[r, : len(values)] = values
+            filled.append(len(values))
+        with open(path, "wb") as f:
+            np.savez(
+                f,
+                distance_model=np.array(self.distance_model),
+                locations=np.array(self._locations, dtype=str)[resolved],
+                coords=self._coords[:size][resolved],
+                origins=np.array(list(rows), dtype=str),
+                origin_coords=np.array(
+                    [row.coords for row in rows.values()], dtype=np.float64
+                ).reshape(-1, 2),
+                matrix=matrix,
+                filled=np.array(filled, dtype=np.int64),
+            )
+
+    @classmethod
+    def load(
+        cls,
+        path: Union[str, Path],
+        geocoder: Geocoder,
+        max_rows: Optional[int] = None,
+    ) -> "DistanceTable":
+        """
+        Read a table written by `save`; `geocoder` resolves locations added later.
+
+        :param max_rows: Maximum number of origin rows kept (default: enough
+                         for every saved row, and at least DEFAULT_MAX_ROWS);
+                         the least recently used saved rows are dropped first
+        """
+        with np.load(path, allow_pickle=False) as data:
+            origins = data["origins"].tolist()
+            if max_rows is None:
+                max_rows = max(DEFAULT_MAX_ROWS, len(origins))
+            table = cls(geocoder, str(data["distance_model"]), max_rows=max_rows)
+            locations = data["locations"].tolist()
+            size = len(locations)
+            table._coords = np.full((max(16, size), 2), np.nan)
+            table._coords[:size] = data["coords"]
+            table._locations = locations
+            table._ids = {location: i for i, location in enumerate(locations)}
+            for origin, coords, values, filled in zip(
+                origins[-max_rows:],
+                data["origin_coords"][-max_rows:],
+                data["matrix"][-max_rows:],
+                data["filled"][-max_rows:].tolist(),
+            ):
+                row = _Row(tuple(coords.tolist()), len(table._coords))
+                row.values[:filled] = values[:filled]
+                row.filled = filled
+                table._rows[origin] = row
+        return table
@@ -0,0 +1,110 @@
+import csv
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+DEFAULT_GAZETTEER_PATH = Path(__file__).parent / "data" / "countries.csv"
+
+
+@dataclass(frozen=True, slots=True)
+class GazetteerEntry:
+    """
+    A single country in the gazetteer.
+
+    Attributes:
+        alpha2 (str): ISO 3166-1 alpha-2 code, e.g. "US".
+        alpha3 (str): ISO 3166-1 alpha-3 code, e.g. "USA".
+        name (str): Common English short name, e.g. "United States".
+        latitude (float): Latitude of the country centroid.
+        longitude (float): Longitude of the country centroid.
+        aliases (Tuple[str, ...]): Additional names that resolve to this country.
+    """
+
+    alpha2: str
+    alpha3: str
+    name: str
+    latitude: float
+    longitude: float
+    aliases: Tuple[str, ...] = ()
+
+    @property
+    def coordinates(self) -> Tuple[float, float]:
+        return (self.latitude, self.longitude)
+
+    def keys(self) -> Iterator[str]:
+        yield self.alpha2
+        yield self.alpha3
+        yield self.name
+        yield from self.aliases
+
+
+class Gazetteer:
+    """
+    Offline resolver from country codes and names to centroid coordinates.
+
+    Lookups are case-insensitive and ignore surrounding/repeated whitespace.
+    """
+
+    _default: Optional["Gazetteer"] = None
+
+    def __init__(self, entries: Iterable[GazetteerEntry]):
+        self._entries: Dict[str, GazetteerEntry] = {}
+        self._index: Dict[str, GazetteerEntry] = {}
+        for entry in entries:
+            self._entries[entry.alpha2] = entry
+            for key in entry.keys():
+                # The first entry claiming a key wins, so aliases never shadow codes
+                self._index.setdefault(self.normalize(key), entry)
+
+    @staticmethod
+    def normalize(location: str) -> str:
+        return " ".join(location.split()).casefold()
+
+    @classmethod
+    def from_csv(cls, path: Path) -> "Gazetteer":
+        """
+        Load a gazetteer from a CSV file with the columns
+        alpha2, alpha3, name, aliases ("|"-separated), latitude, longitude.
+        """
+        with open(path, newline="", encoding="utf-8") as f:
+            return cls(
+                GazetteerEntry(
+                    alpha2=row["alpha2"],
+                    alpha3=row["alpha3"],
+                    name=row["name"],
+                    latitude=float(row["latitude"]),
+                    longitude=float(row["longitude"]),
+                    aliases=tuple(a for a in row["aliases"].split("|") if a),
+                )
+                for row in csv.DictReader(f)
+            )
+
+    @classmethod
+    def default(cls) -> "Gazetteer":
+        """
+        Return the bundled ISO 3166-1 gazetteer, loading it on first use.
+        """
+        if cls._default is None:
+            cls._default = cls.from_csv(DEFAULT_GAZETTEER_PATH)
+        return cls._default
+
+    def entry(self, location: str) -> Optional[GazetteerEntry]:
+        if not location:
+            return None
+        return self._index.get(self.normalize(location))
+
+    def lookup(self, location: str) -> Optional[Tuple[float, float]]:
+        """
+        Resolve a country code or name to (latitude, longitude), or None if unknown.
+        """
+        entry = self.entry(location)
+        return entry.coordinates if entry else None
+
+    def __contains__(self, location: str) -> bool:
+        return self.entry(location) is not None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[GazetteerEntry]:
+        return iter(self._entries.values())
@@ -0,0 +1,124 @@
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Optional, Tuple, Union
+
+Coordinates = Tuple[float, float]
+
+DEFAULT_TTL_SECONDS = 30 * 24 * 3600
+DEFAULT_NEGATIVE_TTL_SECONDS = 24 * 3600
+
+
+class GeocodeCache:
+    """
+    Persistent geocode store backed by SQLite.
+
+    The database runs in WAL mode, so any number of processes can read it
+    concurrently while one of them writes. Every thread gets its own
+    connection. Successful lookups are kept for `ttl_seconds`; lookups that
+    returned no result are negative-cached for the (shorter)
+    `negative_ttl_seconds`.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        negative_ttl_seconds: float = DEFAULT_NEGATIVE_TTL_SECONDS,
+        clock: Callable[[], float] = time.time,
+    ):
+        """
+        :param path: SQLite database file, created if missing
+        :param ttl_seconds: Lifetime of a resolved location
+        :param negative_ttl_seconds: Lifetime of a "not found" entry
+        :param clock: Time source returning seconds since the epoch
+        """
+        if ttl_seconds <= 0 or negative_ttl_seconds <= 0:
+            raise ValueError("TTLs must be positive")
+
+        self.path = Path(path)
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self._clock = clock
+        self._local = threading.local()
+
+        conn = self._connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS geocode ("
+            " location TEXT PRIMARY KEY,"
+            " latitude REAL,"
+            " longitude REAL,"
+            " expires_at REAL NOT NULL)"
+        )
+        conn.commit()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30)
+            self._local.conn = conn
+        return conn
+
+    def get(self, location: str) -> Tuple[bool, Optional[Coordinates]]:
+        """
+        Look up a location.
+
+        :return: (hit, coordinates). `hit` is False when the location is unknown
+                 or its entry has expired; a negative entry is (True, None).
+        """
+        row = (
+            self._connection()
+            .execute(
+                "SELECT latitude, longitude, expires_at FROM geocode WHERE location = ?",
+                (location,),
+            )
+            .fetchone()
+        )
+        if row is None or row[2] <= self._clock():
+            return False, None
+        if row[0] is None:
+            return True, None
+        return True, (row[0], row[1])
+
+    def put(self, location: str, coords: Optional[Coordinates]) -> None:
+        """
+        Store a lookup result; `None` records a negative entry.
+        """
+        ttl = self.ttl_seconds if coords is not None else self.negative_ttl_seconds
+        lat, lon = coords if coords is not None else (None, None)
+        conn = self._connection()
+        conn.execute(
+            "INSERT OR REPLACE INTO geocode (location, latitude, longitude, expires_at)"
+            " VALUES (?, ?, ?, ?)",
+            (location, lat, lon, self._clock() + ttl),
+        )
+        conn.commit()
+
+    def purge_expired(self) -> int:
+        """
+        Delete expired entries and return how many were removed.
+        """
+        conn = self._connection()
+        cursor = conn.execute(
+            "DELETE FROM geocode WHERE expires_at <= ?", (self._clock(),)
+        )
+        conn.commit()
+        return cursor.rowcount
+
+    def __len__(self) -> int:
+        return (
+            self._connection()
+            .execute(
+                "SELECT COUNT(*) FROM geocode WHERE expires_at > ?", (self._clock(),)
+            )
+            .fetchone()[0]
+        )
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
@@ -0,0 +1,310 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass
+from functools import lru_cache
+from importlib import import_module
+from typing import Dict, Iterable, Optional, Tuple
+
+from geo.gazetteer import Gazetteer
+from geo.geocode_cache import (
+    DEFAULT_NEGATIVE_TTL_SECONDS,
+    DEFAULT_TTL_SECONDS,
+    GeocodeCache,
+)
+
+Coordinates = Tuple[float, float]
+
+# Default number of free-form locations kept in the in-process memo
+DEFAULT_MEMO_SIZE = 100_000
+
+
+class GeocoderUnavailable(Exception):
+    """Raised internally when an online lookup fails for a transient reason."""
+
+
+@dataclass(slots=True)
+class GeocoderStats:
+    """
+    Counters of where geocode lookups were answered.
+
+    Attributes:
+        gazetteer_hits (int): Lookups resolved by the offline gazetteer.
+        memo_hits (int): Non-gazetteer lookups answered by the in-process memo.
+        memo_misses (int): Non-gazetteer lookups not in the memo.
+        cache_hits (int): Memo misses answered by the persistent cache.
+        cache_misses (int): Memo misses not in the persistent cache.
+        online_lookups (int): Requests sent to Nominatim.
+        online_errors (int): Nominatim requests that failed.
+        coalesced (int): Lookups that waited for an identical lookup already
+                         in flight instead of issuing their own.
+        rate_limit_sleep_seconds (float): Time spent waiting on the rate limiter.
+    """
+
+    gazetteer_hits: int = 0
+    memo_hits: int = 0
+    memo_misses: int = 0
+    cache_hits: int = 0
+    cache_misses: int = 0
+    online_lookups: int = 0
+    online_errors: int = 0
+    coalesced: int = 0
+    rate_limit_sleep_seconds: float = 0.0
+
+
+@lru_cache(maxsize=None)
+def _timed_rate_limiter() -> type:
+    # geopy is only imported once a lookup actually goes online, so offline
+    # and strict runs never pay for importing it
+    RateLimiter = import_module("geopy.extra.rate_limiter").RateLimiter
+
+    class _TimedRateLimiter(RateLimiter):
+        """
+        RateLimiter that adds the time it sleeps to the geocoder's stats.
+        """
+
+        def __init__(self, func, stats: GeocoderStats, **kwargs):
+            super().__init__(func, **kwargs)
+            self._stats = stats
+
+        def _sleep(self, seconds):
+            self._stats.rate_limit_sleep_seconds += seconds
+            super()._sleep(seconds)
+
+    return _TimedRateLimiter
+
+
+class Geocoder:
+    """
+    Resolves location strings to (latitude, longitude) coordinates.
+
+    The bundled offline gazetteer (ISO country codes and names) is always
+    consulted first. Free-form strings the gazetteer does not know are then
+    looked up in the in-process memo and, when a `GeocodeCache` is given, in
+    the persistent cache; they are only sent to Nominatim when
+    `online_fallback` is enabled. A cache warmed by another run can thus be
+    read without ever going online.
+
+    Memo and cache keys are normalized like gazetteer keys (surrounding and
+    repeated whitespace dropped, case folded). Online results are memoized
+    (up to `memo_size` locations, least recently used evicted first) and
+    persisted in the cache, so that other workers and later runs start hot.
+    Lookups that fail with an error are never cached. Concurrent lookups of
+    the same location are single-flight: one thread resolves it, the others
+    wait for its result.
+    """
+
+    def __init__(
+        self,
+        gazetteer: Optional[Gazetteer] = None,
+        online_fallback: bool = False,
+        user_agent: str = "pairing_system",
+        min_delay_seconds: float = 1.0,
+        max_retries: int = 2,
+        cache: Optional[GeocodeCache] = None,
+        memo_size: int = DEFAULT_MEMO_SIZE,
+    ):
+        """
+        :param gazetteer: Offline gazetteer to use (default: the bundled country list)
+        :param online_fallback: If True, unresolved strings are looked up with Nominatim
+        :param user_agent: User agent reported to Nominatim
+        :param min_delay_seconds: Minimum delay between two Nominatim requests
+        :param max_retries: Retries for a failed Nominatim request
+        :param cache: Optional persistent store for online lookup results
+        :param memo_size: Maximum number of locations kept in the in-process memo
+        """
+        self.gazetteer = gazetteer if gazetteer is not None else Gazetteer.default()
+        self.online_fallback = online_fallback
+        self.user_agent = user_agent
+        self.min_delay_seconds = min_delay_seconds
+        self.max_retries = max_retries
+        self.cache = cache
+        self.memo_size = memo_size
+        self._memo: "OrderedDict[str, Tuple[Optional[Coordinates], float]]" = (
+            OrderedDict()
+        )
+        self._online_geocode = None
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, Future] = {}
+        self.stats = GeocoderStats()
+
+    def _online(self):
+        if self._online_geocode is None:
+            Nominatim = import_module("geopy.geocoders").Nominatim
+            geolocator = Nominatim(user_agent=self.user_agent)
+            self._online_geocode = _timed_rate_limiter()(
+                geolocator.geocode,
+                self.stats,
+                min_delay_seconds=self.min_delay_seconds,
+                max_retries=self.max_retries,
+                swallow_exceptions=False,
+            )
+        return self._online_geocode
+
+    def _lookup_online(self, location: str) -> Optional[Coordinates]:
+        self.stats.online_lookups += 1
+        try:
+            loc = self._online()(location)
+        except Exception as e:
+            self.stats.online_errors += 1
+            raise GeocoderUnavailable(str(e)) from e
+        return (loc.latitude, loc.longitude) if loc else None
+
+    def _remember(self, key: str, coords: Optional[Coordinates]) -> None:
+        if coords is not None:
+            ttl = self.cache.ttl_seconds if self.cache else DEFAULT_TTL_SECONDS
+        else:
+            ttl = (
+                self.cache.negative_ttl_seconds
+                if self.cache
+                else DEFAULT_NEGATIVE_TTL_SECONDS
+            )
+        with self._lock:
+            self._memo[key] = (coords, time.time() + ttl)
+            self._memo.move_to_end(key)
+            while len(self._memo) > self.memo_size:
+                self._memo.popitem(last=False)
+
+    def _memoized(self, key: str) -> Optional[Tuple[Optional[Coordinates], float]]:
+        with self._lock:
+            memo = self._memo.get(key)
+            if memo is None:
+                return None
+            if memo[1] <= time.time():
+                del self._memo[key]
+                return None
+            self._memo.move_to_end(key)
+            return memo
+
+    def geocode(self, location: str) -> Optional[Coordinates]:
+        """
+        Convert a location string into latitude and longitude coordinates.
+
+        :param location: ISO country code, country name or any free-form place
+                         name found in the memo, the persistent cache or (with
+                         the online fallback enabled) by Nominatim
+        :return: (latitude, longitude) or None if the location cannot be resolved
+        """
+        if not location:
+            return None
+
+        coords = self.gazetteer.lookup(location)
+        if coords is not None:
+            self.stats.gazetteer_hits += 1
+            return coords
+        if not self.online_fallback and self.cache is None:
+            return None
+
+        key = Gazetteer.normalize(location)
+        if not key:
+            return None
+        memo = self._memoized(key)
+        if memo is not None:
+            self.stats.memo_hits += 1
+            return memo[0]
+        self.stats.memo_misses += 1
+
+        with self._lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+        if not owner:
+            self.stats.coalesced += 1
+            return future.result()
+
+        try:
+            coords = self._resolve(key, location)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(coords)
+            return coords
+        finally:
+            with self._lock:
+                del self._inflight[key]
+
+    def _resolve(self, key: str, location: str) -> Optional[Coordinates]:
+        # Memo, then persistent cache, then Nominatim; run by one thread per key
+        memo = self._memoized(key)
+        if memo is not None:
+            return memo[0]
+
+        if self.cache is not None:
+            hit, coords = self.cache.get(key)
+            if hit:
+                self.stats.cache_hits += 1
+                self._remember(key, coords)
+                return coords
+            self.stats.cache_misses += 1
+
+        if not self.online_fallback:
+            # Not known offline; a later run with the fallback may resolve it
+            return None
+        try:
+            coords = self._lookup_online(location)
+        except GeocoderUnavailable:
+            return None
+
+        self._remember(key, coords)
+        if self.cache is not None:
+            self.cache.put(key, coords)
+        return coords
+
+    def prefetch(self, locations: Iterable[str]) -> int:
+        """
+        Resolve the distinct locations that are neither in the gazetteer nor
+        memoized yet, so that the following query only hits the memo. Nothing
+        to do without a persistent cache or the online fallback.
+
+        :return: Number of locations that were not memoized yet
+        """
+        if not self.online_fallback and self.cache is None:
+            return 0
+        missing = 0
+        for location in dict.fromkeys(locations):
+            if not location or location in self.gazetteer:
+                continue
+            if self._memoized(Gazetteer.normalize(location)) is None:
+                missing += 1
+                self.geocode(location)
+        return missing
+
+    def warm(self, locations: Iterable[str]) -> Dict[str, Optional[Coordinates]]:
+        """
+        Resolve every distinct location once, filling the in-process and
+        persistent caches.
+
+        :param locations: Location strings, duplicates allowed
+        :return: Mapping from each distinct location to its coordinates (or None)
+        """
+        return {location: self.geocode(location) for location in dict.fromkeys(locations)}
+
+
+_shared: Optional[Geocoder] = None
+_shared_lock = threading.Lock()
+
+
+def shared_geocoder() -> Geocoder:
+    """
+    The process-wide default geocoder, shared by location filtering and
+    scoring so that each location is looked up once per process.
+    """
+    global _shared
+    if _shared is None:
+        with _shared_lock:
+            if _shared is None:
+                _shared = Geocoder()
+    return _shared
+
+
+class SharedGeocoderAttribute:
+    """
+    Class attribute resolving to `shared_geocoder()` on first access, so that
+    defining a class does not build the geocoder and load the gazetteer.
+    """
+
+    def __get__(self, instance, owner) -> Geocoder:
+        return shared_geocoder()
@@ -0,0 +1,55 @@
+from typing import Iterable, List, Optional
+
+import numpy as np
+
+from indexes.postings import IncrementalPostings, PostingsIndex, intersect_sorted
+from models.provider import Provider
+from models.provider_table import ProviderTable
+
+
+class FeatureIndex(PostingsIndex):
+    """
+    Inverted index from feature name to the sorted ids of providers offering it.
+    """
+
+    @classmethod
+    def from_providers(cls, providers: List[Provider]) -> "FeatureIndex":
+        return cls(p.features for p in providers)
+
+    @classmethod
+    def from_table(cls, table: ProviderTable) -> "FeatureIndex":
+        rows = np.repeat(np.arange(len(table)), table.feature_counts)
+        return cls.from_pairs(rows, table.feature_ids, table.features, len(table))
+
+    def candidates(
+        self, required: Iterable[str], within: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """
+        Ids of providers offering every required feature.
+
+        Posting lists are intersected from the shortest to the longest, so the
+        cost is bounded by the rarest feature rather than by the registry size.
+
+        :param required: Required feature names (duplicates allowed)
+        :param within: Optional sorted candidate ids to restrict the result to
+        :return: Sorted array of matching ids
+        """
+        lists = [self.postings(f) for f in dict.fromkeys(required)]
+        if within is not None:
+            lists.append(within)
+        if not lists:
+            return self.all_ids()
+
+        lists.sort(key=len)
+        result = lists[0]
+        for postings in lists[1:]:
+            if not len(result):
+                break
+            result = intersect_sorted(result, postings)
+        return result
+
+
+class IncrementalFeatureIndex(IncrementalPostings, FeatureIndex):
+    """
+    Feature index maintained in place as providers are added and removed.
+    """
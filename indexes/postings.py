@@ -0,0 +1,158 @@
+from collections import defaultdict
+from typing import Dict, Hashable, Iterable, List, Optional, Sequence, Set
+
+import numpy as np
+
+_EMPTY = np.empty(0, dtype=np.intp)
+
+
+def intersect_sorted(small: np.ndarray, large: np.ndarray) -> np.ndarray:
+    """
+    Intersect two sorted, duplicate-free id arrays in O(len(small) * log(len(large))).
+    """
+    if not len(small) or not len(large):
+        return _EMPTY
+    positions = np.searchsorted(large, small)
+    found = positions < len(large)
+    found[found] = large[positions[found]] == small[found]
+    return small[found]
+
+
+class PostingsIndex:
+    """
+    Inverted index from a key to the sorted array of ids carrying that key.
+
+    Ids are positions in the sequence of key collections the index was built from.
+    """
+
+    def __init__(self, keys_per_id: Iterable[Iterable[Hashable]]):
+        """
+        :param keys_per_id: For every id (in order), the keys it carries
+        """
+        postings: Dict[Hashable, List[int]] = defaultdict(list)
+        size = 0
+        for i, keys in enumerate(keys_per_id):
+            for key in dict.fromkeys(keys):
+                postings[key].append(i)
+            size = i + 1
+        self.size = size
+        self._postings = {
+            key: np.array(ids, dtype=np.intp) for key, ids in postings.items()
+        }
+
+    @classmethod
+    def from_pairs(
+        cls,
+        rows: np.ndarray,
+        key_ids: np.ndarray,
+        keys: Sequence[Hashable],
+        size: int,
+    ) -> "PostingsIndex":
+        """
+        Build the index from parallel (row id, key id) arrays without a Python
+        loop over rows, e.g. from columnar or CSR provider data.
+
+        :param rows: Row id of every pair
+        :param key_ids: Key id of every pair, an index into `keys`
+        :param keys: Key for each key id
+        :param size: Total number of rows
+        """
+        index = cls.__new__(cls)
+        index.size = size
+        # Sorting the combined key orders pairs by key, then row, and drops duplicates
+        combined = np.unique(
+            np.asarray(key_ids, dtype=np.int64) * max(size, 1)
+            + np.asarray(rows, dtype=np.int64)
+        )
+        pair_keys = combined // max(size, 1)
+        pair_rows = (combined % max(size, 1)).astype(np.intp)
+        bounds = np.flatnonzero(np.diff(pair_keys)) + 1
+        starts = np.concatenate(([0], bounds)).tolist() if len(combined) else []
+        ends = np.concatenate((bounds, [len(combined)])).tolist() if len(combined) else []
+        index._postings = {
+            keys[int(pair_keys[start])]: pair_rows[start:end]
+            for start, end in zip(starts, ends)
+        }
+        return index
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._postings
+
+    def keys(self) -> Iterable[Hashable]:
+        return self._postings.keys()
+
+    def postings(self, key: Hashable) -> np.ndarray:
+        """
+        Sorted ids carrying `key` (empty if the key is unknown).
+        """
+        return self._postings.get(key, _EMPTY)
+
+    def count(self, key: Hashable) -> int:
+        return len(self.postings(key))
+
+    def all_ids(self) -> np.ndarray:
+        return np.arange(self.size, dtype=np.intp)
+
+
+class IncrementalPostings(PostingsIndex):
+    """
+    Postings index that supports adding and removing ids in place.
+
+    Posting sets are updated in O(keys) per change; the sorted array of a key
+    is rebuilt lazily the next time that key is queried after it changed.
+    """
+
+    def __init__(self):
+        self.size = 0
+        self._sets: Dict[Hashable, Set[int]] = {}
+        self._postings: Dict[Hashable, np.ndarray] = {}
+        self._ids: Set[int] = set()
+        self._all_ids: Optional[np.ndarray] = None
+
+    def add(self, i: int, keys: Iterable[Hashable]) -> None:
+        self._ids.add(i)
+        self._all_ids = None
+        for key in dict.fromkeys(keys):
+            self._sets.setdefault(key, set()).add(i)
+            self._postings.pop(key, None)
+        self.size = len(self._ids)
+
+    def remove(self, i: int, keys: Iterable[Hashable]) -> None:
+        self._ids.discard(i)
+        self._all_ids = None
+        for key in dict.fromkeys(keys):
+            ids = self._sets.get(key)
+            if ids is None:
+                continue
+            ids.discard(i)
+            self._postings.pop(key, None)
+            if not ids:
+                del self._sets[key]
+        self.size = len(self._ids)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._sets
+
+    def keys(self) -> Iterable[Hashable]:
+        return self._sets.keys()
+
+    def postings(self, key: Hashable) -> np.ndarray:
+        cached = self._postings.get(key)
+        if cached is None:
+            ids = self._sets.get(key)
+            if not ids:
+                return _EMPTY
+            cached = np.array(sorted(ids), dtype=np.intp)
+            self._postings[key] = cached
+        return cached
+
+    def count(self, key: Hashable) -> int:
+        return len(self._sets.get(key, ()))
+
+    def all_ids(self) -> np.ndarray:
+        if self._all_ids is None:
+            self._all_ids = np.array(sorted(self._ids), dtype=np.intp)
+        return self._all_ids
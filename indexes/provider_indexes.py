@@ -0,0 +1,100 @@
+from typing import List, Optional, Union
+
+import numpy as np
+
+from indexes.feature_index import FeatureIndex
+from indexes.postings import PostingsIndex
+from indexes.stake_index import StakeIndex
+from models.provider import Provider
+from models.provider_table import ProviderTable
+
+
+class ProviderIndexes:
+    """
+    Lazily built indexes over one provider set.
+
+    The provider set is either a list of Provider objects or a ProviderTable;
+    every index is built from the columnar form. Ids used by every index are
+    positions in `providers`. A table and the Provider objects are treated as
+    immutable; a list may be changed in place, which `matches` detects by
+    comparing it with a copy taken when the indexes were built.
+    """
+
+    def __init__(self, providers: Union[List[Provider], ProviderTable]):
+        self.providers = providers
+        # Items the indexes were built from; rows are materialized from it
+        self._snapshot: Optional[List[Provider]] = (
+            None if isinstance(providers, ProviderTable) else list(providers)
+        )
+        self._table: Optional[ProviderTable] = (
+            providers if isinstance(providers, ProviderTable) else None
+        )
+        self._features: Optional[FeatureIndex] = None
+        self._locations: Optional[PostingsIndex] = None
+        self._stakes: Optional[StakeIndex] = None
+
+    def matches(self, providers: Union[List[Provider], ProviderTable]) -> bool:
+        """
+        Whether these indexes were built for this exact provider set, and a
+        list still holds the same providers.
+        """
+        if self.providers is not providers:
+            return False
+        # Unchanged items are the same objects, which list equality compares
+        # by identity without calling Provider.__eq__
+        return self._snapshot is None or providers == self._snapshot
+
+    def __len__(self) -> int:
+        return len(self.providers)
+
+    @property
+    def table(self) -> ProviderTable:
+        if self._table is None:
+            self._table = ProviderTable.from_providers(self._snapshot)
+        return self._table
+
+    def materialize(self, ids) -> List[Provider]:
+        """
+        Provider objects for the given ids; the original objects for a list.
+        """
+        if self._snapshot is None:
+            return self.providers.take(ids)
+        return [self._snapshot[i] for i in ids]
+
+    @property
+    def max_stake(self):
+        """
+        Largest stake in the provider set (1 when empty).
+        """
+        return self.stakes.max_stake.item() if len(self) else 1
+
+    @property
+    def max_features(self) -> int:
+        """
+        Largest number of features listed by one provider (1 when empty).
+        """
+        return int(self.table.feature_counts.max()) if len(self) else 1
+
+    @property
+    def features(self) -> FeatureIndex:
+        if self._features is None:
+            self._features = FeatureIndex.from_table(self.table)
+        return self._features
+
+    @property
+    def locations(self) -> PostingsIndex:
+        """
+        Exact location string to provider ids, for strict location matching.
+        """
+        if self._locations is None:
+            table = self.table
+            self._locations = PostingsIndex.from_pairs(
+                np.arange(len(table)), table.location_ids, table.locations, len(table)
+            )
+        return self._locations
+
+    @property
+    def stakes(self) -> StakeIndex:
+        if self._stakes is None:
+            self._stakes = StakeIndex(self.table.stakes)
+        return self._stakes
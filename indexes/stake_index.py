@@ -0,0 +1,95 @@
+import bisect
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from models.provider import Provider
+
+
+class StakeIndex:
+    """
+    Stakes sorted ascending, answering `stake >= min_stake` with a binary search.
+
+    Ids are positions in the provider list the index was built from.
+    """
+
+    def __init__(self, stakes: np.ndarray):
+        """
+        :param stakes: Stake of every provider, indexed by id
+        """
+        self.stakes = np.asarray(stakes)
+        self._order = np.argsort(self.stakes, kind="stable")
+        self._sorted = self.stakes[self._order]
+
+    @classmethod
+    def from_providers(cls, providers: List[Provider]) -> "StakeIndex":
+        return cls(np.array([p.stake for p in providers]))
+
+    def __len__(self) -> int:
+        return len(self.stakes)
+
+    @property
+    def max_stake(self):
+        return self._sorted[-1] if len(self._sorted) else None
+
+    def count_at_least(self, min_stake: float) -> int:
+        return len(self._sorted) - int(np.searchsorted(self._sorted, min_stake, "left"))
+
+    def ids_at_least(
+        self, min_stake: float, within: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """
+        Sorted ids of providers with stake >= `min_stake`.
+
+        :param within: Optional sorted candidate ids; when given, only these are
+                       checked instead of slicing the sorted stake array
+        """
+        if within is not None:
+            return within[self.stakes[within] >= min_stake]
+        start = int(np.searchsorted(self._sorted, min_stake, "left"))
+        return np.sort(self._order[start:])
+
+
+class IncrementalStakeIndex:
+    """
+    Stake index maintained in place: a sorted list of (stake, id) pairs for
+    bisecting, plus a stake-by-id array for checking candidate ids.
+    """
+
+    def __init__(self):
+        self._sorted: List[Tuple[float, int]] = []
+        self.stakes = np.zeros(0, dtype=np.float64)
+
+    def __len__(self) -> int:
+        return len(self._sorted)
+
+    def _ensure_capacity(self, i: int) -> None:
+        if i >= len(self.stakes):
+            grown = np.zeros(max(16, 2 * len(self.stakes), i + 1), dtype=np.float64)
+            grown[: len(self.stakes)] = self.stakes
+            self.stakes = grown
+
+    def add(self, i: int, stake: float) -> None:
+        self._ensure_capacity(i)
+        self.stakes[i] = stake
+        bisect.insort(self._sorted, (stake, i))
+
+    def remove(self, i: int, stake: float) -> None:
+        position = bisect.bisect_left(self._sorted, (stake, i))
+        if position < len(self._sorted) and self._sorted[position] == (stake, i):
+            del self._sorted[position]
+
+    @property
+    def max_stake(self):
+        return self._sorted[-1][0] if self._sorted else None
+
+    def count_at_least(self, min_stake: float) -> int:
+        return len(self._sorted) - bisect.bisect_left(self._sorted, (min_stake, -1))
+
+    def ids_at_least(
+        self, min_stake: float, within: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        if within is not None:
+            return within[self.stakes[within] >= min_stake]
+        start = bisect.bisect_left(self._sorted, (min_stake, -1))
+        return np.sort(np.array([i for _, i in self._sorted[start:]], dtype=np.intp))
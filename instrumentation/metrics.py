@@ -0,0 +1,302 @@
+from bisect import bisect_left
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Deque, Dict, Iterable, List, Sequence, Tuple
+
+from instrumentation.tracing import QueryTrace
+
+# Upper bounds (seconds) of the stage latency histogram buckets
+DEFAULT_BUCKETS = (
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+)
+
+COUNTER = "counter"
+GAUGE = "gauge"
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+@dataclass(frozen=True, slots=True)
+class Sample:
+    """
+    One metric value reported by a collector.
+
+    Attributes:
+        name (str): Metric name, e.g. "pairing_geocoder_memo_hits_total".
+        kind (str): "counter" or "gauge".
+        help (str): One-line description.
+        labels (Labels): Sorted (name, value) label pairs.
+        value (float): Current value.
+    """
+
+    name: str
+    kind: str
+    help: str
+    labels: Labels
+    value: float
+
+
+TraceSink = Callable[[QueryTrace], None]
+Collector = Callable[[], Iterable[Sample]]
+
+
+class _Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    escaped = (
+        (k, str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for k, v in labels
+    )
+    return "{" + ",".join(f'{k}="{v}"' for k, v in escaped) + "}"
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Instrumentation:
+    """
+    Collects query traces and exports them as metrics.
+
+    Finished traces are aggregated into per-stage latency histograms and
+    candidate counters, kept in a bounded log of recent traces, and passed
+    to every trace sink (callbacks, e.g. to ship them elsewhere). Collectors
+    report current values of external counters (geocoders, caches) when the
+    metrics are exported.
+    """
+
+    def __init__(
+        self,
+        sinks: Iterable[TraceSink] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+        keep_traces: int = 100,
+    ):
+        """
+        :param sinks: Callbacks receiving every finished QueryTrace
+        :param buckets: Upper bounds (seconds) of the stage latency histograms
+        :param keep_traces: Number of recent traces kept for `recent_traces`
+        """
+        self.sinks: List[TraceSink] = list(sinks)
+        self.buckets = tuple(sorted(buckets))
+        self._collectors: List[Collector] = []
+        self._recent: Deque[QueryTrace] = deque(maxlen=keep_traces)
+        self._stage_seconds: Dict[str, _Histogram] = {}
+        self._query_seconds: Dict[str, _Histogram] = {}
+        self._counters: Dict[Tuple[str, Labels], float] = {}
+
+    def add_sink(self, sink: TraceSink) -> None:
+        self.sinks.append(sink)
+
+    def add_collector(self, collector: Collector) -> None:
+        self._collectors.append(collector)
+
+    def start_trace(self, name: str, **attributes) -> QueryTrace:
+        return QueryTrace(name, **attributes)
+
+    def _increment(self, name: str, labels: Labels, value: float = 1) -> None:
+        key = (name, labels)
+        self._counters[key] = self._counters.get(key, 0) + value
+
+    def finish_trace(self, trace: QueryTrace) -> None:
+        trace.finish()
+        self._histogram(self._query_seconds, trace.name).observe(trace.seconds)
+        self._increment("pairing_queries_total", (("query", trace.name),))
+        for span in trace.spans:
+            labels = (("stage", span.stage),)
+            self._histogram(self._stage_seconds, span.stage).observe(span.seconds)
+            if span.candidates_in is not None:
+                self._increment(
+                    "pairing_stage_candidates_in_total", labels, span.candidates_in
+                )
+            if span.candidates_out is not None:
+                self._increment(
+                    "pairing_stage_candidates_out_total", labels, span.candidates_out
+                )
+            chunks = span.attributes.get("chunks")
+            if chunks is not None:
+                self._increment(
+                    "pairing_scoring_chunks_total",
+                    (("backend", str(span.attributes.get("backend"))),),
+                    chunks,
+                )
+        self._recent.append(trace)
+        for sink in self.sinks:
+            sink(trace)
+
+    def _histogram(self, histograms: Dict[str, _Histogram], key: str) -> _Histogram:
+        histogram = histograms.get(key)
+        if histogram is None:
+            histogram = histograms[key] = _Histogram(self.buckets)
+        return histogram
+
+    def recent_traces(self) -> List[dict]:
+        """
+        The most recent traces, oldest first, as plain dicts.
+        """
+        return [trace.to_dict() for trace in self._recent]
+
+    def _histogram_lines(
+        self, name: str, help: str, label: str, histograms: Dict[str, _Histogram]
+    ) -> List[str]:
+        lines = [f"# HELP {name} {help}", f"# TYPE {name} histogram"]
+        for key, histogram in sorted(histograms.items()):
+            cumulative = 0
+            bounds = [_format_value(b) for b in histogram.buckets] + ["+Inf"]
+            for bound, count in zip(bounds, histogram.counts):
+                cumulative += count
+                labels = _format_labels(((label, key), ("le", bound)))
+                lines.append(f"{name}_bucket{labels} {cumulative}")
+            labels = _format_labels(((label, key),))
+            lines.append(f"{name}_sum{labels} {histogram.sum!r}")
+            lines.append(f"{name}_count{labels} {histogram.count}")
+        return lines
+
+    def samples(self) -> List[Sample]:
+        """
+        Counters aggregated from traces plus the current collector values.
+        """
+        helps = {
+            "pairing_queries_total": "Queries traced, by query type.",
+            "pairing_stage_candidates_in_total": "Candidates entering each stage.",
+            "pairing_stage_candidates_out_total": "Candidates leaving each stage.",
+            "pairing_scoring_chunks_total": "Scoring chunks dispatched, by backend.",
+        }
+        samples = [
+            Sample(name, COUNTER, helps[name], labels, value)
+            for (name, labels), value in self._counters.items()
+        ]
+        for collector in self._collectors:
+            samples.extend(collector())
+        return samples
+
+    def to_prometheus(self) -> str:
+        """
+        Render every metric in the Prometheus text exposition format.
+        """
+        lines = self._histogram_lines(
+            "pairing_query_seconds",
+            "Wall time of traced queries.",
+            "query",
+            self._query_seconds,
+        )
+        lines += self._histogram_lines(
+            "pairing_stage_seconds",
+            "Wall time of each query stage.",
+            "stage",
+            self._stage_seconds,
+        )
+        by_name: Dict[str, List[Sample]] = {}
+        for sample in self.samples():
+            by_name.setdefault(sample.name, []).append(sample)
+        for name, samples in sorted(by_name.items()):
+            lines.append(f"# HELP {name} {samples[0].help}")
+            lines.append(f"# TYPE {name} {samples[0].kind}")
+            for sample in sorted(samples, key=lambda s: s.labels):
+                labels = _format_labels(sample.labels)
+                lines.append(f"{name}{labels} {_format_value(sample.value)}")
+        return "\n".join(lines) + "\n"
+
+
+_GEOCODER_COUNTERS = (
+    ("gazetteer_hits", "Lookups resolved by the offline gazetteer."),
+    ("memo_hits", "Online-fallback lookups answered by the in-process memo."),
+    ("memo_misses", "Online-fallback lookups missing from the in-process memo."),
+    ("cache_hits", "Memo misses answered by the persistent geocode cache."),
+    ("cache_misses", "Memo misses missing from the persistent geocode cache."),
+    ("online_lookups", "Requests sent to the online geocoder."),
+    ("online_errors", "Online geocoder requests that failed."),
+    ("coalesced", "Lookups that waited for an identical lookup in flight."),
+)
+
+
+def geocoder_collector(name: str, geocoder) -> Collector:
+    """
+    Collector reporting the lookup counters of a Geocoder, labelled `name`.
+    """
+
+    def collect() -> List[Sample]:
+        stats = geocoder.stats
+        labels = (("geocoder", name),)
+        samples = [
+            Sample(
+                f"pairing_geocoder_{field}_total",
+                COUNTER,
+                help,
+                labels,
+                getattr(stats, field),
+            )
+            for field, help in _GEOCODER_COUNTERS
+        ]
+        samples.append(
+            Sample(
+                "pairing_geocoder_rate_limit_sleep_seconds_total",
+                COUNTER,
+                "Time spent waiting on the online geocoder rate limiter.",
+                labels,
+                stats.rate_limit_sleep_seconds,
+            )
+        )
+        return samples
+
+    return collect
+
+
+def result_cache_collector(cache) -> Collector:
+    """
+    Collector reporting the hits, misses and size of a ResultCache.
+    """
+
+    def collect() -> List[Sample]:
+        return [
+            Sample(
+                "pairing_result_cache_hits_total",
+                COUNTER,
+                "Pairing result cache hits.",
+                (),
+                cache.hits,
+            ),
+            Sample(
+                "pairing_result_cache_misses_total",
+                COUNTER,
+                "Pairing result cache misses.",
+                (),
+                cache.misses,
+            ),
+            Sample(
+                "pairing_result_cache_entries",
+                GAUGE,
+                "Pairing results currently cached.",
+                (),
+                len(cache),
+            ),
+        ]
+
+    return collect
@@ -0,0 +1,127 @@
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+
+@dataclass(slots=True)
+class Span:
+    """
+    One timed stage of a query.
+
+    Attributes:
+        stage (str): Stage name, e.g. "filter.location" or "score.location".
+        seconds (float): Wall time of the stage.
+        candidates_in (Optional[int]): Candidates entering the stage (None if
+                                       the stage started from an index).
+        candidates_out (Optional[int]): Candidates left after the stage.
+        attributes (Dict[str, Any]): Extra stage details, e.g. the scoring backend.
+    """
+
+    stage: str
+    seconds: float = 0.0
+    candidates_in: Optional[int] = None
+    candidates_out: Optional[int] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+
+
+class _SpanTimer:
+    __slots__ = ("_trace", "span", "_start")
+
+    def __init__(self, trace: "QueryTrace", span: Span):
+        self._trace = trace
+        self.span = span
+
+    def __enter__(self) -> Span:
+        self._start = time.perf_counter()
+        return self.span
+
+    def __exit__(self, *exc_info) -> None:
+        self.span.seconds = time.perf_counter() - self._start
+        self._trace.spans.append(self.span)
+
+
+class QueryTrace:
+    """
+    Structured trace of one query: its spans in completion order plus
+    query-level attributes.
+    """
+
+    enabled = True
+
+    def __init__(self, name: str, **attributes: Any):
+        self.name = name
+        self.attributes: Dict[str, Any] = attributes
+        self.spans: List[Span] = []
+        self.seconds = 0.0
+        self._start = time.perf_counter()
+
+    def span(self, stage: str, candidates_in: Optional[int] = None, **attributes):
+        """
+        Context manager timing one stage; set `candidates_out` on the yielded span.
+        """
+        return _SpanTimer(self, Span(stage, 0.0, candidates_in, None, attributes))
+
+    def finish(self) -> None:
+        self.seconds = time.perf_counter() - self._start
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "query": self.name,
+            "seconds": self.seconds,
+            "attributes": dict(self.attributes),
+            "spans": [
+                {
+                    "stage": s.stage,
+                    "seconds": s.seconds,
+                    "candidates_in": s.candidates_in,
+                    "candidates_out": s.candidates_out,
+                    "attributes": dict(s.attributes),
+                }
+                for s in self.spans
+            ],
+        }
+
+
+class _NullSpan:
+    # Writes to the yielded span are discarded
+    __slots__ = ()
+    candidates_out = None
+
+    @property
+    def attributes(self) -> Dict[str, Any]:
+        return {}
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        pass
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class NullTrace:
+    """
+    Trace used while instrumentation is disabled: every call is a no-op and
+    no objects are allocated per stage.
+    """
+
+    enabled = False
+
+    @property
+    def attributes(self) -> Dict[str, Any]:
+        # A fresh dict each time, so writes never leak between queries
+        return {}
+
+    def span(self, stage: str, candidates_in: Optional[int] = None, **attributes):
+        return _NULL_SPAN
+
+    def finish(self) -> None:
+        pass
+
+
+NULL_TRACE = NullTrace()
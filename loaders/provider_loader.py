@@ -0,0 +1,293 @@
+import csv
+import gc
+import json
+import os
+from contextlib import contextmanager
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+from models.provider import Provider
+from models.provider_table import ProviderTable
+
+JSONL = "jsonl"
+CSV = "csv"
+COLUMNAR = "columnar"
+FORMATS = (JSONL, CSV, COLUMNAR)
+
+_EXTENSIONS = {".jsonl": JSONL, ".ndjson": JSONL, ".csv": CSV, ".npz": COLUMNAR}
+
+DEFAULT_CHUNK_SIZE = 10_000
+CSV_FIELDS = ("address", "stake", "location", "features")
+FEATURE_SEPARATOR = "|"
+
+# (line number, error message); rows of a columnar file are numbered from 1
+RowError = Tuple[int, str]
+# (line number, address, stake, location, features) as parsed, not yet validated
+_Row = Tuple[int, object, object, object, object]
+
+
+class ProviderLoadError(ValueError):
+    """
+    Raised once a provider file has been read completely if any row was
+    invalid; `errors` holds every bad row, not just the first.
+    """
+
+    def __init__(self, path: str, errors: List[RowError]):
+        self.path = path
+        self.errors = errors
+        shown = "; ".join(f"line {line}: {message}" for line, message in errors[:5])
+        more = f" (and {len(errors) - 5} more)" if len(errors) > 5 else ""
+        super().__init__(
+            f"{len(errors)} invalid provider rows in {path}: {shown}{more}"
+        )
+
+
+def detect_format(path: str) -> str:
+    """
+    Provider file format from the file extension (.jsonl/.ndjson, .csv or .npz).
+
+    :raises ProviderLoadError: If the extension is not recognized
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in _EXTENSIONS:
+        raise ProviderLoadError(
+            path,
+            [
+                (
+                    0,
+                    f"Cannot detect the provider file format, "
+                    f"expected one of {tuple(_EXTENSIONS)}",
+                )
+            ],
+        )
+    return _EXTENSIONS[extension]
+
+
+def _jsonl_rows(path: str, errors: List[RowError]) -> Iterator[_Row]:
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                yield (
+                    line_no,
+                    record["address"],
+                    record["stake"],
+                    record["location"],
+                    record.get("features", []),
+                )
+            except KeyError as e:
+                errors.append((line_no, f"Missing field {e}"))
+            except (ValueError, TypeError, AttributeError) as e:
+                errors.append((line_no, f"Invalid JSON record: {e}"))
+
+
+def _csv_rows(path: str, errors: List[RowError]) -> Iterator[_Row]:
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return
+        missing = [name for name in CSV_FIELDS[:3] if name not in header]
+        if missing:
+            raise ProviderLoadError(
+                path, [(1, f"CSV header is missing columns {missing}")]
+            )
+        address_col, stake_col, location_col = (
+            header.index(name) for name in CSV_FIELDS[:3]
+        )
+        features_col = header.index("features") if "features" in header else None
+
+        for row in reader:
+            line_no = reader.line_num
+            if not row:
+                continue
+            try:
+                features = row[features_col] if features_col is not None else ""
+                yield (
+                    line_no,
+                    row[address_col],
+                    int(row[stake_col]),
+                    row[location_col],
+                    features.split(FEATURE_SEPARATOR) if features else [],
+                )
+            except (ValueError, IndexError) as e:
+                errors.append((line_no, f"Invalid CSV row: {e}"))
+
+
+def _validated_by_line(
+    rows: List[_Row], errors: List[RowError]
+) -> Dict[int, Provider]:
+    providers = {}
+    for line_no, address, stake, location, features in rows:
+        try:
+            providers[line_no] = Provider(address, stake, location, features)
+        except (ValueError, TypeError) as e:
+            errors.append((line_no, str(e)))
+    return providers
+
+
+def _validated(rows: List[_Row], errors: List[RowError]) -> List[Provider]:
+    return list(_validated_by_line(rows, errors).values())
+
+
+def _trusted(rows: List[_Row], errors: List[RowError]) -> List[Provider]:
+    # Only cheap scalar checks run here (feature lists are trusted). The few
+    # rows they flag go through full validation: those that pass are kept in
+    # line order, those that fail are reported.
+    flagged = [
+        r
+        for r in rows
+        if type(r[2]) is not int
+        or r[2] < 0
+        or type(r[1]) is not str
+        or not r[1]
+        or type(r[3]) is not str
+        or not r[3]
+    ]
+    if not flagged:
+        return Provider.bulk_unchecked(r[1:] for r in rows)
+
+    checked = _validated_by_line(flagged, errors)
+    flagged_lines = {r[0] for r in flagged}
+    unchecked = iter(
+        Provider.bulk_unchecked(r[1:] for r in rows if r[0] not in flagged_lines)
+    )
+    return [
+        checked[r[0]] if r[0] in flagged_lines else next(unchecked)
+        for r in rows
+        if r[0] not in flagged_lines or r[0] in checked
+    ]
+
+
+@contextmanager
+def _gc_paused():
+    # Bulk loads allocate millions of long-lived, acyclic objects; each one
+    # would otherwise count towards cyclic GC passes over the growing heap.
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def iter_providers(
+    path: str,
+    format: Optional[str] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    trusted: bool = False,
+    errors: Optional[List[RowError]] = None,
+) -> Iterator[List[Provider]]:
+    """
+    Stream providers from a file in chunks of up to `chunk_size`.
+
+    JSONL records and CSV rows have the fields address, stake, location and
+    features (a list in JSONL, "|"-separated in CSV). Columnar files are
+    written by `write_columnar`.
+
+    :param format: "jsonl", "csv" or "columnar" (default: from the extension)
+    :param trusted: Skip per-row validation: values are checked per chunk and
+                    providers are built in bulk; field types must be correct
+    :param errors: If given, invalid rows are skipped and reported here;
+                   otherwise a ProviderLoadError listing every invalid row is
+                   raised after the last chunk
+    """
+    format = format or detect_format(path)
+    if format == COLUMNAR:
+        table = read_columnar(path)
+        for start in range(0, len(table), chunk_size):
+            yield table.take(range(start, min(start + chunk_size, len(table))))
+        return
+    if format not in FORMATS:
+        message = f"Unknown provider file format '{format}', expected one of {FORMATS}"
+        raise ProviderLoadError(path, [(0, message)])
+
+    collected: List[RowError] = [] if errors is None else errors
+    parse = _jsonl_rows if format == JSONL else _csv_rows
+    rows = parse(path, collected)
+    build = _trusted if trusted else _validated
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+        yield build(chunk, collected)
+
+    if errors is None and collected:
+        collected.sort()
+        raise ProviderLoadError(path, collected)
+
+
+def load_providers(
+    path: str,
+    format: Optional[str] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    trusted: bool = False,
+    errors: Optional[List[RowError]] = None,
+) -> Union[List[Provider], ProviderTable]:
+    """
+    Load a whole provider file, see `iter_providers` for the parameters.
+
+    Columnar files are returned as a ProviderTable without materializing
+    Provider objects; JSONL and CSV files as a list of providers. The cyclic
+    garbage collector is paused while loading.
+    """
+    format = format or detect_format(path)
+    if format == COLUMNAR:
+        return read_columnar(path)
+    providers: List[Provider] = []
+    with _gc_paused():
+        for chunk in iter_providers(path, format, chunk_size, trusted, errors):
+            providers.extend(chunk)
+    return providers
+
+
+def write_columnar(
+    providers: Union[Iterable[Provider], ProviderTable], path: str
+) -> None:
+    """
+    Write providers as the binary columnar format (an uncompressed .npz of
+    the ProviderTable columns).
+    """
+    table = (
+        providers
+        if isinstance(providers, ProviderTable)
+        else ProviderTable.from_providers(providers)
+    )
+    with open(path, "wb") as f:
+        np.savez(
+            f,
+            addresses=np.array(table.addresses, dtype=str),
+            stakes=table.stakes,
+            locations=np.array(table.locations, dtype=str),
+            location_ids=table.location_ids,
+            features=np.array(table.features, dtype=str),
+            feature_offsets=table.feature_offsets,
+            feature_ids=table.feature_ids,
+        )
+
+
+def read_columnar(path: str) -> ProviderTable:
+    """
+    Read a file written by `write_columnar` into a ProviderTable.
+
+    :raises ProviderLoadError: If any row holds invalid values
+    """
+    with np.load(path, allow_pickle=False) as data:
+        table = ProviderTable(
+            addresses=data["addresses"].tolist(),
+            stakes=data["stakes"],
+            locations=data["locations"].tolist(),
+            location_ids=data["location_ids"],
+            features=data["features"].tolist(),
+            feature_offsets=data["feature_offsets"],
+            feature_ids=data["feature_ids"],
+        )
+    errors = table.errors()
+    if errors:
+        raise ProviderLoadError(path, errors)
+    return table
@@ -0,0 +1,242 @@
+import json
+import mmap
+import os
+import struct
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+
+from loaders.provider_loader import ProviderLoadError
+from models.provider import Provider
+from models.provider_table import ProviderTable
+from models.string_column import StringColumn
+
+SNAPSHOT_EXTENSION = ".snap"
+SNAPSHOT_MAGIC = b"PSNAP\0\0\0"
+SNAPSHOT_VERSION = 1
+
+# Magic, format version and byte length of the JSON header that follows
+_PREAMBLE = struct.Struct("<8sII")
+# Every section starts on a cache-line boundary
+_ALIGNMENT = 64
+
+# Fixed-width columns with their on-disk dtypes (always little-endian)
+_COLUMNS = (
+    ("stakes", "<i8"),
+    ("location_ids", "<i4"),
+    ("feature_offsets", "<i8"),
+    ("feature_ids", "<i4"),
+)
+# String tables, each stored as "<name>.offsets" (<i8) and "<name>.data" (UTF-8)
+_STRING_TABLES = ("addresses", "locations", "features")
+
+
+class SnapshotTable(ProviderTable):
+    """
+    ProviderTable whose columns are read-only views of a memory-mapped
+    snapshot file; addresses are decoded only when a row is materialized.
+
+    Pickling a snapshot table pickles its path only: worker processes map
+    the same file and share its page-cache pages instead of receiving a copy.
+    """
+
+    def __init__(self, path: str, buffer: mmap.mmap, **columns):
+        super().__init__(**columns)
+        self.path = path
+        self._buffer = buffer
+
+    def __reduce__(self):
+        return load_snapshot, (self.path,)
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // _ALIGNMENT) * _ALIGNMENT
+
+
+def _string_sections(
+    name: str, strings: Iterable[str]
+) -> List[Tuple[str, np.ndarray]]:
+    if isinstance(strings, StringColumn):
+        column = strings
+    else:
+        column = StringColumn.from_strings(list(strings))
+    return [
+        (f"{name}.offsets", np.asarray(column.offsets, dtype="<i8")),
+        (f"{name}.data", np.frombuffer(column.data, dtype=np.uint8)),
+    ]
+
+
+def save_snapshot(
+    providers: Union[Iterable[Provider], ProviderTable],
+    path: str,
+    geocoder=None,
+) -> None:
+    """
+    Write providers as a binary snapshot for `load_snapshot`.
+
+    Layout: magic, version, header length, a JSON header giving the provider
+    count and the offset, dtype and shape of every section, then the
+    64-byte aligned sections: the fixed-width columns, the CSR feature lists,
+    the address, location and feature string tables (offsets plus UTF-8
+    bytes) and, if known, the (latitude, longitude) column.
+
+    :param providers: Provider objects (converted through
+                      `ProviderTable.from_providers`) or a ProviderTable
+    :param geocoder: If given, locations are resolved and the coordinate
+                     column is stored, so loaded tables need no geocoding
+    """
+    table = (
+        providers
+        if isinstance(providers, ProviderTable)
+        else ProviderTable.from_providers(providers)
+    )
+    if geocoder is not None and table.coords is None:
+        table.resolve(geocoder)
+
+    arrays = [
+        (name, np.asarray(getattr(table, name), dtype=dtype))
+        for name, dtype in _COLUMNS
+    ]
+    for name in _STRING_TABLES:
+        arrays += _string_sections(name, getattr(table, name))
+    if table.coords is not None:
+        arrays.append(("coords", np.asarray(table.coords, dtype="<f8")))
+
+    sections: Dict[str, dict] = {}
+    offset = 0
+    for name, array in arrays:
+        sections[name] = {
+            "offset": offset,
+            "dtype": array.dtype.str,
+            "shape": list(array.shape),
+        }
+        offset = _aligned(offset + array.nbytes)
+    header = json.dumps({"providers": len(table), "sections": sections}).encode()
+    data_start = _aligned(_PREAMBLE.size + len(header))
+
+    with open(path, "wb") as f:
+        f.write(_PREAMBLE.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(header)))
+        f.write(header)
+        for name, array in arrays:
+            f.seek(data_start + sections[name]["offset"])
+            f.write(np.ascontiguousarray(array).tobytes())
+        f.truncate(data_start + offset)
+
+
+def _read_header(path: str, buffer: mmap.mmap) -> Tuple[dict, int]:
+    if len(buffer) < _PREAMBLE.size:
+        raise ProviderLoadError(path, [(0, "File is too short to be a snapshot")])
+    magic, version, header_size = _PREAMBLE.unpack_from(buffer)
+    if magic != SNAPSHOT_MAGIC:
+        raise ProviderLoadError(path, [(0, "Not a provider snapshot (bad magic)")])
+    if version != SNAPSHOT_VERSION:
+        raise ProviderLoadError(
+            path,
+            [
+                (
+                    0,
+                    f"Unsupported snapshot version {version}, "
+                    f"expected {SNAPSHOT_VERSION}",
+                )
+            ],
+        )
+    end = _PREAMBLE.size + header_size
+    try:
+        header = json.loads(bytes(buffer[_PREAMBLE.size : end]))
+        header["providers"], header["sections"]
+    except (ValueError, KeyError, TypeError) as e:
+        raise ProviderLoadError(path, [(0, f"Invalid snapshot header: {e}")])
+    return header, _aligned(end)
+
+
+def _section(
+    path: str, buffer: mmap.mmap, header: dict, data_start: int, name: str
+) -> Optional[np.ndarray]:
+    spec = header["sections"].get(name)
+    if spec is None:
+        return None
+    try:
+        dtype = np.dtype(spec["dtype"])
+        shape = tuple(spec["shape"])
+        count = int(np.prod(shape))
+        start = data_start + spec["offset"]
+        if start < data_start or start + count * dtype.itemsize > len(buffer):
+            raise ValueError("section extends past the end of the file")
+        array = np.frombuffer(buffer, dtype=dtype, count=count, offset=start)
+    except (ValueError, KeyError, TypeError) as e:
+        raise ProviderLoadError(
+            path, [(0, f"Invalid snapshot section '{name}': {e}")]
+        )
+    return array.reshape(shape)
+
+
+def _strings(
+    path: str, buffer: mmap.mmap, header: dict, data_start: int, name: str
+) -> StringColumn:
+    offsets = _section(path, buffer, header, data_start, f"{name}.offsets")
+    data = _section(path, buffer, header, data_start, f"{name}.data")
+    if offsets is None or data is None:
+        raise ProviderLoadError(
+            path, [(0, f"Snapshot has no '{name}' string table")]
+        )
+    if len(offsets) == 0 or offsets[0] != 0 or offsets[-1] != len(data):
+        raise ProviderLoadError(path, [(0, f"Corrupt '{name}' string table")])
+    return StringColumn(offsets, data)
+
+
+def load_snapshot(path: str, verify: bool = False) -> SnapshotTable:
+    """
+    Map a file written by `save_snapshot` and return it as a table.
+
+    Loading is zero-copy: the numeric columns and the address table are
+    views of the read-only mapping, so startup cost does not grow with the
+    provider count and processes mapping the same file share its memory.
+    Only the interned location and feature names are decoded.
+
+    :param verify: Also check every row (stakes, ids, addresses), as
+                   `read_columnar` does; this reads the whole file. Rows of
+                   an unverified table are validated as they are materialized
+    :raises ProviderLoadError: If the file is not a valid snapshot
+    """
+    path = os.fspath(path)
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            raise ProviderLoadError(path, [(0, "File is too short to be a snapshot")])
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    header, data_start = _read_header(path, buffer)
+    columns = {}
+    for name, _ in _COLUMNS:
+        column = _section(path, buffer, header, data_start, name)
+        if column is None:
+            raise ProviderLoadError(path, [(0, f"Snapshot has no '{name}' column")])
+        columns[name] = column
+    addresses = _strings(path, buffer, header, data_start, "addresses")
+    locations = _strings(path, buffer, header, data_start, "locations")
+    features = _strings(path, buffer, header, data_start, "features")
+    coords = _section(path, buffer, header, data_start, "coords")
+    n = header["providers"]
+    offsets = columns["feature_offsets"]
+    if len(addresses) != n or (coords is not None and coords.shape != (n, 2)):
+        raise ProviderLoadError(
+            path, [(0, "Column lengths do not match the snapshot header")]
+        )
+    if len(offsets) != n + 1 or offsets[-1] != len(columns["feature_ids"]):
+        raise ProviderLoadError(path, [(0, "feature_offsets do not match feature_ids")])
+    try:
+        table = SnapshotTable(
+            path,
+            buffer,
+            addresses=addresses,
+            locations=locations.tolist(),
+            features=features.tolist(),
+            coords=coords,
+            **columns,
+        )
+    except ValueError as e:
+        raise ProviderLoadError(path, [(0, str(e))])
+
+    errors = table.errors() if verify else []
+    if errors:
+        raise ProviderLoadError(path, errors)
+    return table
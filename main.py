@@ -1,11 +1,23 @@
 #!/usr/bin/env python3.12
 
 import argparse
-from typing import List
+import asyncio
+import os
+from functools import partial
+from typing import List, Optional, Union
 
+from geo.distance import DISTANCE_MODELS, GEODESIC
+from geo.distance_table import DistanceTable
+from geo.geocode_cache import GeocodeCache
+from geo.geocoder import Geocoder, shared_geocoder
+from loaders.provider_loader import ProviderLoadError, load_providers
+from loaders.snapshot import SNAPSHOT_EXTENSION, load_snapshot, save_snapshot
 from models.pairing_score import PairingScore
 from models.policy import ConsumerPolicy
 from models.provider import Provider
+from models.provider_table import ProviderTable
+from pairing_system.backends import BACKEND_NAMES
+from pairing_system.service import PairingService, serve
 from pairing_system.system import PairingSystem
 
 
@@ -41,8 +53,65 @@ def print_pairing_results(pairing_scores: List[PairingScore]) -> None:
         print(f"   Components: {pairing_score.components}\n")
 
 
+def create_geocoder(args) -> Optional[Geocoder]:
+    if not args.online_geocoding and not args.geocode_cache:
+        return None
+    cache = GeocodeCache(args.geocode_cache) if args.geocode_cache else None
+    return Geocoder(online_fallback=args.online_geocoding, cache=cache)
+
+
+def load_distance_table(
+    path: Optional[str], geocoder: Geocoder, distance_model: str
+) -> Optional[DistanceTable]:
+    if path is None:
+        return None
+    if not os.path.exists(path):
+        return DistanceTable(geocoder, distance_model)
+    table = DistanceTable.load(path, geocoder)
+    if table.distance_model != distance_model:
+        raise SystemExit(
+            f"Distance table {path} uses the {table.distance_model} distance model"
+        )
+    return table
+
+
+def load_provider_set(
+    path: Optional[str], trusted: bool = False
+) -> Union[List[Provider], ProviderTable]:
+    if path is None:
+        return create_sample_providers()
+    if path.endswith(SNAPSHOT_EXTENSION):
+        return load_snapshot(path)
+    return load_providers(path, trusted=trusted)
+
+
+def warm_geocode_cache(
+    geocoder: Geocoder, providers: Union[List[Provider], ProviderTable]
+) -> None:
+    locations = (
+        providers.locations
+        if isinstance(providers, ProviderTable)
+        else (p.location for p in providers)
+    )
+    resolved = geocoder.warm(locations)
+    unresolved = [location for location, coords in resolved.items() if not coords]
+    print(f"Resolved {len(resolved) - len(unresolved)}/{len(resolved)} locations.")
+    if unresolved:
+        print(f"Unresolved: {', '.join(unresolved)}")
+
+
 def parse_args():
     parser = argparse.ArgumentParser(description="Run Lava Provider Pairing CLI")
+    parser.add_argument(
+        "command",
+        nargs="?",
+        choices=["pair", "warm", "serve", "snapshot"],
+        default="pair",
+        help="'pair' runs a pairing query (default), "
+        "'warm' pre-resolves every provider location into the geocode cache, "
+        "'serve' runs a long-lived HTTP/JSON pairing service, "
+        "'snapshot' converts the provider set into a binary snapshot (--output)",
+    )
     parser.add_argument(
         "--location", type=str, default="US", help="Required location (default: US)"
     )
@@ -66,16 +135,131 @@ def parse_args():
         default=2000,
         help="Max distance in km for flexible location filtering",
     )
+    parser.add_argument(
+        "--top-k",
+        type=int,
+        default=5,
+        help="Number of top matched providers to return (default: 5)",
+    )
+    parser.add_argument(
+        "--distance-model",
+        choices=DISTANCE_MODELS,
+        default=GEODESIC,
+        help="Distance model for flexible filtering and location scoring (default: geodesic)",
+    )
+    parser.add_argument(
+        "--backend",
+        choices=BACKEND_NAMES,
+        default="auto",
+        help="Execution backend for scoring (default: auto, chosen by input size)",
+    )
+    parser.add_argument(
+        "--online-geocoding",
+        action="store_true",
+        help="Fall back to Nominatim for locations unknown to the offline gazetteer",
+    )
+    parser.add_argument(
+        "--geocode-cache",
+        type=str,
+        default=None,
+        help="Path of a persistent SQLite geocode cache shared across runs",
+    )
+    parser.add_argument(
+        "--distance-table",
+        type=str,
+        default=None,
+        help="Path of a saved location distance table (.npz), "
+        "created by 'warm' and read by 'pair' and 'serve'",
+    )
+    parser.add_argument(
+        "--providers",
+        type=str,
+        default=None,
+        help="Provider file (.jsonl, .csv, columnar .npz or snapshot .snap); "
+        "default: built-in samples",
+    )
+    parser.add_argument(
+        "--output",
+        type=str,
+        default=None,
+        help="Path of the snapshot written by 'snapshot' (default: providers.snap)",
+    )
+    parser.add_argument(
+        "--trusted-providers",
+        action="store_true",
+        help="Load the provider file through the bulk path without per-row validation",
+    )
+    parser.add_argument(
+        "--host", type=str, default="127.0.0.1", help="Service bind address (serve)"
+    )
+    parser.add_argument(
+        "--port", type=int, default=8080, help="Service port (serve, default: 8080)"
+    )
     return parser.parse_args()
 
 
 def main():
     args = parse_args()
-    providers = create_sample_providers()
-    policy = create_consumer_policy(args.location, args.features, args.min_stake)
+    load = partial(load_provider_set, args.providers, args.trusted_providers)
+    geocoder = create_geocoder(args)
+    if args.distance_table and geocoder is None:
+        geocoder = shared_geocoder()
+    distance_table = load_distance_table(
+        args.distance_table, geocoder, args.distance_model
+    )
+    system = PairingSystem(
+        strict=args.strict,
+        max_distance_km=args.max_distance,
+        geocoder=geocoder,
+        distance_model=args.distance_model,
+        backend=args.backend,
+        distance_table=distance_table,
+        # Loaded provider lists are never changed in place
+        cache_lists=True,
+    )
 
-    system = PairingSystem(strict=args.strict, max_distance_km=args.max_distance)
-    best_pairing_scores = system.get_pairing_list(providers, policy)
+    if args.command == "serve":
+        # The service loads (and reloads) the provider set itself
+        service = PairingService(system, load)
+        try:
+            asyncio.run(serve(service, args.host, args.port))
+        except KeyboardInterrupt:
+            pass
+        except (OSError, ProviderLoadError) as e:
+            raise SystemExit(f"Cannot start the pairing service: {e}")
+        return
+
+    try:
+        providers = load()
+    except (OSError, ProviderLoadError) as e:
+        raise SystemExit(f"Cannot load providers: {e}")
+
+    if args.command == "snapshot":
+        output = args.output or "providers" + SNAPSHOT_EXTENSION
+        save_snapshot(providers, output, geocoder or shared_geocoder())
+        print(f"Saved {len(providers)} providers to {output}.")
+        return
+
+    if args.command == "warm":
+        warm_geocode_cache(geocoder or shared_geocoder(), providers)
+        if distance_table is not None:
+            locations = (
+                providers.locations
+                if isinstance(providers, ProviderTable)
+                else list(dict.fromkeys(p.location for p in providers))
+            )
+            distance_table.ids(locations)
+            # Keep a row for every provider location
+            distance_table.max_rows = max(distance_table.max_rows, len(locations))
+            for location in locations:
+                distance_table.row(location)
+            distance_table.save(args.distance_table)
+            print(f"Saved distances between {len(distance_table)} locations.")
+        return
+
+    policy = create_consumer_policy(args.location, args.features, args.min_stake)
+    with system:
+        best_pairing_scores = system.get_pairing_list(providers, policy, k=args.top_k)
 
     if not best_pairing_scores:
         print(
@@ -0,0 +1,19 @@
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from models.pairing_score import PairingScore
+
+
+@dataclass(frozen=True, slots=True)
+class PairingPage:
+    """
+    One page of ranked pairing results.
+
+    Attributes:
+        results (List[PairingScore]): Results of this page, best first.
+        next_cursor (Optional[str]): Opaque token for the following page,
+                                     or None when there are no more results.
+    """
+
+    results: List[PairingScore] = field(default_factory=list)
+    next_cursor: Optional[str] = None
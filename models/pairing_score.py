@@ -1,8 +1,25 @@
 from dataclasses import dataclass, field
-from typing import Dict
+from typing import Dict, Tuple
 
 from models.provider import Provider
 
+# Component names, in the order of the (stake, feature, location) tuples the
+# ranking engine produces
+COMPONENT_KEYS = ("stake_score", "feature_score", "location_score")
+
+
+class ScoreComponents(dict):
+    """
+    Dict of a (stake, feature, location) score tuple keyed by COMPONENT_KEYS,
+    built straight from the tuple the ranking engine produces. Being a plain
+    dict subclass, it serializes to JSON and passes `isinstance(x, dict)`.
+    """
+
+    __slots__ = ()
+
+    def __init__(self, values: Tuple[float, float, float]):
+        super().__init__(zip(COMPONENT_KEYS, values))
+
 
 @dataclass(frozen=True, slots=True)
 class PairingScore:
@@ -15,6 +32,8 @@ class PairingScore:
         score (float): The total aggregated score between 0.0 and 1.0.
         components (Dict[str, float]): A breakdown of individual score components,
                                        e.g., {"stake": 0.8, "feature": 1.0, "location": 0.7}.
+                                       Scores built by the ranking engine hold a
+                                       ScoreComponents, a dict subclass.
     """
 
     provider: Provider
@@ -35,3 +54,25 @@ class PairingScore:
                 raise TypeError(f"Component value for '{key}' must be a float")
             if not 0.0 <= value <= 1.0:
                 raise ValueError(f"Component score '{key}' must be between 0.0 and 1.0")
+
+    @classmethod
+    def unchecked(
+        cls, provider: Provider, score: float, components: Tuple[float, float, float]
+    ) -> "PairingScore":
+        """
+        Build a score from a (stake, feature, location) tuple without running
+        `__post_init__`.
+
+        Only for values the ranking engine produced itself, which are already
+        within [0.0, 1.0].
+        """
+        pairing_score = object.__new__(cls)
+        _set_provider(pairing_score, provider)
+        _set_score(pairing_score, score)
+        _set_components(pairing_score, ScoreComponents(components))
+        return pairing_score
+
+
+_set_provider = PairingScore.provider.__set__
+_set_score = PairingScore.score.__set__
+_set_components = PairingScore.components.__set__
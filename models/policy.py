@@ -1,5 +1,5 @@
 from dataclasses import dataclass, field
-from typing import List
+from typing import List, Tuple
 
 
 @dataclass(frozen=True, slots=True)
@@ -19,3 +19,14 @@ class ConsumerPolicy:
 
         if self.min_stake < 0:
             raise ValueError("min_stake must be a non-negative integer")
+
+    def canonical(self) -> Tuple[str, Tuple[str, ...], int]:
+        """
+        Hashable canonical form: policies that only differ in the order or
+        duplication of their features have the same canonical form.
+        """
+        return (
+            self.required_location,
+            tuple(sorted(set(self.required_features))),
+            self.min_stake,
+        )
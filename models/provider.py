@@ -1,5 +1,5 @@
 from dataclasses import dataclass, field
-from typing import List
+from typing import Iterable, List, Tuple
 
 
 @dataclass(frozen=True, slots=True)
@@ -23,3 +23,29 @@ class Provider:
             isinstance(f, str) for f in self.features
         ):
             raise ValueError("Features must be a list of strings")
+
+    @classmethod
+    def bulk_unchecked(
+        cls, rows: Iterable[Tuple[str, int, str, List[str]]]
+    ) -> List["Provider"]:
+        """
+        Build many providers from (address, stake, location, features) rows
+        without running `__post_init__`.
+
+        Only for rows already validated by the caller (e.g. a trusted bulk
+        loader); invalid values are stored as given.
+        """
+        new = object.__new__
+        set_address = cls.address.__set__
+        set_stake = cls.stake.__set__
+        set_location = cls.location.__set__
+        set_features = cls.features.__set__
+        providers = []
+        for address, stake, location, features in rows:
+            provider = new(cls)
+            set_address(provider, address)
+            set_stake(provider, stake)
+            set_location(provider, location)
+            set_features(provider, features)
+            providers.append(provider)
+        return providers
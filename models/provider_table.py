@@ -0,0 +1,261 @@
+from hashlib import blake2b
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from models.provider import Provider
+from models.string_column import StringColumn
+
+
+class ProviderTable:
+    """
+    Columnar (struct-of-arrays) store of providers.
+
+    Columns:
+        addresses (Sequence[str]): Provider addresses (a list or a StringColumn).
+        stakes (np.ndarray): Stake per provider.
+        location_ids (np.ndarray): Index into `locations` (interned location strings).
+        feature_offsets (np.ndarray): CSR row offsets, length n + 1.
+        feature_ids (np.ndarray): CSR values, indexes into `features`.
+        coords (Optional[np.ndarray]): Resolved (latitude, longitude) per provider,
+                                       NaN if unresolved; filled by `resolve`.
+
+    Row ids are positions in the table. `validated` tells whether every row is
+    known to be valid: set for tables built from Provider objects or passing
+    `errors`, and kept by `subset`. Rows of other tables (e.g. a snapshot
+    loaded without verification) are validated as they are materialized.
+    """
+
+    def __init__(
+        self,
+        addresses: Sequence[str],
+        stakes: np.ndarray,
+        locations: Sequence[str],
+        location_ids: np.ndarray,
+        features: Sequence[str],
+        feature_offsets: np.ndarray,
+        feature_ids: np.ndarray,
+        coords: Optional[np.ndarray] = None,
+        validated: bool = False,
+    ):
+        # A StringColumn (e.g. memory-mapped) is kept as is, not copied into a list
+        self.addresses = (
+            addresses if isinstance(addresses, StringColumn) else list(addresses)
+        )
+        self.stakes = np.asarray(stakes)
+        self.locations = list(locations)
+        self.location_ids = np.asarray(location_ids, dtype=np.int32)
+        self.features = list(features)
+        self.feature_offsets = np.asarray(feature_offsets, dtype=np.int64)
+        self.feature_ids = np.asarray(feature_ids, dtype=np.int32)
+        self.coords = coords
+        self.validated = validated
+        self._digest: Optional[str] = None
+
+        n = len(self.addresses)
+        if not (len(self.stakes) == len(self.location_ids) == n):
+            raise ValueError("All provider columns must have the same length")
+        if len(self.feature_offsets) != n + 1:
+            raise ValueError("feature_offsets must have one entry per provider plus one")
+
+    @classmethod
+    def from_providers(cls, providers: Iterable[Provider]) -> "ProviderTable":
+        """
+        Build a table from Provider objects, interning locations and features.
+        """
+        addresses: List[str] = []
+        stakes: List[int] = []
+        location_index: Dict[str, int] = {}
+        location_ids: List[int] = []
+        feature_index: Dict[str, int] = {}
+        feature_ids: List[int] = []
+        offsets = [0]
+
+        for p in providers:
+            addresses.append(p.address)
+            stakes.append(p.stake)
+            location_ids.append(location_index.setdefault(p.location, len(location_index)))
+            feature_ids.extend(
+                feature_index.setdefault(f, len(feature_index)) for f in p.features
+            )
+            offsets.append(len(feature_ids))
+
+        return cls(
+            addresses=addresses,
+            stakes=np.array(stakes) if stakes else np.empty(0, dtype=np.int64),
+            locations=list(location_index),
+            location_ids=np.array(location_ids, dtype=np.int32),
+            features=list(feature_index),
+            feature_offsets=np.array(offsets, dtype=np.int64),
+            feature_ids=np.array(feature_ids, dtype=np.int32),
+            validated=True,
+        )
+
+    def __len__(self) -> int:
+        return len(self.addresses)
+
+    @property
+    def feature_counts(self) -> np.ndarray:
+        """
+        Number of features listed by each provider.
+        """
+        return np.diff(self.feature_offsets)
+
+    def provider(self, i: int) -> Provider:
+        """
+        Materialize row `i` as a Provider.
+        """
+        return self.take((i,))[0]
+
+    def take(self, ids: Iterable[int]) -> List[Provider]:
+        """
+        Materialize the given rows as Provider objects, in order.
+
+        Rows of a validated table skip Provider validation; other rows are
+        validated here.
+
+        :raises ValueError: If a row of an unvalidated table is invalid
+        """
+        ids = np.fromiter(ids, dtype=np.intp)
+        addresses, locations, features = self.addresses, self.locations, self.features
+        feature_ids = self.feature_ids
+        starts = self.feature_offsets[ids].tolist()
+        ends = self.feature_offsets[ids + 1].tolist()
+        rows = (
+            (
+                addresses[i],
+                stake,
+                locations[location_id],
+                [features[f] for f in feature_ids[start:end].tolist()],
+            )
+            for i, stake, location_id, start, end in zip(
+                ids.tolist(),
+                self.stakes[ids].tolist(),
+                self.location_ids[ids].tolist(),
+                starts,
+                ends,
+            )
+        )
+        if self.validated:
+            return Provider.bulk_unchecked(rows)
+        return [Provider(*row) for row in rows]
+
+    def subset(self, ids: Iterable[int]) -> "ProviderTable":
+        """
+        Table of the given rows, in order, sharing the interned location and
+        feature strings (ids keep their meaning across both tables).
+        """
+        ids = np.fromiter(ids, dtype=np.intp)
+        starts = self.feature_offsets[ids]
+        counts = self.feature_offsets[ids + 1] - starts
+        offsets = np.zeros(len(ids) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        # Position of every kept feature in the source CSR values
+        gather = np.repeat(starts - offsets[:-1], counts) + np.arange(offsets[-1])
+        addresses = self.addresses
+        return ProviderTable(
+            addresses=[addresses[i] for i in ids.tolist()],
+            stakes=self.stakes[ids],
+            locations=self.locations,
+            location_ids=self.location_ids[ids],
+            features=self.features,
+            feature_offsets=offsets,
+            feature_ids=self.feature_ids[gather],
+            coords=None if self.coords is None else self.coords[ids],
+            validated=self.validated,
+        )
+
+    def errors(self) -> List[Tuple[int, str]]:
+        """
+        Check every row with vectorized column checks; a table without errors
+        is marked validated.
+
+        :return: Sorted (row number, message) pairs, row numbers starting at 1;
+                 a malformed feature column is reported once, as row 0
+        """
+        offsets = self.feature_offsets
+        if len(offsets) and (offsets[0] != 0 or (np.diff(offsets) < 0).any()):
+            return [(0, "feature_offsets must start at 0 and be non-decreasing")]
+        if len(self.feature_ids) != (offsets[-1] if len(offsets) else 0) or (
+            len(self.feature_ids)
+            and (
+                self.feature_ids.min() < 0
+                or self.feature_ids.max() >= len(self.features)
+            )
+        ):
+            return [(0, "feature_ids do not match feature_offsets and features")]
+
+        if isinstance(self.addresses, StringColumn):
+            empty = np.diff(self.addresses.offsets) == 0
+        else:
+            empty = np.array([not a for a in self.addresses], dtype=bool)
+        checks = [
+            (self.stakes < 0, "Stake must be a non-negative integer"),
+            (
+                (self.location_ids < 0) | (self.location_ids >= len(self.locations)),
+                "Location id out of range",
+            ),
+            (empty, "Provider address must be a non-empty string"),
+        ]
+        errors = sorted(
+            (row + 1, message)
+            for bad, message in checks
+            for row in np.flatnonzero(bad).tolist()
+        )
+        self.validated = not errors
+        return errors
+
+    def digest(self) -> str:
+        """
+        Digest of the table content (addresses, stakes, locations and
+        features, not the resolved coordinates). Equal for every table
+        holding the same rows in the same order; computed once, as the
+        columns are treated as immutable.
+        """
+        if self._digest is None:
+            h = blake2b(digest_size=16)
+            for name in ("addresses", "locations", "features"):
+                strings = getattr(self, name)
+                if not isinstance(strings, StringColumn):
+                    strings = StringColumn.from_strings(strings)
+                h.update(np.asarray(strings.offsets, dtype="<i8").tobytes())
+                h.update(strings.data)
+            for column in (self.stakes, self.location_ids, self.feature_offsets):
+                h.update(np.asarray(column, dtype="<i8").tobytes())
+            h.update(np.asarray(self.feature_ids, dtype="<i4").tobytes())
+            self._digest = h.hexdigest()
+        return self._digest
+
+    def to_providers(self) -> List[Provider]:
+        return self.take(range(len(self)))
+
+    def __iter__(self) -> Iterator[Provider]:
+        return (self.provider(i) for i in range(len(self)))
+
+    def resolve(self, geocoder) -> np.ndarray:
+        """
+        Geocode every distinct location once and fill the `coords` column.
+
+        :param geocoder: Object with a `geocode(location) -> Optional[(lat, lon)]` method
+        :return: The (n, 2) coordinate column
+        """
+        location_coords = np.array(
+            [geocoder.geocode(loc) or (np.nan, np.nan) for loc in self.locations],
+            dtype=np.float64,
+        ).reshape(-1, 2)
+        self.coords = location_coords[self.location_ids]
+        return self.coords
+
+    def nbytes(self) -> int:
+        """
+        Memory held by the NumPy columns (excluding the interned strings).
+        """
+        arrays = [
+            self.stakes,
+            self.location_ids,
+            self.feature_offsets,
+            self.feature_ids,
+        ]
+        if self.coords is not None:
+            arrays.append(self.coords)
+        return sum(a.nbytes for a in arrays)
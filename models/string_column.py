@@ -0,0 +1,62 @@
+from typing import Iterator, List, Sequence, Union, overload
+
+import numpy as np
+
+
+class StringColumn(Sequence[str]):
+    """
+    Read-only column of strings stored as one UTF-8 buffer plus offsets
+    (string i is data[offsets[i]:offsets[i + 1]]).
+
+    Strings are decoded on access, so a column backed by a memory-mapped
+    file costs nothing until it is read.
+    """
+
+    __slots__ = ("offsets", "data")
+
+    def __init__(self, offsets: np.ndarray, data: Union[bytes, memoryview, np.ndarray]):
+        """
+        :param offsets: n + 1 non-decreasing byte offsets into `data`
+        :param data: Concatenated UTF-8 encoded strings
+        """
+        self.offsets = offsets
+        self.data = memoryview(data).cast("B")
+
+    @classmethod
+    def from_strings(cls, strings: Sequence[str]) -> "StringColumn":
+        encoded = [s.encode() for s in strings]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(b) for b in encoded], out=offsets[1:])
+        return cls(offsets, b"".join(encoded))
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    @overload
+    def __getitem__(self, i: int) -> str: ...
+
+    @overload
+    def __getitem__(self, i: slice) -> List[str]: ...
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("StringColumn index out of range")
+        start, end = self.offsets[i : i + 2].tolist()
+        return str(self.data[start:end], "utf-8")
+
+    def __iter__(self) -> Iterator[str]:
+        data = self.data
+        bounds = self.offsets.tolist()
+        for start, end in zip(bounds, bounds[1:]):
+            yield str(data[start:end], "utf-8")
+
+    def tolist(self) -> List[str]:
+        return list(self)
+
+    @property
+    def nbytes(self) -> int:
+        return self.offsets.nbytes + self.data.nbytes
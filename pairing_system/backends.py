@@ -0,0 +1,244 @@
+import math
+import os
+import sys
+import weakref
+from abc import ABC, abstractmethod
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, TypeVar, Union
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def gil_enabled() -> bool:
+    """
+    Whether the running interpreter has a GIL (always True before Python 3.13).
+    """
+    is_gil_enabled = getattr(sys, "_is_gil_enabled", None)
+    return True if is_gil_enabled is None else is_gil_enabled()
+
+
+def chunked(items: Sequence[T], chunk_size: int) -> List[Sequence[T]]:
+    return [items[i : i + chunk_size] for i in range(0, len(items), chunk_size)]
+
+
+class ExecutionBackend(ABC):
+    """
+    Runs a function over chunks of work items.
+
+    `fn` receives one chunk (a sequence) and returns a list of results; the
+    concatenated results keep the order of the input items.
+
+    Backends holding worker pools release them in `close`; a backend is also
+    a context manager closing itself on exit. Pools of a backend dropped
+    without `close` are shut down (without waiting) when it is garbage
+    collected, or at interpreter exit.
+    """
+
+    name = "base"
+
+    def __init__(self, max_workers: Optional[int] = None, min_chunk_size: int = 256):
+        """
+        :param max_workers: Worker count (default: number of CPUs)
+        :param min_chunk_size: Smallest number of items sent to a worker at once
+        """
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.min_chunk_size = min_chunk_size
+
+    def chunk_size(self, n_items: int) -> int:
+        # About four chunks per worker balances load without per-item task overhead
+        return max(self.min_chunk_size, math.ceil(n_items / (self.max_workers * 4)))
+
+    def fan_out(self, n_items: int) -> Tuple[str, int]:
+        """
+        (backend name, number of chunks) that `map_chunks` would use for
+        `n_items` items.
+        """
+        return self.name, math.ceil(n_items / self.chunk_size(n_items))
+
+    @abstractmethod
+    def map_chunks(
+        self, fn: Callable[[Sequence[T]], List[R]], items: Sequence[T]
+    ) -> List[R]:
+        """
+        Apply `fn` to consecutive chunks of `items` and concatenate the results.
+        """
+        pass
+
+    def close(self) -> None:
+        """
+        Release any worker threads or processes.
+        """
+        pass
+
+    def __enter__(self) -> "ExecutionBackend":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class SerialBackend(ExecutionBackend):
+    name = "serial"
+
+    def fan_out(self, n_items: int) -> Tuple[str, int]:
+        return self.name, 1 if n_items else 0
+
+    def map_chunks(self, fn, items):
+        return fn(items) if len(items) else []
+
+
+class _ExecutorBackend(ExecutionBackend):
+    """
+    Backend over a persistent executor, created on first use and reused by
+    every later call until `close`.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, min_chunk_size: int = 256):
+        super().__init__(max_workers, min_chunk_size)
+        self._executor: Optional[Executor] = None
+        self._finalizer: Optional[weakref.finalize] = None
+
+    @abstractmethod
+    def _create_executor(self) -> Executor:
+        pass
+
+    def map_chunks(self, fn, items):
+        chunks = chunked(items, self.chunk_size(len(items)))
+        if len(chunks) <= 1:
+            return fn(items) if len(items) else []
+        if self._executor is None:
+            self._executor = self._create_executor()
+            # The finalizer refers to the executor only, not to the backend
+            self._finalizer = weakref.finalize(
+                self, self._executor.shutdown, wait=False
+            )
+        results: List = []
+        for part in self._executor.map(fn, chunks):
+            results.extend(part)
+        return results
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._finalizer.detach()
+            self._executor.shutdown()
+            self._executor = None
+            self._finalizer = None
+
+
+class ThreadPoolBackend(_ExecutorBackend):
+    """
+    Persistent thread pool. Under the GIL it only helps for work that releases
+    it (NumPy, I/O); see FreeThreadedBackend for CPU-bound Python.
+    """
+
+    name = "thread"
+
+    def _create_executor(self) -> Executor:
+        return ThreadPoolExecutor(max_workers=self.max_workers)
+
+
+class ProcessPoolBackend(_ExecutorBackend):
+    """
+    Persistent process pool for multi-core CPU-bound work. `fn` and the items
+    must be picklable, so it pays off only for large inputs.
+    """
+
+    name = "process"
+
+    def _create_executor(self) -> Executor:
+        return ProcessPoolExecutor(max_workers=self.max_workers)
+
+
+class FreeThreadedBackend(ThreadPoolBackend):
+    """
+    Thread pool for free-threaded (no-GIL) interpreters, where threads run
+    Python code on all cores without pickling.
+    """
+
+    name = "free-threaded"
+
+    def __init__(self, max_workers: Optional[int] = None, min_chunk_size: int = 256):
+        if gil_enabled():
+            raise RuntimeError("The free-threaded backend requires a no-GIL interpreter")
+        super().__init__(max_workers, min_chunk_size)
+
+
+class AutoBackend(ExecutionBackend):
+    """
+    Picks a backend per call from the input size: free threads for large
+    inputs when the interpreter has no GIL, serial otherwise. A process pool
+    is never picked: pickling the providers to and from the workers costs
+    several times more than scoring them serially, so it must be asked for.
+    """
+
+    name = "auto"
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        min_chunk_size: int = 256,
+        parallel_threshold: int = 5_000,
+    ):
+        """
+        :param parallel_threshold: Inputs below this size always run serially
+        """
+        super().__init__(max_workers, min_chunk_size)
+        self.parallel_threshold = parallel_threshold
+        self._backends: Dict[str, ExecutionBackend] = {}
+
+    def _backend(self, name: str) -> ExecutionBackend:
+        if name not in self._backends:
+            self._backends[name] = create_backend(
+                name, self.max_workers, self.min_chunk_size
+            )
+        return self._backends[name]
+
+    def select(self, n_items: int) -> ExecutionBackend:
+        if self.max_workers <= 1 or n_items < self.parallel_threshold:
+            return self._backend(SerialBackend.name)
+        if not gil_enabled():
+            return self._backend(FreeThreadedBackend.name)
+        return self._backend(SerialBackend.name)
+
+    def fan_out(self, n_items: int) -> Tuple[str, int]:
+        return self.select(n_items).fan_out(n_items)
+
+    def map_chunks(self, fn, items):
+        return self.select(len(items)).map_chunks(fn, items)
+
+    def close(self) -> None:
+        for backend in self._backends.values():
+            backend.close()
+        self._backends.clear()
+
+
+_BACKENDS = {
+    backend.name: backend
+    for backend in (
+        SerialBackend,
+        ThreadPoolBackend,
+        ProcessPoolBackend,
+        FreeThreadedBackend,
+        AutoBackend,
+    )
+}
+BACKEND_NAMES = tuple(_BACKENDS)
+
+
+def create_backend(
+    backend: Union[str, ExecutionBackend],
+    max_workers: Optional[int] = None,
+    min_chunk_size: int = 256,
+) -> ExecutionBackend:
+    """
+    Build a backend from its name ("serial", "thread", "process",
+    "free-threaded" or "auto"); backend instances are returned unchanged.
+    """
+    if isinstance(backend, ExecutionBackend):
+        return backend
+    if backend not in _BACKENDS:
+        raise ValueError(
+            f"Unknown execution backend '{backend}', expected one of {BACKEND_NAMES}"
+        )
+    return _BACKENDS[backend](max_workers=max_workers, min_chunk_size=min_chunk_size)
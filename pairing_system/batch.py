@@ -0,0 +1,168 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from geo.distance import batch_distances
+from geo.distance_table import DistanceTable
+from geo.geocoder import Geocoder
+from indexes.provider_indexes import ProviderIndexes
+from models.pairing_score import PairingScore
+from models.policy import ConsumerPolicy
+from models.provider_table import ProviderTable
+from pairing_system.backends import ExecutionBackend, SerialBackend
+from pairing_system.ranking import EQUAL_WEIGHTS, Weights, ranked_entries, top_k
+from scoring.location_score import LocationScore
+
+PolicyKey = Tuple[str, Tuple[str, ...], int]
+
+
+def policy_key(policy: ConsumerPolicy) -> PolicyKey:
+    """
+    Canonical form of a policy: policies with the same key get the same pairing.
+    """
+    return policy.canonical()
+
+
+def group_policies(policies: Sequence[ConsumerPolicy]) -> Dict[PolicyKey, List[int]]:
+    """
+    Positions of the given policies, grouped by canonical policy key.
+    """
+    groups: Dict[PolicyKey, List[int]] = {}
+    for position, policy in enumerate(policies):
+        groups.setdefault(policy_key(policy), []).append(position)
+    return groups
+
+
+def location_distance_matrix(
+    table: ProviderTable,
+    policy_locations: Sequence[str],
+    geocoder: Geocoder,
+    distance_model: str,
+    distance_table: Optional[DistanceTable] = None,
+) -> np.ndarray:
+    """
+    Distances (km) between distinct policy locations and the table's interned
+    provider locations, shape (len(policy_locations), len(table.locations)).
+
+    Every location is geocoded once; unresolved locations give NaN entries.
+    With a distance table the rows are read from it.
+    """
+    if distance_table is not None:
+        columns = distance_table.ids(table.locations)
+        return np.array(
+            [distance_table.row(location)[columns] for location in policy_locations],
+            dtype=np.float64,
+        ).reshape(len(policy_locations), len(table.locations))
+    location_coords = np.array(
+        [geocoder.geocode(loc) or (np.nan, np.nan) for loc in table.locations],
+        dtype=np.float64,
+    ).reshape(-1, 2)
+    matrix = np.full((len(policy_locations), len(table.locations)), np.nan)
+    for row, location in enumerate(policy_locations):
+        policy_coords = geocoder.geocode(location)
+        if policy_coords:
+            matrix[row] = batch_distances(policy_coords, location_coords, distance_model)
+    return matrix
+
+
+def candidate_ids(
+    indexes: ProviderIndexes,
+    policy: ConsumerPolicy,
+    location_distances: np.ndarray,
+    strict: bool,
+    max_distance_km: float,
+) -> np.ndarray:
+    """
+    Sorted ids of providers passing every filter, using a precomputed row of
+    the location distance matrix for flexible location matching.
+    """
+    if strict:
+        ids = indexes.locations.postings(policy.required_location)
+    else:
+        table = indexes.table
+        near = np.flatnonzero(location_distances <= max_distance_km).tolist()
+        postings = [indexes.locations.postings(table.locations[loc]) for loc in near]
+        ids = np.sort(np.concatenate(postings)) if postings else np.empty(0, np.intp)
+    if len(ids):
+        ids = indexes.features.candidates(policy.required_features, within=ids)
+    if len(ids):
+        ids = indexes.stakes.ids_at_least(policy.min_stake, within=ids)
+    return ids
+
+
+def pair_with_distances(
+    indexes: ProviderIndexes,
+    policy: ConsumerPolicy,
+    location_distances: np.ndarray,
+    strict: bool,
+    max_distance_km: float,
+    k: int,
+    backend: Optional[ExecutionBackend] = None,
+    max_stake: Optional[int] = None,
+    max_features: Optional[int] = None,
+    weights: Weights = EQUAL_WEIGHTS,
+) -> List[PairingScore]:
+    """
+    Top `k` pairing for one policy, reading location distances from a
+    precomputed row of the location distance matrix instead of geocoding.
+
+    :param max_stake: Stake normalization maximum (default: max over candidates)
+    :param max_features: Feature count normalization maximum (default: max over candidates)
+    :param weights: (stake, feature, location) component weights
+    """
+    ids = candidate_ids(indexes, policy, location_distances, strict, max_distance_km)
+    if not len(ids):
+        return []
+    providers = indexes.materialize(ids.tolist())
+    location_scores = LocationScore.from_distances(
+        location_distances[indexes.table.location_ids[ids]], max_distance_km
+    ).tolist()
+    entries = ranked_entries(
+        providers,
+        policy,
+        location_scores,
+        backend or SerialBackend(),
+        max_stake,
+        max_features,
+        weights,
+    )
+    return top_k(providers, entries, k, weights)
+
+
+# Per-process state of batch worker processes, set once by `init_worker`
+_worker: Dict[str, object] = {}
+
+
+def init_worker(
+    table: ProviderTable,
+    strict: bool,
+    max_distance_km: float,
+    k: int,
+    max_stake: Optional[int] = None,
+    max_features: Optional[int] = None,
+    weights: Weights = EQUAL_WEIGHTS,
+) -> None:
+    _worker.update(
+        indexes=ProviderIndexes(table),
+        strict=strict,
+        max_distance_km=max_distance_km,
+        k=k,
+        max_stake=max_stake,
+        max_features=max_features,
+        weights=weights,
+    )
+
+
+def pair_in_worker(task: Tuple[ConsumerPolicy, np.ndarray]) -> List[PairingScore]:
+    policy, location_distances = task
+    return pair_with_distances(
+        _worker["indexes"],
+        policy,
+        location_distances,
+        _worker["strict"],
+        _worker["max_distance_km"],
+        _worker["k"],
+        max_stake=_worker["max_stake"],
+        max_features=_worker["max_features"],
+        weights=_worker["weights"],
+    )
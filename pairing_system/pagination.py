@@ -0,0 +1,125 @@
+import base64
+import hashlib
+import heapq
+import json
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, List, Optional, Tuple
+
+from models.provider import Provider
+
+# A ranked entry: (-score, address, position, components). The heap and sort
+# order is best score first, ties broken by address, then by position.
+RankedEntry = Tuple[float, str, int, Tuple[float, ...]]
+
+
+@dataclass(frozen=True, slots=True)
+class Cursor:
+    """
+    Decoded pagination cursor.
+
+    Attributes:
+        session (str): Id of the server-side ranking session, if still alive.
+        fingerprint (str): Fingerprint of the query the cursor belongs to.
+        score (float): Score of the last result returned.
+        address (str): Address of the last result returned.
+        position (int): Candidate position of the last result returned, which
+                        orders results with the same score and address.
+    """
+
+    session: str
+    fingerprint: str
+    score: float
+    address: str
+    position: int
+
+    def encode(self) -> str:
+        payload = json.dumps(
+            [self.session, self.fingerprint, self.score, self.address, self.position],
+            separators=(",", ":"),
+        )
+        return base64.urlsafe_b64encode(payload.encode()).decode()
+
+    @classmethod
+    def decode(cls, token: str) -> "Cursor":
+        try:
+            session, fingerprint, score, address, position = json.loads(
+                base64.urlsafe_b64decode(token.encode())
+            )
+            return cls(
+                str(session), str(fingerprint), float(score), str(address), int(position)
+            )
+        except (ValueError, TypeError) as e:
+            raise ValueError("Invalid pagination cursor") from e
+
+    def is_before(self, entry: RankedEntry) -> bool:
+        """
+        Whether `entry` ranks strictly after the last result of this cursor.
+        """
+        last = (-self.score, self.address, self.position)
+        return (entry[0], entry[1], entry[2]) > last
+
+
+def query_fingerprint(*parts: Any) -> str:
+    return hashlib.sha1(repr(parts).encode()).hexdigest()[:16]
+
+
+@dataclass(slots=True)
+class RankingSession:
+    """
+    Remaining, already-scored candidates of a paginated query, kept as a heap,
+    and the last entry popped from it.
+    """
+
+    fingerprint: str
+    providers: List[Provider]
+    heap: List[RankedEntry]
+    last: Optional[RankedEntry] = None
+
+    def pop(self, k: int) -> List[RankedEntry]:
+        top = [heapq.heappop(self.heap) for _ in range(min(k, len(self.heap)))]
+        if top:
+            self.last = top[-1]
+        return top
+
+    def continues(self, cursor: Cursor) -> bool:
+        """
+        Whether the heap resumes right after the last result of `cursor`, i.e.
+        the cursor is the latest one handed out (not a replayed older one).
+        """
+        return self.last is not None and self.last[:3] == (
+            -cursor.score,
+            cursor.address,
+            cursor.position,
+        )
+
+
+class RankingSessions:
+    """
+    Size-bounded LRU store of ranking sessions, keyed by session id.
+    """
+
+    def __init__(self, maxsize: int = 128):
+        self.maxsize = maxsize
+        self._sessions: "OrderedDict[str, RankingSession]" = OrderedDict()
+
+    def create(self, session: RankingSession) -> str:
+        session_id = uuid.uuid4().hex
+        self._sessions[session_id] = session
+        while len(self._sessions) > self.maxsize:
+            self._sessions.popitem(last=False)
+        return session_id
+
+    def get(self, session_id: str, fingerprint: str) -> Optional[RankingSession]:
+        session = self._sessions.get(session_id)
+        if session is None or session.fingerprint != fingerprint:
+            return None
+        self._sessions.move_to_end(session_id)
+        return session
+
+    def discard(self, session_id: str) -> None:
+        self._sessions.pop(session_id, None)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
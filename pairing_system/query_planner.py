@@ -0,0 +1,169 @@
+from dataclasses import dataclass
+from itertools import permutations
+from typing import Optional, Tuple
+
+import numpy as np
+
+from geo.distance_table import DistanceTable
+from indexes.provider_indexes import ProviderIndexes
+from models.policy import ConsumerPolicy
+
+LOCATION = "location"
+FEATURE = "feature"
+STAKE = "stake"
+
+# Relative cost of checking one candidate against a predicate that is not the
+# first (driving) step
+_CHECK_COSTS = {
+    STAKE: 1.0,
+    FEATURE: 2.0,
+    LOCATION: 1.0,
+}
+# Flexible matching reads the distances of the distinct locations from the
+# distance table (one cached row per policy location, whatever the distance
+# model) and merges the postings of those in range: a sort on top of the
+# strict postings check
+_FLEXIBLE_LOCATION_CHECK_COST = 2.0
+
+
+@dataclass(frozen=True, slots=True)
+class PlanStep:
+    """
+    One predicate of a query plan.
+
+    Attributes:
+        predicate (str): "location", "feature" or "stake".
+        estimated_matches (int): Upper bound on providers passing this predicate alone.
+        check_cost (float): Relative cost of checking one candidate against it.
+    """
+
+    predicate: str
+    estimated_matches: int
+    check_cost: float
+
+
+@dataclass(frozen=True, slots=True)
+class QueryPlan:
+    """
+    Ordered predicates for one query. The first step is answered from its
+    index; every later step only checks the candidates left by the previous ones.
+
+    Attributes:
+        steps (Tuple[PlanStep, ...]): Predicates in execution order.
+        total_providers (int): Size of the provider list being queried.
+        estimated_cost (float): Relative cost of the chosen order.
+    """
+
+    steps: Tuple[PlanStep, ...]
+    total_providers: int
+    estimated_cost: float
+
+    @property
+    def order(self) -> Tuple[str, ...]:
+        return tuple(step.predicate for step in self.steps)
+
+    def __str__(self) -> str:
+        lines = [
+            f"QueryPlan over {self.total_providers} providers "
+            f"(estimated cost {self.estimated_cost:.1f}):"
+        ]
+        for idx, step in enumerate(self.steps, start=1):
+            mode = "index scan" if idx == 1 else "check candidates"
+            lines.append(
+                f"  {idx}. {step.predicate:<8} {mode:<16} "
+                f"~{step.estimated_matches} matches"
+            )
+        return "\n".join(lines)
+
+
+class QueryPlanner:
+    """
+    Orders the location, feature and stake predicates by estimated cost.
+
+    Selectivities come from index statistics: the stake index and exact-location
+    postings give exact counts, the rarest feature posting bounds the feature
+    predicate, and for flexible location matching the distance table gives
+    the locations in range, whose postings are counted exactly. Predicates
+    that cannot remove any provider are left out of the plan.
+    """
+
+    def __init__(self, distance_table: DistanceTable):
+        """
+        :param distance_table: Distances used by flexible location matching
+        """
+        self.distance_table = distance_table
+
+    def _location_step(
+        self,
+        indexes: ProviderIndexes,
+        policy: ConsumerPolicy,
+        strict: bool,
+        max_distance_km: float,
+    ) -> PlanStep:
+        postings = indexes.locations
+        if strict:
+            matches = postings.count(policy.required_location)
+            return PlanStep(LOCATION, matches, _CHECK_COSTS[LOCATION])
+
+        locations = list(postings.keys())
+        distances = self.distance_table.distances(policy.required_location, locations)
+        matches = sum(
+            postings.count(locations[i])
+            for i in np.flatnonzero(distances <= max_distance_km).tolist()
+        )
+        return PlanStep(LOCATION, matches, _FLEXIBLE_LOCATION_CHECK_COST)
+
+    def _feature_step(
+        self, indexes: ProviderIndexes, policy: ConsumerPolicy
+    ) -> Optional[PlanStep]:
+        required = set(policy.required_features)
+        if not required:
+            return None
+        matches = min(indexes.features.count(f) for f in required)
+        return PlanStep(FEATURE, matches, _CHECK_COSTS[FEATURE] * len(required))
+
+    def _stake_step(
+        self, indexes: ProviderIndexes, policy: ConsumerPolicy
+    ) -> Optional[PlanStep]:
+        matches = indexes.stakes.count_at_least(policy.min_stake)
+        if matches == len(indexes.providers):
+            return None
+        return PlanStep(STAKE, matches, _CHECK_COSTS[STAKE])
+
+    @staticmethod
+    def _cost(steps: Tuple[PlanStep, ...], total: int) -> float:
+        # The driving step costs its own matches; each later step checks the
+        # candidates surviving so far (assuming independent predicates).
+        cost = float(steps[0].estimated_matches)
+        candidates = float(steps[0].estimated_matches)
+        for step in steps[1:]:
+            cost += candidates * step.check_cost
+            candidates *= step.estimated_matches / total if total else 0.0
+        return cost
+
+    def plan(
+        self,
+        indexes: ProviderIndexes,
+        policy: ConsumerPolicy,
+        strict: bool = True,
+        max_distance_km: float = 2000.0,
+    ) -> QueryPlan:
+        """
+        Choose the cheapest execution order for the policy's predicates.
+        """
+        steps = [
+            self._location_step(indexes, policy, strict, max_distance_km),
+            self._feature_step(indexes, policy),
+            self._stake_step(indexes, policy),
+        ]
+        steps = [step for step in steps if step is not None]
+        total = len(indexes.providers)
+
+        best = min(
+            permutations(steps),
+            key=lambda order: (
+                self._cost(order, total),
+                [s.estimated_matches for s in order],
+            ),
+        )
+        return QueryPlan(tuple(best), total, self._cost(best, total))
@@ -0,0 +1,208 @@
+import heapq
+from functools import partial
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from models.pairing_score import PairingScore
+from models.policy import ConsumerPolicy
+from models.provider import Provider
+from pairing_system.backends import ExecutionBackend
+from pairing_system.pagination import RankedEntry
+from scoring.feature_score import FeatureScore
+from scoring.stake_score import StakeScore
+
+
+# Relative weights of the (stake, feature, location) components in the total
+# score; with equal weights the score is their plain average
+Weights = Tuple[float, float, float]
+EQUAL_WEIGHTS: Weights = (1.0, 1.0, 1.0)
+
+# Candidates whose location is scored at once by threshold ranking
+PRUNING_BLOCK = 256
+
+
+def validate_weights(weights: Sequence[float]) -> Weights:
+    weights = tuple(float(w) for w in weights)
+    if len(weights) != 3:
+        raise ValueError("weights must be (stake, feature, location)")
+    if any(not w >= 0 for w in weights) or not sum(weights) > 0:
+        raise ValueError("weights must be non-negative with a positive sum")
+    return weights
+
+
+def combine(components: Tuple[float, float, float], weights: Weights) -> float:
+    """
+    Total score of a (stake, feature, location) tuple. Non-decreasing in
+    every component, so replacing a component by its maximum (1.0) gives an
+    upper bound on the total.
+    """
+    if weights == EQUAL_WEIGHTS:
+        return sum(components) / 3
+    stake_weight, feature_weight, location_weight = weights
+    return (
+        stake_weight * components[0]
+        + feature_weight * components[1]
+        + location_weight * components[2]
+    ) / (stake_weight + feature_weight + location_weight)
+
+
+def score_chunk(
+    chunk: Sequence[Tuple[Provider, float]],
+    policy: ConsumerPolicy,
+    max_stake: int,
+    max_features: int,
+    weights: Weights = EQUAL_WEIGHTS,
+) -> List[Tuple[float, float, float]]:
+    """
+    Compute (stake, feature, location) components for a chunk of
+    (provider, precomputed location score) pairs. Zero-weight components
+    are not computed and reported as 0.0. Module-level so that it can be
+    shipped to worker processes.
+    """
+    score_stake = weights[0] > 0
+    score_features = weights[1] > 0
+    return [
+        (
+            StakeScore.score(provider, max_stake) if score_stake else 0.0,
+            (
+                FeatureScore.score(provider, policy, max_features)
+                if score_features
+                else 0.0
+            ),
+            location_score,
+        )
+        for provider, location_score in chunk
+    ]
+
+
+def to_pairing_score(
+    provider: Provider,
+    components: Tuple[float, float, float],
+    weights: Weights = EQUAL_WEIGHTS,
+) -> PairingScore:
+    return PairingScore.unchecked(provider, combine(components, weights), components)
+
+
+def _maxima(
+    providers: List[Provider], max_stake: Optional[int], max_features: Optional[int]
+) -> Tuple[int, int]:
+    if max_stake is None:
+        max_stake = max((p.stake for p in providers), default=1)
+    if max_features is None:
+        max_features = max((len(p.features) for p in providers), default=1)
+    return max_stake, max_features
+
+
+def ranked_entries(
+    providers: List[Provider],
+    policy: ConsumerPolicy,
+    location_scores: Sequence[float],
+    backend: ExecutionBackend,
+    max_stake: Optional[int] = None,
+    max_features: Optional[int] = None,
+    weights: Weights = EQUAL_WEIGHTS,
+) -> List[RankedEntry]:
+    """
+    Score every provider without building PairingScore objects. Stake and
+    feature scores are normalized by the maxima over `providers` unless
+    other maxima are given.
+
+    :param location_scores: Location score of every provider, aligned with `providers`
+    :param max_stake: Stake normalization maximum (default: max over `providers`)
+    :param max_features: Feature count normalization maximum (default: max over `providers`)
+    :param weights: (stake, feature, location) component weights
+    :return: One (-score, address, position, components) entry per provider
+    """
+    max_stake, max_features = _maxima(providers, max_stake, max_features)
+    components = backend.map_chunks(
+        partial(
+            score_chunk,
+            policy=policy,
+            max_stake=max_stake,
+            max_features=max_features,
+            weights=weights,
+        ),
+        list(zip(providers, location_scores)),
+    )
+    return [
+        (-combine(c, weights), p.address, i, c)
+        for i, (p, c) in enumerate(zip(providers, components))
+    ]
+
+
+def threshold_top_k(
+    providers: List[Provider],
+    policy: ConsumerPolicy,
+    location_scores: Callable[[List[Provider]], Sequence[float]],
+    backend: ExecutionBackend,
+    k: int,
+    max_stake: Optional[int] = None,
+    max_features: Optional[int] = None,
+    weights: Weights = EQUAL_WEIGHTS,
+) -> Tuple[List[RankedEntry], int]:
+    """
+    Best `k` entries, in order, computing the location component only for
+    providers that can still make the top `k`.
+
+    Stake and feature components are computed for every provider first; with
+    the location component at its maximum they give an upper bound on each
+    total score. Providers are visited by decreasing bound, their location
+    scored a block at a time, and the scan stops as soon as the next bound
+    cannot beat the current `k`-th entry. The result is the same as ranking
+    every provider with `ranked_entries`.
+
+    :param location_scores: Scores the location of a list of providers
+    :return: The top entries and the number of providers whose location was scored
+    """
+    partial_entries = ranked_entries(
+        providers,
+        policy,
+        [0.0] * len(providers),
+        backend,
+        max_stake,
+        max_features,
+        weights,
+    )
+    if weights[2] == 0:
+        return heapq.nsmallest(k, partial_entries), 0
+
+    # Entries keyed by upper bound; (-bound, address) orders them like entries
+    bounded = sorted(
+        (-combine((c[0], c[1], 1.0), weights), address, i, c)
+        for _, address, i, c in partial_entries
+    )
+    best: List[RankedEntry] = []
+    scored = 0
+    while scored < len(bounded):
+        block = bounded[scored : scored + PRUNING_BLOCK]
+        if len(best) == k:
+            # Bounds only decrease along `bounded`: stop at the first entry
+            # whose best case cannot beat the current k-th entry
+            kth = best[-1][:3]
+            cutoff = next(
+                (n for n, entry in enumerate(block) if not entry[:3] < kth), len(block)
+            )
+            block = block[:cutoff]
+            if not block:
+                break
+        scores = location_scores([providers[entry[2]] for entry in block])
+        for (_, address, i, c), location_score in zip(block, scores):
+            components = (c[0], c[1], location_score)
+            best.append((-combine(components, weights), address, i, components))
+        best = heapq.nsmallest(k, best)
+        scored += len(block)
+    return best, scored
+
+
+def top_k(
+    providers: List[Provider],
+    entries: List[RankedEntry],
+    k: int,
+    weights: Weights = EQUAL_WEIGHTS,
+) -> List[PairingScore]:
+    """
+    Best `k` entries (bounded heap selection) as PairingScore objects.
+    """
+    return [
+        to_pairing_score(providers[entry[2]], entry[3], weights)
+        for entry in heapq.nsmallest(k, entries)
+    ]
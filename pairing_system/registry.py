@@ -0,0 +1,196 @@
+import heapq
+import uuid
+from collections import Counter
+from dataclasses import replace
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from indexes.feature_index import IncrementalFeatureIndex
+from indexes.postings import IncrementalPostings
+from indexes.stake_index import IncrementalStakeIndex
+from models.provider import Provider
+
+
+class _MaxTracker:
+    """
+    Maximum of a multiset of numbers under insertions and deletions.
+
+    Values are counted in a Counter and pushed on a max-heap; deleted values
+    stay on the heap until they reach the top, so every operation is O(log n)
+    amortized.
+    """
+
+    def __init__(self):
+        self._counts: Counter = Counter()
+        self._heap: List = []
+
+    def add(self, value) -> None:
+        if not self._counts[value]:
+            heapq.heappush(self._heap, -value)
+        self._counts[value] += 1
+
+    def remove(self, value) -> None:
+        self._counts[value] -= 1
+        if not self._counts[value]:
+            del self._counts[value]
+
+    def max(self, default=None):
+        while self._heap and -self._heap[0] not in self._counts:
+            heapq.heappop(self._heap)
+        return -self._heap[0] if self._heap else default
+
+
+class RegistryIndexes:
+    """
+    Index view over a ProviderRegistry with the interface of ProviderIndexes,
+    so that filters and the query planner can run against it directly.
+    """
+
+    def __init__(self, registry: "ProviderRegistry"):
+        self.providers = registry
+        self.locations = registry._locations
+        self.features = registry._features
+        self.stakes = registry._stakes
+
+    def __len__(self) -> int:
+        return len(self.providers)
+
+    @property
+    def max_stake(self):
+        return self.providers.max_stake
+
+    @property
+    def max_features(self) -> int:
+        return self.providers.max_features
+
+    def materialize(self, ids) -> List[Provider]:
+        return [self.providers._providers[i] for i in ids]
+
+
+class ProviderRegistry:
+    """
+    Mutable provider set whose indexes and normalization maxima are updated
+    in place as providers join, leave or change, instead of being rebuilt
+    per query.
+
+    Every provider gets an id when added; ids are never reused, so iteration
+    in id order is insertion order. `version` is bumped by every change, and
+    `uid` tells registries apart, so (uid, version) names one provider set.
+    """
+
+    def __init__(self, providers: Iterable[Provider] = ()):
+        self._providers: Dict[int, Provider] = {}
+        self._ids: Dict[str, int] = {}
+        self._next_id = 0
+        self.version = 0
+        self.uid = uuid.uuid4().hex
+
+        self._stake_max = _MaxTracker()
+        self._feature_count_max = _MaxTracker()
+        self._locations = IncrementalPostings()
+        self._features = IncrementalFeatureIndex()
+        self._stakes = IncrementalStakeIndex()
+        self._snapshot: Optional[List[Provider]] = None
+        self._snapshot_version = -1
+
+        for provider in providers:
+            self.add(provider)
+
+    def __len__(self) -> int:
+        return len(self._providers)
+
+    def __contains__(self, address: str) -> bool:
+        return address in self._ids
+
+    def __iter__(self) -> Iterator[Provider]:
+        return iter(list(self._providers.values()))
+
+    def get(self, address: str) -> Provider:
+        return self._providers[self._ids[address]]
+
+    @property
+    def max_stake(self):
+        """
+        Largest stake in the registry (1 when empty).
+        """
+        return self._stake_max.max(default=1)
+
+    @property
+    def max_features(self) -> int:
+        """
+        Largest number of features listed by one provider (1 when empty).
+        """
+        return self._feature_count_max.max(default=1)
+
+    def _index(self, i: int, provider: Provider) -> None:
+        self._providers[i] = provider
+        self._stake_max.add(provider.stake)
+        self._feature_count_max.add(len(provider.features))
+        self._locations.add(i, (provider.location,))
+        self._features.add(i, provider.features)
+        self._stakes.add(i, provider.stake)
+
+    def _unindex(self, i: int, provider: Provider) -> None:
+        self._stake_max.remove(provider.stake)
+        self._feature_count_max.remove(len(provider.features))
+        self._locations.remove(i, (provider.location,))
+        self._features.remove(i, provider.features)
+        self._stakes.remove(i, provider.stake)
+
+    def add(self, provider: Provider) -> None:
+        """
+        :raises ValueError: If a provider with the same address is registered
+        """
+        if provider.address in self._ids:
+            raise ValueError(f"Provider '{provider.address}' is already registered")
+        i = self._next_id
+        self._next_id += 1
+        self._ids[provider.address] = i
+        self._index(i, provider)
+        self.version += 1
+
+    def remove(self, address: str) -> Provider:
+        """
+        :raises KeyError: If no provider has this address
+        """
+        i = self._ids.pop(address)
+        provider = self._providers.pop(i)
+        self._unindex(i, provider)
+        self.version += 1
+        return provider
+
+    def _replace(self, address: str, **changes) -> Provider:
+        i = self._ids[address]
+        old = self._providers[i]
+        new = replace(old, **changes)
+        self._unindex(i, old)
+        self._index(i, new)
+        self.version += 1
+        return new
+
+    def update_stake(self, address: str, stake: int) -> Provider:
+        """
+        :raises KeyError: If no provider has this address
+        """
+        return self._replace(address, stake=stake)
+
+    def update_features(self, address: str, features: List[str]) -> Provider:
+        """
+        :raises KeyError: If no provider has this address
+        """
+        return self._replace(address, features=list(features))
+
+    def snapshot(self) -> List[Provider]:
+        """
+        The current providers as a list, in id order. The same list object is
+        returned until the registry changes.
+        """
+        if self._snapshot_version != self.version:
+            self._snapshot = list(self._providers.values())
+            self._snapshot_version = self.version
+        return self._snapshot
+
+    def indexes(self) -> RegistryIndexes:
+        """
+        Live indexes over the registry.
+        """
+        return RegistryIndexes(self)
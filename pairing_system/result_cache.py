@@ -0,0 +1,70 @@
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+class ResultCache:
+    """
+    Size-bounded LRU cache of pairing results for one provider set.
+
+    Entries are keyed by the canonical policy and the query settings. The
+    cache is bound to a provider set and its version stamp (the registry
+    version, or a content digest of a list); binding to another set or a new
+    version drops every entry, so stale results are never served.
+    Other per-query values (e.g. sampling pools) can be cached the same way.
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        """
+        :param maxsize: Maximum number of cached results; 0 disables caching
+        """
+        if maxsize < 0:
+            raise ValueError("maxsize must be a non-negative integer")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._providers: Any = None
+        self._version: Any = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def bind(self, providers: Any, version: Hashable) -> None:
+        """
+        Make `providers` at `version` the cached provider set, invalidating
+        every entry if either changed.
+        """
+        if providers is not self._providers or version != self._version:
+            self._entries.clear()
+            self._providers = providers
+            self._version = version
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        results = self._entries.get(key)
+        if results is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return results
+
+    def put(self, key: Hashable, results: Any) -> None:
+        if not self.maxsize:
+            return
+        self._entries[key] = results
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """
+        Drop every entry and forget the bound provider set; counters are kept.
+        """
+        self._entries.clear()
+        self._providers = None
+        self._version = None
@@ -0,0 +1,156 @@
+import random
+from hashlib import blake2b
+from typing import List, Sequence
+
+import numpy as np
+
+from models.provider import Provider
+from pairing_system.pagination import RankedEntry
+
+# What a candidate's chance of being drawn is proportional to
+SCORE = "score"
+STAKE = "stake"
+WEIGHTINGS = (SCORE, STAKE)
+
+
+class AliasTable:
+    """
+    Walker/Vose alias table: O(n) to build, then every weighted draw of an
+    index costs one uniform variate and a few list lookups.
+
+    Index i is drawn with probability weights[i] / sum(weights). Indexes
+    with a zero weight are never drawn.
+    """
+
+    __slots__ = ("weights", "total", "positive", "_ids", "_probability", "_alias")
+
+    def __init__(self, weights: Sequence[float]):
+        """
+        :param weights: Non-negative weights, at least one of them positive
+        """
+        array = np.asarray(weights, dtype=np.float64).reshape(-1)
+        if not np.isfinite(array).all() or (array < 0).any():
+            raise ValueError("weights must be finite and non-negative")
+        total = float(array.sum())
+        if not total > 0:
+            raise ValueError("At least one weight must be positive")
+        self.weights: List[float] = array.tolist()
+        self.total = total
+        # Only positive weights get a column, so rounding error can never
+        # make a zero-weight index drawable
+        positive = np.flatnonzero(array > 0)
+        self.positive = len(positive)
+        self._ids = None if self.positive == len(array) else positive.tolist()
+
+        n = self.positive
+        scaled = (array[positive] * (n / total)).tolist()
+        probability = [1.0] * n
+        alias = list(range(n))
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            probability[less] = scaled[less]
+            alias[less] = more
+            # Vose's update, which keeps the rounding error from accumulating
+            scaled[more] = (scaled[more] + scaled[less]) - 1.0
+            (small if scaled[more] < 1.0 else large).append(more)
+        # Columns left over are full up to rounding error
+        self._probability = probability
+        self._alias = alias
+
+    def __len__(self) -> int:
+        return len(self.weights)
+
+    def draw(self, rng: random.Random) -> int:
+        """
+        One index drawn proportionally to its weight.
+        """
+        n = len(self._alias)
+        u = rng.random() * n
+        i = min(int(u), n - 1)
+        if u - i >= self._probability[i]:
+            i = self._alias[i]
+        return i if self._ids is None else self._ids[i]
+
+    def sample(self, k: int, rng: random.Random) -> List[int]:
+        """
+        Up to `k` distinct indexes, in draw order, drawn one after the other
+        proportionally to the weights of the indexes not drawn yet (only
+        indexes with a positive weight can be drawn).
+
+        Draws hitting an index already taken are rejected. Once the indexes
+        taken hold half the weight of the table in use, a table over the
+        remaining indexes is built, so a draw never takes more than two
+        tries on average.
+        """
+        k = min(k, self.positive)
+        weights = self.weights
+        chosen: List[int] = []
+        taken = set()
+        table, ids = self, None
+        taken_weight = 0.0
+        while len(chosen) < k:
+            if 2 * taken_weight > table.total:
+                ids = [i for i, w in enumerate(weights) if w > 0 and i not in taken]
+                table = AliasTable([weights[i] for i in ids])
+                taken_weight = 0.0
+            i = table.draw(rng)
+            if ids is not None:
+                i = ids[i]
+            if i in taken:
+                continue
+            taken.add(i)
+            chosen.append(i)
+            taken_weight += weights[i]
+        return chosen
+
+
+class SamplingPool:
+    """
+    Scored candidates of one query and the alias table of their weights,
+    built once and reused by every draw for the same candidate set.
+    """
+
+    __slots__ = ("providers", "entries", "table")
+
+    def __init__(
+        self, providers: List[Provider], entries: List[RankedEntry], weighting: str
+    ):
+        """
+        :param providers: Filtered candidates
+        :param entries: Their (-score, address, position, components) entries
+        :param weighting: "score" or "stake"
+        """
+        if weighting not in WEIGHTINGS:
+            raise ValueError(
+                f"Unknown weighting '{weighting}', expected one of {WEIGHTINGS}"
+            )
+        self.providers = providers
+        self.entries = entries
+        if weighting == SCORE:
+            weights = [-entry[0] for entry in entries]
+        else:
+            weights = [providers[entry[2]].stake for entry in entries]
+        self.table = AliasTable(weights) if any(w > 0 for w in weights) else None
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def draw(self, k: int, rng: random.Random) -> List[RankedEntry]:
+        """
+        Up to `k` distinct entries, in draw order (empty if no candidate has
+        a positive weight).
+        """
+        if self.table is None:
+            return []
+        return [self.entries[i] for i in self.table.sample(k, rng)]
+
+
+def consumer_rng(consumer: str, epoch: int) -> random.Random:
+    """
+    Random generator seeded from a consumer id and an epoch: the same pair
+    always gives the same draws, in any process.
+    """
+    digest = blake2b(f"{epoch}:{consumer}".encode(), digest_size=8).digest()
+    return random.Random(int.from_bytes(digest, "big"))
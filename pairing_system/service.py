@@ -0,0 +1,267 @@
+import asyncio
+import json
+from concurrent.futures import Executor, ThreadPoolExecutor
+from http import HTTPStatus
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple, Union
+
+from models.pairing_score import PairingScore
+from models.policy import ConsumerPolicy
+from models.provider import Provider
+from models.provider_table import ProviderTable
+from pairing_system.sampling import SCORE, WEIGHTINGS
+from pairing_system.system import PairingSystem
+
+ProviderLoader = Callable[[], Union[List[Provider], ProviderTable]]
+
+_MAX_BODY_BYTES = 1 << 20
+
+
+def pairing_score_to_dict(pairing_score: PairingScore) -> Dict[str, Any]:
+    provider = pairing_score.provider
+    return {
+        "address": provider.address,
+        "stake": provider.stake,
+        "location": provider.location,
+        "features": list(provider.features),
+        "score": pairing_score.score,
+        "components": dict(pairing_score.components),
+    }
+
+
+def policy_from_dict(payload: Dict[str, Any]) -> Tuple[ConsumerPolicy, int]:
+    """
+    Parse a pairing request body into a policy and `k`.
+
+    :raises ValueError: If a field is missing or invalid
+    """
+    if not isinstance(payload, dict) or "location" not in payload:
+        raise ValueError("Request body must be a JSON object with a 'location'")
+    policy = ConsumerPolicy(
+        required_location=payload["location"],
+        required_features=payload.get("features", []),
+        min_stake=payload.get("min_stake", 0),
+    )
+    k = payload.get("k", 5)
+    # bool is an int subclass, but true/false is not a valid count
+    if isinstance(k, bool) or not isinstance(k, int) or k <= 0:
+        raise ValueError("k must be a positive integer")
+    return policy, k
+
+
+def sampling_from_dict(payload: Dict[str, Any]) -> Tuple[str, int, str]:
+    """
+    Parse the sampling fields of a /sample request body: consumer, epoch
+    and weighting.
+
+    :raises ValueError: If a field is missing or invalid
+    """
+    consumer = payload.get("consumer")
+    if not isinstance(consumer, str) or not consumer:
+        raise ValueError("'consumer' must be a non-empty string")
+    epoch = payload.get("epoch", 0)
+    if isinstance(epoch, bool) or not isinstance(epoch, int):
+        raise ValueError("epoch must be an integer")
+    weighting = payload.get("weighting", SCORE)
+    if weighting not in WEIGHTINGS:
+        raise ValueError(f"weighting must be one of {WEIGHTINGS}")
+    return consumer, epoch, weighting
+
+
+class PairingService:
+    """
+    Long-running pairing service keeping a PairingSystem and the provider set
+    hot in memory.
+
+    Pairing runs on a single worker thread (PairingSystem is not thread-safe),
+    so the event loop only parses requests and serializes responses.
+    Identical concurrent queries are coalesced: while one is being computed,
+    later callers await the same result instead of queueing another run.
+    """
+
+    def __init__(
+        self,
+        system: PairingSystem,
+        loader: ProviderLoader,
+        executor: Optional[Executor] = None,
+    ):
+        """
+        :param system: Pairing system used for every query
+        :param loader: Returns the provider set; called at startup and on reload
+        :param executor: Executor running pairing and reloads (default: one thread)
+        """
+        self.system = system
+        self.loader = loader
+        self.executor = executor or ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="pairing"
+        )
+        self.providers: Union[List[Provider], ProviderTable] = []
+        self.generation = 0
+        self.computed = 0
+        self.coalesced = 0
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+
+    async def _run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(
+            self.executor, fn, *args
+        )
+
+    async def reload(self) -> int:
+        """
+        Load a fresh provider set; queries already running finish on the old one.
+
+        :return: Number of providers loaded
+        """
+        providers = await self._run(self.loader)
+        self.providers = providers
+        self.generation += 1
+        return len(providers)
+
+    async def pair(self, policy: ConsumerPolicy, k: int = 5) -> List[PairingScore]:
+        key = (self.generation, policy.canonical(), k)
+        future = self._inflight.get(key)
+        if future is not None:
+            self.coalesced += 1
+            return list(await asyncio.shield(future))
+
+        future = asyncio.ensure_future(
+            self._run(self.system.get_pairing_list, self.providers, policy, k)
+        )
+        self._inflight[key] = future
+        future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        self.computed += 1
+        return list(await asyncio.shield(future))
+
+    async def sample(
+        self,
+        policy: ConsumerPolicy,
+        k: int,
+        consumer: str,
+        epoch: int = 0,
+        weighting: str = SCORE,
+    ) -> List[PairingScore]:
+        # Not coalesced: draws differ per consumer, and they are cheap once
+        # the candidate pool is cached
+        return await self._run(
+            self.system.sample_pairing_list,
+            self.providers,
+            policy,
+            consumer,
+            epoch,
+            k,
+            weighting,
+        )
+
+    async def handle(
+        self, method: str, path: str, body: bytes
+    ) -> Tuple[HTTPStatus, Dict[str, Any]]:
+        """
+        Route one request: POST /pair, POST /sample, POST /reload or GET /health.
+        """
+        if path == "/health" and method == "GET":
+            return HTTPStatus.OK, {
+                "status": "ok",
+                "providers": len(self.providers),
+                "generation": self.generation,
+            }
+        if path == "/reload" and method == "POST":
+            try:
+                return HTTPStatus.OK, {"providers": await self.reload()}
+            except (OSError, ValueError) as e:
+                # The previous provider set stays in service
+                return HTTPStatus.INTERNAL_SERVER_ERROR, {"error": str(e)}
+        if path == "/pair" and method == "POST":
+            try:
+                policy, k = policy_from_dict(json.loads(body or b"null"))
+            except (ValueError, TypeError) as e:
+                return HTTPStatus.BAD_REQUEST, {"error": str(e)}
+            results = await self.pair(policy, k)
+            return HTTPStatus.OK, {
+                "results": [pairing_score_to_dict(r) for r in results]
+            }
+        if path == "/sample" and method == "POST":
+            try:
+                payload = json.loads(body or b"null")
+                policy, k = policy_from_dict(payload)
+                consumer, epoch, weighting = sampling_from_dict(payload)
+            except (ValueError, TypeError) as e:
+                return HTTPStatus.BAD_REQUEST, {"error": str(e)}
+            results = await self.sample(policy, k, consumer, epoch, weighting)
+            return HTTPStatus.OK, {
+                "results": [pairing_score_to_dict(r) for r in results]
+            }
+        if path in ("/health", "/reload", "/pair", "/sample"):
+            return HTTPStatus.METHOD_NOT_ALLOWED, {"error": "Method not allowed"}
+        return HTTPStatus.NOT_FOUND, {"error": f"Unknown path '{path}'"}
+
+    async def _serve_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        # Minimal HTTP/1.1: one request at a time per connection, with keep-alive
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, path, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                length = int(headers.get("content-length", 0))
+                if length > _MAX_BODY_BYTES:
+                    status = HTTPStatus.REQUEST_ENTITY_TOO_LARGE
+                    payload: Dict[str, Any] = {"error": "Request body too large"}
+                    keep_alive = False
+                else:
+                    body = await reader.readexactly(length) if length else b""
+                    try:
+                        status, payload = await self.handle(method, path, body)
+                    except Exception as e:
+                        # A failing query must not take the connection down
+                        status = HTTPStatus.INTERNAL_SERVER_ERROR
+                        payload = {"error": str(e) or type(e).__name__}
+                    keep_alive = headers.get("connection", "").lower() != "close"
+
+                data = json.dumps(payload).encode()
+                writer.write(
+                    f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+                    f"\r\n".encode()
+                    + data
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ValueError, asyncio.IncompleteReadError, ConnectionError):
+            # Malformed request line or headers, or the client went away
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8080) -> asyncio.Server:
+        """
+        Load the providers and start listening; returns the running server.
+        """
+        await self.reload()
+        return await asyncio.start_server(self._serve_connection, host, port)
+
+    def close(self) -> None:
+        self.executor.shutdown()
+        self.system.close()
+
+
+async def serve(service: PairingService, host: str, port: int) -> None:
+    server = await service.start(host, port)
+    addresses = ", ".join(str(s.getsockname()) for s in server.sockets)
+    print(f"Pairing service listening on {addresses}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
@@ -0,0 +1,475 @@
+import heapq
+import os
+import zlib
+from abc import ABC, abstractmethod
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import count, islice
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from geo.distance import GEODESIC
+from geo.geocoder import Geocoder
+from indexes.provider_indexes import ProviderIndexes
+from models.pairing_score import PairingScore
+from models.policy import ConsumerPolicy
+from models.provider import Provider
+from models.provider_table import ProviderTable
+from pairing_system.batch import group_policies
+from pairing_system.ranking import (
+    EQUAL_WEIGHTS,
+    _maxima,
+    to_pairing_score,
+    validate_weights,
+)
+from pairing_system.system import (
+    CANDIDATES,
+    EXHAUSTIVE,
+    NORMALIZATIONS,
+    RANKINGS,
+    PairingSystem,
+)
+
+# How providers are assigned to shards: by a hash of their address, or by
+# location, so that every provider of a location lives on the same shard
+HASH = "hash"
+REGION = "region"
+PARTITIONINGS = (HASH, REGION)
+
+# (max_stake, max_features) over the candidates of one shard
+Maxima = Tuple[int, int]
+# (row id in the whole provider set, pairing score) returned by a shard
+ShardHit = Tuple[int, PairingScore]
+# (shard table, row id of each shard row in the whole set, PairingSystem options)
+ShardSpec = Tuple[ProviderTable, np.ndarray, dict]
+
+# Queries whose candidates a shard keeps between `prepare` and `rank`
+_MAX_PENDING = 64
+
+
+def hash_partition(table: ProviderTable, n_shards: int) -> List[np.ndarray]:
+    """
+    Sorted row ids of each shard, assigned by a CRC-32 of the provider
+    address (stable across processes and runs).
+    """
+    shard_of = np.fromiter(
+        (zlib.crc32(address.encode()) for address in table.addresses),
+        dtype=np.int64,
+        count=len(table),
+    ) % n_shards
+    return [np.flatnonzero(shard_of == shard) for shard in range(n_shards)]
+
+
+def region_partition(
+    table: ProviderTable, n_shards: int
+) -> Tuple[List[np.ndarray], Dict[str, int]]:
+    """
+    Sorted row ids of each shard, keeping every location on a single shard:
+    locations are assigned largest first to the least loaded shard.
+
+    :return: The row ids of each shard and the shard of every location
+    """
+    sizes = np.bincount(table.location_ids, minlength=len(table.locations))
+    loads = [0] * n_shards
+    shard_of = np.zeros(len(table.locations), dtype=np.int64)
+    for location in np.argsort(-sizes, kind="stable").tolist():
+        shard = min(range(n_shards), key=loads.__getitem__)
+        shard_of[location] = shard
+        loads[shard] += int(sizes[location])
+    row_shards = shard_of[table.location_ids]
+    routes = {
+        table.locations[location]: int(shard_of[location])
+        for location in np.flatnonzero(sizes).tolist()
+    }
+    return [np.flatnonzero(row_shards == shard) for shard in range(n_shards)], routes
+
+
+class Shard:
+    """
+    One partition of the provider set, queried through its own PairingSystem.
+
+    A query runs in two phases so that scores are normalized over all shards:
+    `prepare` filters each policy and reports the normalization maxima of
+    the local candidates, then `rank` ranks the kept candidates with the
+    maxima merged by the coordinator and returns the local top k.
+    """
+
+    def __init__(self, table: ProviderTable, row_ids: np.ndarray, options: dict):
+        """
+        :param table: Providers of this shard
+        :param row_ids: Row id of each of them in the whole provider set
+        :param options: PairingSystem settings (strict, max_distance_km, ...)
+        """
+        self.table = table
+        self.row_ids = np.asarray(row_ids)
+        self.system = PairingSystem(backend="serial", result_cache_size=0, **options)
+        self._pending: Dict[int, List[Tuple[np.ndarray, List[Provider]]]] = {}
+
+    def _candidates(self, policy: ConsumerPolicy) -> Tuple[np.ndarray, List[Provider]]:
+        system = self.system
+        indexes = system._indexes_for(self.table)
+        ids = system._filter_ids(self.table, indexes, policy)
+        return ids, indexes.materialize(ids.tolist()) if len(ids) else []
+
+    def prepare(
+        self, query_id: int, policies: Sequence[ConsumerPolicy]
+    ) -> List[Optional[Maxima]]:
+        """
+        Filter every policy, keeping the candidates for `rank`.
+
+        :return: (max_stake, max_features) of each policy's candidates, None if
+                 no provider passed the filters
+        """
+        if len(self._pending) >= _MAX_PENDING:
+            # Drop the oldest query, whose rank phase never came
+            del self._pending[next(iter(self._pending))]
+        pending = self._pending[query_id] = [self._candidates(p) for p in policies]
+        return [
+            _maxima(candidates, None, None) if candidates else None
+            for _, candidates in pending
+        ]
+
+    def rank(
+        self,
+        query_id: int,
+        policies: Sequence[ConsumerPolicy],
+        k: int,
+        maxima: Sequence[Optional[Maxima]],
+    ) -> List[List[ShardHit]]:
+        """
+        Local top `k` of every policy, best first, normalized by `maxima`
+        (the candidates kept by `prepare`, or filtered again if there are none).
+        """
+        pending = self._pending.pop(query_id, None)
+        if pending is None:
+            pending = [self._candidates(policy) for policy in policies]
+        weights = self.system.weights
+        results = []
+        for policy, (ids, candidates), policy_maxima in zip(policies, pending, maxima):
+            if not candidates:
+                results.append([])
+                continue
+            max_stake, max_features = policy_maxima or (None, None)
+            entries = self.system._top_entries(
+                candidates, policy, k, max_stake, max_features
+            )
+            results.append(
+                [
+                    (
+                        int(self.row_ids[ids[entry[2]]]),
+                        to_pairing_score(candidates[entry[2]], entry[3], weights),
+                    )
+                    for entry in entries
+                ]
+            )
+        return results
+
+
+_SHARD_METHODS = ("prepare", "rank")
+
+
+def _dispatch(shard: Shard, method: str, args: tuple):
+    if method not in _SHARD_METHODS:
+        raise ValueError(f"Unknown shard method '{method}'")
+    return getattr(shard, method)(*args)
+
+
+class ShardTransport(ABC):
+    """
+    Delivers requests to shards. A request is a shard method name plus
+    picklable arguments and its reply is picklable too, so shards can live
+    in this process, in worker processes or, behind another transport, on
+    other nodes.
+    """
+
+    name = "base"
+
+    @abstractmethod
+    def start(self, specs: Sequence[ShardSpec]) -> None:
+        """
+        Create one shard per spec.
+        """
+        pass
+
+    @abstractmethod
+    def submit(self, shard: int, method: str, *args) -> Future:
+        """
+        Send `method(*args)` to a shard; the future holds its reply.
+        """
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class LocalTransport(ShardTransport):
+    """
+    Runs every shard in this process, one request at a time: the stand-in
+    for a real transport in tests and on single-core machines.
+    """
+
+    name = "local"
+
+    def __init__(self):
+        self.shards: List[Shard] = []
+
+    def start(self, specs):
+        self.shards = [Shard(*spec) for spec in specs]
+
+    def submit(self, shard, method, *args):
+        future = Future()
+        try:
+            future.set_result(_dispatch(self.shards[shard], method, args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+
+# The shard of a shard worker process, set once by `init_shard`
+_worker: Dict[str, Shard] = {}
+
+
+def init_shard(table: ProviderTable, row_ids: np.ndarray, options: dict) -> None:
+    _worker["shard"] = Shard(table, row_ids, options)
+
+
+def call_shard(method: str, *args):
+    return _dispatch(_worker["shard"], method, args)
+
+
+class ProcessTransport(ShardTransport):
+    """
+    Runs every shard in its own worker process, so shards filter and rank
+    on all cores at once. The shard's providers and settings (including the
+    geocoder) are pickled once, when its process starts.
+    """
+
+    name = "process"
+
+    def __init__(self):
+        self._executors: List[ProcessPoolExecutor] = []
+
+    def start(self, specs):
+        self._executors = [
+            ProcessPoolExecutor(max_workers=1, initializer=init_shard, initargs=spec)
+            for spec in specs
+        ]
+
+    def submit(self, shard, method, *args):
+        return self._executors[shard].submit(call_shard, method, *args)
+
+    def close(self):
+        for executor in self._executors:
+            executor.shutdown()
+        self._executors = []
+
+
+_TRANSPORTS = {
+    transport.name: transport for transport in (LocalTransport, ProcessTransport)
+}
+TRANSPORT_NAMES = tuple(_TRANSPORTS)
+
+
+def create_transport(transport: Union[str, ShardTransport]) -> ShardTransport:
+    """
+    Build a transport from its name ("local" or "process"); transport
+    instances are returned unchanged.
+    """
+    if isinstance(transport, ShardTransport):
+        return transport
+    if transport not in _TRANSPORTS:
+        raise ValueError(
+            f"Unknown shard transport '{transport}', expected one of {TRANSPORT_NAMES}"
+        )
+    return _TRANSPORTS[transport]()
+
+
+def _hit_order(hit: ShardHit) -> Tuple[float, str, int]:
+    # Order of the single-process ranking: score, then address, then position
+    row_id, score = hit
+    return -score.score, score.provider.address, row_id
+
+
+class ShardedPairingSystem:
+    """
+    Scatter-gather pairing over a provider set partitioned into shards.
+
+    The coordinator sends each query to the shards that can hold matches;
+    every shard filters and ranks its own providers and returns its local
+    top k, and the coordinator merges them. Stake and feature scores are
+    normalized by maxima over all shards (gathered in a first round trip
+    under "candidates" normalization), so results are exactly those of a
+    single PairingSystem over the whole set.
+    """
+
+    def __init__(
+        self,
+        providers: Union[List[Provider], ProviderTable],
+        shards: Optional[int] = None,
+        partitioning: str = HASH,
+        transport: Union[str, ShardTransport] = ProcessTransport.name,
+        strict: bool = True,
+        max_distance_km: int = 2000,
+        geocoder: Optional[Geocoder] = None,
+        distance_model: str = GEODESIC,
+        normalization: str = CANDIDATES,
+        weights: Sequence[float] = EQUAL_WEIGHTS,
+        ranking: str = EXHAUSTIVE,
+    ):
+        """
+        :param providers: The provider set, partitioned once here
+        :param shards: Number of shards (default: number of CPUs)
+        :param partitioning: "hash" (by address) or "region" (by location; strict
+                             queries then only reach the shard of their location)
+        :param transport: "process" (one worker process per shard), "local"
+                          (in this process) or a ShardTransport instance
+        :param geocoder: Geocoder of every shard; must be picklable for the
+                         process transport (default: each process's shared one)
+
+        The other parameters are those of PairingSystem.
+        """
+        if partitioning not in PARTITIONINGS:
+            raise ValueError(
+                f"Unknown partitioning '{partitioning}', expected one of {PARTITIONINGS}"
+            )
+        if normalization not in NORMALIZATIONS:
+            raise ValueError(
+                f"Unknown normalization '{normalization}', expected one of {NORMALIZATIONS}"
+            )
+        if ranking not in RANKINGS:
+            raise ValueError(f"Unknown ranking '{ranking}', expected one of {RANKINGS}")
+        n_shards = shards or os.cpu_count() or 1
+        if n_shards < 1:
+            raise ValueError("shards must be a positive integer")
+
+        table = (
+            providers
+            if isinstance(providers, ProviderTable)
+            else ProviderTable.from_providers(providers)
+        )
+        self.strict_location_match = strict
+        self.normalization = normalization
+        self.partitioning = partitioning
+        if partitioning == HASH:
+            rows, self._routes = hash_partition(table, n_shards), None
+        else:
+            rows, self._routes = region_partition(table, n_shards)
+        self.shard_sizes = [len(shard_rows) for shard_rows in rows]
+
+        # Maxima over the whole set, used as is under "provider_set" normalization
+        indexes = ProviderIndexes(table)
+        self._set_maxima: Maxima = (indexes.max_stake, indexes.max_features)
+
+        options = dict(
+            strict=strict,
+            max_distance_km=max_distance_km,
+            geocoder=geocoder,
+            distance_model=distance_model,
+            weights=validate_weights(weights),
+            ranking=ranking,
+        )
+        self.transport = create_transport(transport)
+        self.transport.start(
+            [(table.subset(shard_rows), shard_rows, options) for shard_rows in rows]
+        )
+        self._query_ids = count()
+
+    def close(self) -> None:
+        """
+        Shut down the shards.
+        """
+        self.transport.close()
+
+    def __enter__(self) -> "ShardedPairingSystem":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def shards_for(self, policy: ConsumerPolicy) -> List[int]:
+        """
+        Shards that may hold matches for `policy`.
+        """
+        if self._routes is not None and self.strict_location_match:
+            shard = self._routes.get(policy.required_location)
+            return [] if shard is None else [shard]
+        return [shard for shard, size in enumerate(self.shard_sizes) if size]
+
+    def get_pairing_list(
+        self, policy: ConsumerPolicy, k: int = 5
+    ) -> List[PairingScore]:
+        """
+        Top `k` matching providers over all shards.
+        """
+        return self.get_pairing_lists([policy], k)[0]
+
+    def get_pairing_lists(
+        self, policies: Sequence[ConsumerPolicy], k: int = 5
+    ) -> List[List[PairingScore]]:
+        """
+        Top `k` matching providers of many policies, with one request per
+        shard and phase for the whole batch. Policies with the same
+        canonical form are paired once.
+
+        :return: One top-`k` list per policy, in the order of `policies`
+        """
+        if k <= 0:
+            raise ValueError("k must be a positive integer")
+
+        groups = group_policies(policies)
+        distinct = [policies[positions[0]] for positions in groups.values()]
+        # Positions in `distinct` of the policies each shard answers
+        requests: Dict[int, List[int]] = {}
+        for n, policy in enumerate(distinct):
+            for shard in self.shards_for(policy):
+                requests.setdefault(shard, []).append(n)
+        query_id = next(self._query_ids)
+
+        maxima: List[Optional[Maxima]]
+        if self.normalization == CANDIDATES:
+            maxima = [None] * len(distinct)
+            replies = {
+                shard: self.transport.submit(
+                    shard, "prepare", query_id, [distinct[n] for n in ns]
+                )
+                for shard, ns in requests.items()
+            }
+            for shard, reply in replies.items():
+                for n, shard_maxima in zip(requests[shard], reply.result()):
+                    if shard_maxima is None:
+                        continue
+                    current = maxima[n]
+                    maxima[n] = (
+                        shard_maxima
+                        if current is None
+                        else (
+                            max(current[0], shard_maxima[0]),
+                            max(current[1], shard_maxima[1]),
+                        )
+                    )
+        else:
+            maxima = [self._set_maxima] * len(distinct)
+
+        replies = {
+            shard: self.transport.submit(
+                shard,
+                "rank",
+                query_id,
+                [distinct[n] for n in ns],
+                k,
+                [maxima[n] for n in ns],
+            )
+            for shard, ns in requests.items()
+        }
+        hits: List[List[List[ShardHit]]] = [[] for _ in distinct]
+        for shard, reply in replies.items():
+            for n, shard_hits in zip(requests[shard], reply.result()):
+                hits[n].append(shard_hits)
+
+        pairing_lists: List[List[PairingScore]] = [[] for _ in policies]
+        for positions, shard_hits in zip(groups.values(), hits):
+            merged = heapq.merge(*shard_hits, key=_hit_order)
+            result = [score for _, score in islice(merged, k)]
+            for position in positions:
+                pairing_lists[position] = list(result)
+        return pairing_lists
@@ -1,97 +1,847 @@
-from concurrent.futures import ThreadPoolExecutor
-from typing import List, Tuple
+import heapq
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from typing import List, Optional, Sequence, Tuple, Union
+
+import numpy as np
 
 from filters.feature_filter import FeatureFilter
 from filters.location_filter import LocationFilter
 from filters.stake_filter import StakeFilter
+from geo.distance import GEODESIC
+from geo.distance_table import DistanceTable
+from geo.geocoder import Geocoder
+from indexes.provider_indexes import ProviderIndexes
+from instrumentation.metrics import (
+    Instrumentation,
+    geocoder_collector,
+    result_cache_collector,
+)
+from instrumentation.tracing import NULL_TRACE, QueryTrace
+from models.pairing_page import PairingPage
 from models.pairing_score import PairingScore
 from models.policy import ConsumerPolicy
 from models.provider import Provider
-from scoring.feature_score import FeatureScore
+from models.provider_table import ProviderTable
+from pairing_system.backends import ExecutionBackend, create_backend
+from pairing_system.batch import (
+    group_policies,
+    init_worker,
+    location_distance_matrix,
+    pair_in_worker,
+    pair_with_distances,
+)
+from pairing_system.pagination import (
+    Cursor,
+    RankedEntry,
+    RankingSession,
+    RankingSessions,
+    query_fingerprint,
+)
+from pairing_system.query_planner import (
+    FEATURE,
+    LOCATION,
+    STAKE,
+    QueryPlan,
+    QueryPlanner,
+)
+from pairing_system.ranking import (
+    EQUAL_WEIGHTS,
+    ranked_entries,
+    threshold_top_k,
+    to_pairing_score,
+    validate_weights,
+)
+from pairing_system.registry import ProviderRegistry, RegistryIndexes
+from pairing_system.result_cache import ResultCache
+from pairing_system.sampling import SCORE, WEIGHTINGS, SamplingPool, consumer_rng
 from scoring.location_score import LocationScore
-from scoring.stake_score import StakeScore
+
+ProviderSet = Union[List[Provider], ProviderTable, ProviderRegistry]
+
+# Stake and feature-count maxima used to normalize scores: over the providers
+# that passed the filters (the original behavior), or over the whole provider set
+CANDIDATES = "candidates"
+PROVIDER_SET = "provider_set"
+NORMALIZATIONS = (CANDIDATES, PROVIDER_SET)
+
+# Top-k ranking modes: score every candidate completely, or compute the
+# location component only for candidates that can still make the top k
+EXHAUSTIVE = "exhaustive"
+THRESHOLD = "threshold"
+RANKINGS = (EXHAUSTIVE, THRESHOLD)
+
+_NOT_TRACED = nullcontext()
+
+
+class _TraceScope:
+    """
+    Makes a new trace the active one for the duration of a top-level call.
+    """
+
+    __slots__ = ("system", "trace")
+
+    def __init__(self, system: "PairingSystem", trace: QueryTrace):
+        self.system = system
+        self.trace = trace
+
+    def __enter__(self) -> QueryTrace:
+        self.system._trace = self.trace
+        return self.trace
+
+    def __exit__(self, *exc_info) -> None:
+        self.system._trace = NULL_TRACE
+        self.system.instrumentation.finish_trace(self.trace)
+        self.system.last_trace = self.trace
 
 
 class PairingSystem:
-    def __init__(self, strict: bool = True, max_distance_km: int = 2000):
+    def __init__(
+        self,
+        strict: bool = True,
+        max_distance_km: int = 2000,
+        geocoder: Optional[Geocoder] = None,
+        distance_model: str = GEODESIC,
+        backend: Union[str, ExecutionBackend] = "auto",
+        normalization: str = CANDIDATES,
+        result_cache_size: int = 1024,
+        sampling_pool_cache_size: int = 32,
+        cache_lists: bool = False,
+        instrumentation: Optional[Instrumentation] = None,
+        weights: Sequence[float] = EQUAL_WEIGHTS,
+        ranking: str = EXHAUSTIVE,
+        distance_table: Optional[DistanceTable] = None,
+    ):
         """
         :param strict: If True, apply strict location filtering (exact match only).
         :param max_distance_km: Max geographic distance (in km) beyond which location score is 0.0
+        :param geocoder: Geocoder shared by location filtering and scoring
+                         (default: the offline-only class geocoders)
+        :param distance_model: "geodesic" (exact), "haversine" or "equirectangular",
+                               see geo.distance for the error bounds of each model
+        :param backend: Execution backend for scoring: "auto" (chosen by input
+                        size), "serial", "thread", "process", "free-threaded",
+                        or an ExecutionBackend instance; call `close` (or use
+                        the system as a context manager) to release its pools
+        :param normalization: "candidates" to normalize stake and feature scores by
+                              the maxima over the filtered providers, or
+                              "provider_set" to use the maxima over the whole set
+                              (kept up to date incrementally by a ProviderRegistry)
+        :param result_cache_size: Number of `get_pairing_list` results kept in
+                                  an LRU cache (0 disables it)
+        :param sampling_pool_cache_size: Number of `sample_pairing_list`
+                                         candidate pools kept in an LRU cache
+                                         (0 disables it); each pool holds every
+                                         candidate of its query, so keep it small
+        :param cache_lists: Also cache results for plain provider lists, which
+                            are keyed by a digest of their content (computed
+                            once per list change); registries and tables are
+                            always cached
+        :param instrumentation: If given, every query is traced (per-stage wall
+                                time, candidate counts, scoring fan-out) and the
+                                geocoder and result cache counters are exported
+                                through it; `last_trace` holds the latest trace
+        :param weights: (stake, feature, location) weights of the score components;
+                        the score is their weighted average and zero-weight
+                        components are never computed
+        :param ranking: "exhaustive" to score every candidate, or "threshold" to
+                        score locations only for candidates whose stake and
+                        feature scores still allow them into the top k of
+                        `get_pairing_list` (same results)
+        :param distance_table: Distances between locations, shared by flexible
+                               filtering and location scoring (default: a new
+                               table over the geocoder, built as locations appear);
+                               its distance model must be `distance_model`, and
+                               its geocoder `geocoder` (adopted if None)
         """
+        if normalization not in NORMALIZATIONS:
+            raise ValueError(
+                f"Unknown normalization '{normalization}', expected one of {NORMALIZATIONS}"
+            )
+        if ranking not in RANKINGS:
+            raise ValueError(f"Unknown ranking '{ranking}', expected one of {RANKINGS}")
+        if (
+            distance_table is not None
+            and distance_table.distance_model != distance_model
+        ):
+            raise ValueError("distance_table was built for another distance model")
+        if distance_table is not None:
+            if geocoder is None:
+                # Filtering and scoring resolve locations like the table does
+                geocoder = distance_table.geocoder
+            elif distance_table.geocoder is not geocoder:
+                raise ValueError("distance_table uses another geocoder")
         self.strict_location_match = strict
         self.max_distance_km = max_distance_km
+        self.geocoder = geocoder
+        self.distance_model = distance_model
+        self._indexes: Optional[ProviderIndexes] = None
+        self.last_plan: Optional[QueryPlan] = None
+        self._location_filter: Optional[LocationFilter] = None
+        self._feature_filter = FeatureFilter()
+        self._stake_filter = StakeFilter()
+        self._sessions = RankingSessions()
+        self.backend = create_backend(backend)
+        self.normalization = normalization
+        self.weights = validate_weights(weights)
+        self.ranking = ranking
+        self.distance_table = distance_table
+        self.result_cache = ResultCache(result_cache_size)
+        self.cache_lists = cache_lists
+        self._sampling_pools = ResultCache(sampling_pool_cache_size)
+        self.instrumentation = instrumentation
+        self.last_trace: Optional[QueryTrace] = None
+        self._trace = NULL_TRACE
+        if instrumentation is not None:
+            self._register_collectors(instrumentation)
+
+    def _register_collectors(self, instrumentation: Instrumentation) -> None:
+        instrumentation.add_collector(result_cache_collector(self.result_cache))
+        instrumentation.add_collector(
+            geocoder_collector(
+                "shared" if self.geocoder is None else "pairing",
+                self._resolved_geocoder(),
+            )
+        )
+
+    def _traced(self, query: str, **attributes):
+        """
+        Scope of a top-level call: starts a trace when instrumentation is
+        enabled and no trace is active yet, otherwise does nothing.
+        """
+        if self.instrumentation is None or self._trace.enabled:
+            return _NOT_TRACED
+        return _TraceScope(self, self.instrumentation.start_trace(query, **attributes))
+
+    def close(self) -> None:
+        """
+        Shut down the worker pools of the execution backend.
+        """
+        self.backend.close()
+
+    def __enter__(self) -> "PairingSystem":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _resolved_geocoder(self) -> Geocoder:
+        return self.geocoder if self.geocoder is not None else LocationFilter._geocoder
+
+    def _location_filter_for_query(self) -> LocationFilter:
+        # Reused across queries while the resolved geocoder stays the same
+        geocoder = self._resolved_geocoder()
+        location_filter = self._location_filter
+        if location_filter is None or location_filter.geocoder is not geocoder:
+            location_filter = self._location_filter = LocationFilter(geocoder)
+        return location_filter
+
+    def _distances(self) -> DistanceTable:
+        """
+        The distance table, replaced by a new one if the geocoder or distance
+        model was changed since it was built.
+        """
+        geocoder = self._resolved_geocoder()
+        table = self.distance_table
+        if (
+            table is None
+            or table.geocoder is not geocoder
+            or table.distance_model != self.distance_model
+        ):
+            table = self.distance_table = DistanceTable(geocoder, self.distance_model)
+        return table
+
+    def _indexes_for(
+        self, providers: ProviderSet
+    ) -> Union[ProviderIndexes, RegistryIndexes]:
+        """
+        Return the indexes for this provider list, rebuilding them when a
+        different list is queried. A registry maintains its own indexes.
+        """
+        if isinstance(providers, ProviderRegistry):
+            return providers.indexes()
+        if self._indexes is None or not self._indexes.matches(providers):
+            self._indexes = ProviderIndexes(providers)
+        return self._indexes
 
     def filter_providers(
         self,
-        providers: List[Provider],
+        providers: ProviderSet,
         policy: ConsumerPolicy,
     ) -> List[Provider]:
         """
         Apply all filters to the provider list based on the consumer policy.
+
+        `providers` is a list of Provider objects, a columnar ProviderTable
+        or a ProviderRegistry; for a table only the surviving rows are
+        materialized as Providers.
+
+        The location, feature and stake predicates are answered from indexes
+        over the provider set (reused while the same set is queried). A query
+        planner runs the most selective, cheapest predicate first from its
+        index; later predicates only check the remaining candidates. The plan
+        used is kept in `last_plan`. Survivors keep their original order.
         """
-        providers = LocationFilter().filter(
-            providers, policy, self.strict_location_match, self.max_distance_km
-        )
-        for Filter in [FeatureFilter, StakeFilter]:
-            providers = Filter().filter(providers, policy)
-        return providers
+        with self._traced("filter_providers"):
+            return self._filter_providers(providers, policy)
+
+    def _filter_providers(
+        self, providers: ProviderSet, policy: ConsumerPolicy
+    ) -> List[Provider]:
+        indexes = self._indexes_for(providers)
+        ids = self._filter_ids(providers, indexes, policy)
+        if not len(ids):
+            return []
+        with self._trace.span("materialize", len(ids)):
+            return indexes.materialize(ids.tolist())
 
-    def _score_provider(
+    def _filter_ids(
         self,
-        provider: Provider,
+        providers: ProviderSet,
+        indexes: Union[ProviderIndexes, RegistryIndexes],
         policy: ConsumerPolicy,
-        max_stake: int,
-        max_features: int,
-    ) -> PairingScore:
+    ) -> np.ndarray:
         """
-        Compute the average score of a provider.
+        Sorted ids of the providers passing every filter.
         """
-        stake_score = StakeScore.score(provider, max_stake)
-        feature_score = FeatureScore.score(provider, policy, max_features)
-        location_score = LocationScore.score(
-            provider, policy, max_distance=self.max_distance_km
-        )
+        trace = self._trace
+        with trace.span("prefetch"):
+            # One lookup per unique location the query resolves, before
+            # filtering and scoring need them. Strict matching only resolves
+            # the policy location (for location scoring); flexible matching
+            # also reads the distance table, which resolves every provider
+            # location it has not interned yet.
+            locations = [policy.required_location]
+            if not self.strict_location_match:
+                table = self._distances()
+                locations += [
+                    location
+                    for location in indexes.locations.keys()
+                    if location not in table
+                ]
+            self._resolved_geocoder().prefetch(locations)
+        with trace.span("plan"):
+            plan = self.explain(providers, policy)
+        self.last_plan = plan
+
+        location_filter = self._location_filter_for_query()
+        selectors = {
+            LOCATION: lambda ids: location_filter.select(
+                indexes,
+                policy,
+                self.strict_location_match,
+                self.max_distance_km,
+                self.distance_model,
+                within=ids,
+                distance_table=self._distances(),
+            ),
+            FEATURE: lambda ids: self._feature_filter.select(
+                indexes, policy, within=ids
+            ),
+            STAKE: lambda ids: self._stake_filter.select(indexes, policy, within=ids),
+        }
 
-        average_score = (stake_score + feature_score + location_score) / 3
-        return PairingScore(
-            provider=provider,
-            score=average_score,
-            components={
-                "stake_score": stake_score,
-                "feature_score": feature_score,
-                "location_score": location_score,
-            },
+        ids = None
+        for step in plan.steps:
+            with trace.span(
+                f"filter.{step.predicate}", None if ids is None else len(ids)
+            ) as span:
+                ids = selectors[step.predicate](ids)
+                span.candidates_out = len(ids)
+            if not len(ids):
+                break
+        return ids
+
+    def explain(self, providers: ProviderSet, policy: ConsumerPolicy) -> QueryPlan:
+        """
+        Return the query plan `filter_providers` would use, without running it.
+        """
+        return QueryPlanner(self._distances()).plan(
+            self._indexes_for(providers),
+            policy,
+            self.strict_location_match,
+            self.max_distance_km,
         )
 
+    def _bind_cache(self, cache: ResultCache, providers: ProviderSet) -> bool:
+        """
+        Bind a per-provider-set cache to `providers`; False if results for
+        them are not cached (a plain list without `cache_lists`).
+        """
+        if isinstance(providers, ProviderRegistry):
+            version = providers.version
+        elif isinstance(providers, ProviderTable):
+            version = None
+        elif self.cache_lists:
+            # A list may change in place: key it on its content
+            version = self._indexes_for(providers).table.digest()
+        else:
+            return False
+        cache.bind(providers, version)
+        return True
+
+    def _normalization_maxima(
+        self, providers: ProviderSet
+    ) -> Tuple[Optional[int], Optional[int]]:
+        """
+        (max_stake, max_features) to normalize by, or (None, None) to use the
+        maxima over the candidates being ranked.
+        """
+        if self.normalization == CANDIDATES:
+            return None, None
+        indexes = self._indexes_for(providers)
+        return indexes.max_stake, indexes.max_features
+
+    def _ranked_entries(
+        self,
+        providers: List[Provider],
+        policy: ConsumerPolicy,
+        location_scores: Optional[Sequence[float]] = None,
+        max_stake: Optional[int] = None,
+        max_features: Optional[int] = None,
+    ) -> List[RankedEntry]:
+        """
+        Score every provider without building PairingScore objects.
+
+        :param location_scores: Precomputed location scores aligned with
+                                `providers`; computed in one batch if omitted
+        :param max_stake: Stake normalization maximum (default: max over `providers`)
+        :param max_features: Feature count normalization maximum (default: max over `providers`)
+        :return: One (-score, address, position, components) entry per provider
+        """
+        trace = self._trace
+        if location_scores is None:
+            with trace.span("score.location", len(providers)):
+                location_scores = self._location_scores(providers, policy)
+
+        if trace.enabled:
+            backend, chunks = self.backend.fan_out(len(providers))
+            span = trace.span(
+                "score.stake_feature", len(providers), backend=backend, chunks=chunks
+            )
+        else:
+            span = _NOT_TRACED
+        with span:
+            return ranked_entries(
+                providers,
+                policy,
+                location_scores,
+                self.backend,
+                max_stake,
+                max_features,
+                self.weights,
+            )
+
+    def _location_scores(
+        self, providers: List[Provider], policy: ConsumerPolicy
+    ) -> List[float]:
+        if self.weights[2] == 0:
+            return [0.0] * len(providers)
+        return LocationScore.score_batch(
+            providers,
+            policy,
+            max_distance=self.max_distance_km,
+            distance_table=self._distances(),
+        ).tolist()
+
     def rank_providers(
         self, providers: List[Provider], policy: ConsumerPolicy
     ) -> List[PairingScore]:
         """
-        Score and sort providers by their average score (descending).
+        Score and sort providers by their average score (descending),
+        breaking ties by address.
         """
-        max_stake = max((p.stake for p in providers), default=1)
-        max_features = max((len(p.features) for p in providers), default=1)
-        with ThreadPoolExecutor() as executor:
-            return sorted(
-                executor.map(
-                    lambda p: self._score_provider(p, policy, max_stake, max_features),
-                    providers,
-                ),
-                key=lambda x: x.score,
-                reverse=True,
-            )
+        with self._traced("rank_providers"):
+            entries = self._ranked_entries(providers, policy)
+            with self._trace.span("sort", len(entries)):
+                return [
+                    to_pairing_score(providers[entry[2]], entry[3], self.weights)
+                    for entry in sorted(entries)
+                ]
 
     def get_pairing_list(
         self,
-        providers: List[Provider],
+        providers: ProviderSet,
         policy: ConsumerPolicy,
+        k: int = 5,
     ) -> List[PairingScore]:
         """
-        Main entry point: returns the top 5 matching providers.
+        Main entry point: returns the top `k` matching providers.
+
+        Only the best `k` candidates are selected (bounded heap), and only
+        those are turned into PairingScore objects.
+
+        Results are cached per canonical policy, `k` and settings until the
+        provider set changes (another set or a registry version); plain lists
+        are only cached with `cache_lists`, and then until their content
+        changes. A cache hit does not update `last_plan`.
         """
+        if k <= 0:
+            raise ValueError("k must be a positive integer")
+
+        with self._traced("get_pairing_list", k=k):
+            return self._cached_pairing_list(providers, policy, k)
+
+    def _cached_pairing_list(
+        self, providers: ProviderSet, policy: ConsumerPolicy, k: int
+    ) -> List[PairingScore]:
+        if not self._bind_cache(self.result_cache, providers):
+            self._trace.attributes["result_cache"] = "off"
+            return self._pairing_list(providers, policy, k)
+        key = (
+            policy.canonical(),
+            k,
+            self.strict_location_match,
+            self.max_distance_km,
+            self.distance_model,
+            self.normalization,
+            self.weights,
+        )
+        cached = self.result_cache.get(key)
+        self._trace.attributes["result_cache"] = "miss" if cached is None else "hit"
+        if cached is not None:
+            return list(cached)
+
+        results = self._pairing_list(providers, policy, k)
+        self.result_cache.put(key, tuple(results))
+        return results
+
+    def _pairing_list(
+        self, providers: ProviderSet, policy: ConsumerPolicy, k: int
+    ) -> List[PairingScore]:
         filtered = self.filter_providers(providers, policy)
         if not filtered:
             return []
 
-        ranked = self.rank_providers(filtered, policy)
-        return [pairing_score for pairing_score in ranked[:5]]
+        max_stake, max_features = self._normalization_maxima(providers)
+        entries = self._top_entries(filtered, policy, k, max_stake, max_features)
+        return [
+            to_pairing_score(filtered[entry[2]], entry[3], self.weights)
+            for entry in entries
+        ]
+
+    def _top_entries(
+        self,
+        candidates: List[Provider],
+        policy: ConsumerPolicy,
+        k: int,
+        max_stake: Optional[int],
+        max_features: Optional[int],
+    ) -> List[RankedEntry]:
+        """
+        Best `k` entries over the filtered candidates, in order, using the
+        configured ranking.
+        """
+        if self.ranking == THRESHOLD:
+            with self._trace.span("score.threshold", len(candidates)) as span:
+                entries, scored = threshold_top_k(
+                    candidates,
+                    policy,
+                    lambda block: self._location_scores(block, policy),
+                    self.backend,
+                    k,
+                    max_stake,
+                    max_features,
+                    self.weights,
+                )
+                span.candidates_out = scored
+            return entries
+        entries = self._ranked_entries(
+            candidates, policy, max_stake=max_stake, max_features=max_features
+        )
+        with self._trace.span("select", len(entries)):
+            return heapq.nsmallest(k, entries)
+
+    def sample_pairing_list(
+        self,
+        providers: ProviderSet,
+        policy: ConsumerPolicy,
+        consumer: str,
+        epoch: int = 0,
+        k: int = 5,
+        weighting: str = SCORE,
+    ) -> List[PairingScore]:
+        """
+        Randomized pairing spreading load over all qualified providers: `k`
+        distinct candidates drawn with probability proportional to their
+        score or stake, in draw order, instead of always the same top `k`.
+
+        Draws are seeded by `consumer` and `epoch`, so a consumer gets the
+        same providers until its epoch changes. The scored candidates and
+        their alias table are built once per candidate set and kept in a
+        small LRU cache of their own (see `sampling_pool_cache_size`),
+        invalidated like `get_pairing_list` results, so a draw costs O(k)
+        on a hit.
+
+        :param consumer: Consumer id seeding the draws
+        :param epoch: Epoch seeding the draws, e.g. a session or time window
+        :param weighting: "score" (the PairingScore score) or "stake"
+        :return: Up to `k` providers (fewer if fewer candidates have a positive weight)
+        """
+        if k <= 0:
+            raise ValueError("k must be a positive integer")
+        if weighting not in WEIGHTINGS:
+            raise ValueError(
+                f"Unknown weighting '{weighting}', expected one of {WEIGHTINGS}"
+            )
+
+        with self._traced("sample_pairing_list", k=k, weighting=weighting):
+            pool = self._sampling_pool(providers, policy, weighting)
+            with self._trace.span("sample", len(pool)):
+                entries = pool.draw(k, consumer_rng(consumer, epoch))
+            return [
+                to_pairing_score(pool.providers[entry[2]], entry[3], self.weights)
+                for entry in entries
+            ]
+
+    def _sampling_pool(
+        self, providers: ProviderSet, policy: ConsumerPolicy, weighting: str
+    ) -> SamplingPool:
+        if not self._bind_cache(self._sampling_pools, providers):
+            self._trace.attributes["sampling_pool"] = "off"
+            return self._build_sampling_pool(providers, policy, weighting)
+        key = (
+            policy.canonical(),
+            weighting,
+            self.strict_location_match,
+            self.max_distance_km,
+            self.distance_model,
+            self.normalization,
+            self.weights,
+        )
+        pool = self._sampling_pools.get(key)
+        self._trace.attributes["sampling_pool"] = "miss" if pool is None else "hit"
+        if pool is None:
+            pool = self._build_sampling_pool(providers, policy, weighting)
+            self._sampling_pools.put(key, pool)
+        return pool
+
+    def _build_sampling_pool(
+        self, providers: ProviderSet, policy: ConsumerPolicy, weighting: str
+    ) -> SamplingPool:
+        filtered = self.filter_providers(providers, policy)
+        max_stake, max_features = self._normalization_maxima(providers)
+        entries = (
+            self._ranked_entries(
+                filtered, policy, max_stake=max_stake, max_features=max_features
+            )
+            if filtered
+            else []
+        )
+        with self._trace.span("alias_table", len(entries)):
+            return SamplingPool(filtered, entries, weighting)
+
+    def get_pairing_lists(
+        self,
+        providers: ProviderSet,
+        policies: Sequence[ConsumerPolicy],
+        k: int = 5,
+        processes: Optional[int] = None,
+    ) -> List[List[PairingScore]]:
+        """
+        Pair many consumer policies against the same provider set.
+
+        Work shared by the batch is done once: the provider indexes, geocoding
+        of every distinct location, and the distance matrix between distinct
+        policy locations and provider locations. Policies with the same
+        canonical form (location, feature set, min stake) are paired once.
+
+        :param policies: Consumer policies, duplicates allowed
+        :param k: Number of providers per policy
+        :param processes: If greater than 1, distinct policies are paired in
+                          that many worker processes
+        :return: One top-`k` list per policy, in the order of `policies`
+        """
+        if k <= 0:
+            raise ValueError("k must be a positive integer")
+
+        with self._traced("get_pairing_lists", k=k, policies=len(policies)):
+            return self._pairing_lists(providers, policies, k, processes)
+
+    def _pairing_lists(
+        self,
+        providers: ProviderSet,
+        policies: Sequence[ConsumerPolicy],
+        k: int,
+        processes: Optional[int],
+    ) -> List[List[PairingScore]]:
+        trace = self._trace
+        with trace.span("plan"):
+            if isinstance(providers, ProviderRegistry):
+                providers = providers.snapshot()
+            indexes = self._indexes_for(providers)
+            max_stake, max_features = self._normalization_maxima(providers)
+            groups = group_policies(policies)
+        representatives = [policies[positions[0]] for positions in groups.values()]
+        locations = list(dict.fromkeys(p.required_location for p in representatives))
+        with trace.span("distance_matrix", len(locations)):
+            matrix = location_distance_matrix(
+                indexes.table,
+                locations,
+                self._resolved_geocoder(),
+                self.distance_model,
+                self._distances(),
+            )
+        rows = {location: matrix[row] for row, location in enumerate(locations)}
+        tasks = [(policy, rows[policy.required_location]) for policy in representatives]
+
+        parallel = processes is not None and processes > 1 and len(tasks) > 1
+        with trace.span(
+            "pair",
+            len(tasks),
+            backend="process" if parallel else self.backend.name,
+            workers=processes if parallel else 1,
+        ):
+            results = self._pair_tasks(
+                indexes,
+                tasks,
+                k,
+                processes if parallel else None,
+                max_stake,
+                max_features,
+            )
+
+        pairing_lists: List[List[PairingScore]] = [[] for _ in policies]
+        for positions, result in zip(groups.values(), results):
+            for position in positions:
+                pairing_lists[position] = list(result)
+        return pairing_lists
+
+    def _pair_tasks(
+        self,
+        indexes: ProviderIndexes,
+        tasks: List[tuple],
+        k: int,
+        processes: Optional[int],
+        max_stake: Optional[float],
+        max_features: Optional[int],
+    ) -> List[List[PairingScore]]:
+        if processes is not None:
+            with ProcessPoolExecutor(
+                max_workers=processes,
+                initializer=init_worker,
+                initargs=(
+                    indexes.table,
+                    self.strict_location_match,
+                    self.max_distance_km,
+                    k,
+                    max_stake,
+                    max_features,
+                    self.weights,
+                ),
+            ) as executor:
+                chunksize = max(1, len(tasks) // (processes * 4))
+                return list(executor.map(pair_in_worker, tasks, chunksize=chunksize))
+        return [
+            pair_with_distances(
+                indexes,
+                policy,
+                distances,
+                self.strict_location_match,
+                self.max_distance_km,
+                k,
+                self.backend,
+                max_stake,
+                max_features,
+                self.weights,
+            )
+            for policy, distances in tasks
+        ]
+
+    def _fingerprint(self, providers: ProviderSet, policy: ConsumerPolicy) -> str:
+        # A registry is named by its id and version; a list or table by a
+        # digest of its content, so that neither a reused object id nor an
+        # in-place change can make a cursor of another provider set match
+        if isinstance(providers, ProviderRegistry):
+            provider_set = (providers.uid, providers.version)
+        else:
+            provider_set = self._indexes_for(providers).table.digest()
+        return query_fingerprint(
+            provider_set,
+            policy.canonical(),
+            self.strict_location_match,
+            self.max_distance_km,
+            self.distance_model,
+            self.normalization,
+            self.weights,
+        )
+
+    def get_pairing_page(
+        self,
+        providers: ProviderSet,
+        policy: ConsumerPolicy,
+        k: int = 5,
+        cursor: Optional[str] = None,
+    ) -> PairingPage:
+        """
+        Return one page of `k` ranked providers plus a cursor for the next page.
+
+        The first call scores the candidates once and keeps them in a heap;
+        following pages pop from that heap instead of re-ranking. If the
+        session has been evicted, the cursor still carries the last returned
+        (score, address, position), and the next page is recomputed from there.
+        Candidate positions are stable for the same provider set, so results
+        sharing a score and an address are neither skipped nor repeated.
+
+        :param cursor: `next_cursor` of the previous page, or None for the first page
+        :raises ValueError: If the cursor is malformed or belongs to another query
+        """
+        if k <= 0:
+            raise ValueError("k must be a positive integer")
+
+        with self._traced("get_pairing_page", k=k, first_page=cursor is None):
+            return self._pairing_page(providers, policy, k, cursor)
+
+    def _pairing_page(
+        self,
+        providers: ProviderSet,
+        policy: ConsumerPolicy,
+        k: int,
+        cursor: Optional[str],
+    ) -> PairingPage:
+        fingerprint = self._fingerprint(providers, policy)
+        session = None
+        position = None
+        if cursor is not None:
+            position = Cursor.decode(cursor)
+            if position.fingerprint != fingerprint:
+                raise ValueError("Pagination cursor does not match this query")
+            session = self._sessions.get(position.session, fingerprint)
+            if session is not None and not session.continues(position):
+                # A replayed cursor: the session has moved past it
+                session = None
+
+        if session is None:
+            filtered = self.filter_providers(providers, policy)
+            max_stake, max_features = self._normalization_maxima(providers)
+            entries = (
+                self._ranked_entries(
+                    filtered, policy, max_stake=max_stake, max_features=max_features
+                )
+                if filtered
+                else []
+            )
+            if position is not None:
+                entries = [e for e in entries if position.is_before(e)]
+            heapq.heapify(entries)
+            session = RankingSession(fingerprint, filtered, entries)
+            session_id = self._sessions.create(session)
+        else:
+            session_id = position.session
+            self._trace.attributes["session"] = "reused"
+
+        with self._trace.span("select", len(session.heap)):
+            top = session.pop(k)
+        results = [
+            to_pairing_score(session.providers[entry[2]], entry[3], self.weights)
+            for entry in top
+        ]
+        if not session.heap or not top:
+            self._sessions.discard(session_id)
+            return PairingPage(results, None)
+
+        last = top[-1]
+        next_cursor = Cursor(
+            session_id, fingerprint, -last[0], last[1], last[2]
+        ).encode()
+        return PairingPage(results, next_cursor)
@@ -1,47 +1,88 @@
-from functools import lru_cache
-from typing import Optional, Tuple
+from typing import List, Optional, Tuple
 
-from geopy.distance import geodesic
-from geopy.extra.rate_limiter import RateLimiter
-from geopy.geocoders import Nominatim
+import numpy as np
 
+from geo.distance import GEODESIC, batch_distances, distance, resolve_coordinates
+from geo.distance_table import DistanceTable
+from geo.geocoder import Geocoder, SharedGeocoderAttribute
 from models.policy import ConsumerPolicy
 from models.provider import Provider
 
 
 class LocationScore:
-    _geolocator = Nominatim(user_agent="geo_locator")
-    _rate_limited_geocode = RateLimiter(
-        _geolocator.geocode, min_delay_seconds=1, max_retries=2
-    )
+    # Same object as LocationFilter._geocoder
+    _geocoder = SharedGeocoderAttribute()
 
     @staticmethod
-    @lru_cache(maxsize=128)
     def geocode(location_str: str) -> Optional[Tuple[float, float]]:
         """
         Convert a location string into latitude and longitude coordinates.
         """
-        if not location_str:
-            return None
-        try:
-            loc = LocationScore._rate_limited_geocode(location_str)
-            return (loc.latitude, loc.longitude) if loc else None
-        except Exception:
-            return None
+        return LocationScore._geocoder.geocode(location_str)
 
     @staticmethod
-    def score(provider, policy, max_distance=2000):  # max_distance in kilometers
-        provider_coords = LocationScore.geocode(provider.location)
-        policy_coords = LocationScore.geocode(policy.required_location)
+    def score(
+        provider,
+        policy,
+        max_distance=2000,
+        geocoder: Optional[Geocoder] = None,
+        distance_model: str = GEODESIC,
+    ):  # max_distance in kilometers
+        geocoder = geocoder if geocoder is not None else LocationScore._geocoder
+        provider_coords = geocoder.geocode(provider.location)
+        policy_coords = geocoder.geocode(policy.required_location)
 
         if not provider_coords or not policy_coords:
             return 0.0
 
-        distance = geodesic(provider_coords, policy_coords).kilometers
+        km = distance(provider_coords, policy_coords, distance_model)
 
-        if distance == 0:
+        if km == 0:
             return 1.0
-        elif distance >= max_distance:
+        elif km >= max_distance:
             return 0.0
         else:
-            return max(0.0, 1 - (distance / max_distance))
+            return max(0.0, 1 - (km / max_distance))
+
+    @staticmethod
+    def from_distances(distances: np.ndarray, max_distance: float) -> np.ndarray:
+        """
+        Vectorized form of the score: 1.0 at distance 0, falling linearly to 0.0
+        at `max_distance`. NaN distances (unresolved locations) score 0.0.
+        """
+        scores = 1 - np.asarray(distances, dtype=np.float64) / max_distance
+        return np.clip(np.nan_to_num(scores, nan=0.0), 0.0, 1.0)
+
+    @staticmethod
+    def score_batch(
+        providers: List[Provider],
+        policy: ConsumerPolicy,
+        max_distance=2000,
+        geocoder: Optional[Geocoder] = None,
+        distance_model: str = GEODESIC,
+        distance_table: Optional[DistanceTable] = None,
+    ) -> np.ndarray:
+        """
+        Score many providers against one policy with a single distance computation.
+
+        :param distance_table: If given, distances are read from it instead of
+                               being computed (its geocoder and distance model
+                               are used)
+        :return: Array of location scores in [0.0, 1.0], aligned with `providers`
+        """
+        if distance_table is not None:
+            distances = distance_table.distances(
+                policy.required_location, (p.location for p in providers)
+            )
+            return LocationScore.from_distances(distances, max_distance)
+
+        geocoder = geocoder if geocoder is not None else LocationScore._geocoder
+        policy_coords = geocoder.geocode(policy.required_location)
+        if not policy_coords:
+            return np.zeros(len(providers))
+
+        provider_coords = resolve_coordinates(
+            (p.location for p in providers), geocoder
+        )
+        distances = batch_distances(policy_coords, provider_coords, distance_model)
+        return LocationScore.from_distances(distances, max_distance)
@@ -0,0 +1,105 @@
+import gc
+
+import pytest
+
+from models.policy import ConsumerPolicy
+from models.provider import Provider
+from pairing_system.backends import (
+    AutoBackend,
+    FreeThreadedBackend,
+    ProcessPoolBackend,
+    SerialBackend,
+    ThreadPoolBackend,
+    chunked,
+    create_backend,
+    gil_enabled,
+)
+from pairing_system.system import PairingSystem
+
+
+def square_all(chunk):
+    return [x * x for x in chunk]
+
+
+@pytest.mark.parametrize("backend_cls", [SerialBackend, ThreadPoolBackend, ProcessPoolBackend])
+def test_backends_preserve_order(backend_cls):
+    backend = backend_cls(max_workers=2, min_chunk_size=3)
+    try:
+        items = list(range(50))
+        assert backend.map_chunks(square_all, items) == [x * x for x in items]
+        assert backend.map_chunks(square_all, []) == []
+    finally:
+        backend.close()
+
+
+def test_chunked():
+    assert chunked([1, 2, 3, 4, 5], 2) == [[1, 2], [3, 4], [5]]
+
+
+def test_executor_is_reused_until_closed():
+    backend = ThreadPoolBackend(max_workers=2, min_chunk_size=1)
+    backend.map_chunks(square_all, [1, 2, 3])
+    executor = backend._executor
+    backend.map_chunks(square_all, [4, 5, 6])
+    assert backend._executor is executor
+    backend.close()
+    assert backend._executor is None
+
+
+def test_backend_context_manager_closes_pools():
+    with ThreadPoolBackend(max_workers=2, min_chunk_size=1) as backend:
+        backend.map_chunks(square_all, [1, 2, 3])
+        executor = backend._executor
+    assert backend._executor is None
+    assert executor._shutdown
+
+
+def test_dropped_backend_shuts_down_its_pool():
+    backend = ThreadPoolBackend(max_workers=2, min_chunk_size=1)
+    backend.map_chunks(square_all, [1, 2, 3])
+    executor = backend._executor
+    del backend
+    gc.collect()
+    assert executor._shutdown
+
+
+@pytest.mark.skipif(not gil_enabled(), reason="interpreter is free-threaded")
+def test_free_threaded_backend_requires_no_gil():
+    with pytest.raises(RuntimeError, match="requires a no-GIL interpreter"):
+        FreeThreadedBackend()
+
+
+@pytest.mark.parametrize(
+    "n_items, max_workers, expected",
+    [
+        (10, 8, "serial"),
+        (10_000, 1, "serial"),
+        (500_000, 8, "serial" if gil_enabled() else "free-threaded"),
+    ],
+)
+def test_auto_backend_selection(n_items, max_workers, expected):
+    backend = AutoBackend(max_workers=max_workers)
+    assert backend.select(n_items).name == expected
+    backend.close()
+
+
+def test_create_backend():
+    backend = SerialBackend()
+    assert create_backend(backend) is backend
+    assert create_backend("thread").name == "thread"
+    with pytest.raises(ValueError, match="Unknown execution backend 'gpu'"):
+        create_backend("gpu")
+
+
+@pytest.mark.parametrize("backend", ["serial", "thread", "process"])
+def test_pairing_system_backends_agree(backend):
+    providers = [
+        Provider(f"P{i}", 10 + i % 17, "US", ["f1", "f2", "f3"][: 1 + i % 3])
+        for i in range(300)
+    ]
+    policy = ConsumerPolicy("US", ["f1"], 0)
+    expected = PairingSystem(backend="serial").rank_providers(providers, policy)
+    with PairingSystem(
+        backend=create_backend(backend, max_workers=2, min_chunk_size=16)
+    ) as system:
+        assert system.rank_providers(providers, policy) == expected
@@ -0,0 +1,72 @@
+import random
+
+import pytest
+
+from models.policy import ConsumerPolicy
+from models.provider import Provider
+from models.provider_table import ProviderTable
+from pairing_system.batch import group_policies
+from pairing_system.system import PairingSystem
+
+
+@pytest.fixture(scope="module")
+def providers():
+    rng = random.Random(5)
+    locations = ["US", "CA", "MX", "DE", "FR", "PL", "JP", "Atlantis"]
+    return [
+        Provider(
+            f"P{i}",
+            rng.randint(0, 500),
+            rng.choice(locations),
+            [f for f in ["f1", "f2", "f3"] if rng.random() < 0.5],
+        )
+        for i in range(400)
+    ]
+
+
+@pytest.fixture(scope="module")
+def policies():
+    rng = random.Random(9)
+    policies = [
+        ConsumerPolicy(
+            rng.choice(["US", "DE", "JP", "Atlantis"]),
+            rng.sample(["f1", "f2", "f3"], rng.randint(0, 2)),
+            rng.choice([0, 100, 300]),
+        )
+        for _ in range(40)
+    ]
+    # Same canonical policy with features in another order
+    return policies + [ConsumerPolicy("US", ["f2", "f1"], 100)]
+
+
+@pytest.mark.parametrize("strict", [True, False])
+@pytest.mark.parametrize("distance_model", ["geodesic", "haversine"])
+def test_batch_matches_single_queries(providers, policies, strict, distance_model):
+    system = PairingSystem(strict=strict, distance_model=distance_model, backend="serial")
+    expected = [system.get_pairing_list(providers, p, k=7) for p in policies]
+    assert system.get_pairing_lists(providers, policies, k=7) == expected
+
+
+def test_batch_accepts_table_and_processes(providers, policies):
+    system = PairingSystem(strict=False)
+    expected = system.get_pairing_lists(providers, policies)
+    table = ProviderTable.from_providers(providers)
+    assert system.get_pairing_lists(table, policies, processes=2) == expected
+
+
+def test_group_policies_canonicalizes_features():
+    groups = group_policies(
+        [
+            ConsumerPolicy("US", ["f1", "f2"], 10),
+            ConsumerPolicy("US", ["f2", "f1", "f1"], 10),
+            ConsumerPolicy("US", ["f1"], 10),
+        ]
+    )
+    assert list(groups.values()) == [[0, 1], [2]]
+
+
+def test_batch_edge_cases(providers):
+    system = PairingSystem()
+    assert system.get_pairing_lists(providers, []) == []
+    with pytest.raises(ValueError, match="k must be a positive integer"):
+        system.get_pairing_lists(providers, [ConsumerPolicy("US")], k=0)
@@ -0,0 +1,52 @@
+import copy
+
+import numpy as np
+
+from benchmarks.run import compare, main, run_suite
+from benchmarks.synthetic import (
+    StubGeocoder,
+    generate_policies,
+    generate_providers,
+    location_catalog,
+)
+
+
+def test_generator_is_seeded_and_valid():
+    a = generate_providers(500, seed=3)
+    b = generate_providers(500, seed=3)
+    assert a.addresses == b.addresses
+    assert np.array_equal(a.stakes, b.stakes)
+    assert np.array_equal(a.feature_ids, b.feature_ids)
+    assert not np.array_equal(a.stakes, generate_providers(500, seed=4).stakes)
+
+    # Materializing runs full Provider validation
+    providers = a.to_providers()
+    assert all(len(set(p.features)) == len(p.features) for p in providers)
+    assert set(p.location for p in providers) <= set(location_catalog())
+
+
+def test_policies_resolve_offline():
+    policies = generate_policies(20, seed=1)
+    assert policies == generate_policies(20, seed=1)
+    geocoder = StubGeocoder.for_locations([p.required_location for p in policies])
+    assert all(geocoder.geocode(p.required_location) for p in policies)
+
+
+def test_suite_and_regression_check(tmp_path):
+    results = run_suite([300], queries=3, case_filter="pipeline")
+    cases = {r["case"] for r in results["results"]}
+    assert "pipeline.get_pairing_list.flexible" in cases
+    assert all(r["latency_ms"]["p50"] >= 0 for r in results["results"])
+
+    assert compare(results, results) == []
+    faster = copy.deepcopy(results)
+    for r in faster["results"]:
+        r["latency_ms"]["p50"] = r["latency_ms"]["p50"] / 10 or 1e-9
+    assert len(compare(results, faster, tolerance=0.5)) == len(results["results"])
+
+
+def test_cli_writes_json(tmp_path):
+    output = tmp_path / "bench.json"
+    args = ["--sizes", "200", "--queries", "2", "--cases", "filter.stake"]
+    assert main(args + ["--output", str(output)]) == 0
+    assert main(args + ["--baseline", str(output), "--tolerance", "1000"]) == 0
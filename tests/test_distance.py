@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+from geopy.distance import geodesic
+
+from geo.distance import (
+    DISTANCE_MODELS,
+    EQUIRECTANGULAR,
+    GEODESIC,
+    HAVERSINE,
+    batch_distances,
+    resolve_coordinates,
+)
+from geo.geocoder import Geocoder
+from models.policy import ConsumerPolicy
+from models.provider import Provider
+from scoring.location_score import LocationScore
+
+ORIGIN = (51.165691, 10.451526)  # DE
+POINTS = np.array(
+    [
+        [51.165691, 10.451526],  # DE
+        [46.227638, 2.213749],  # FR
+        [52.132633, 5.291266],  # NL
+        [36.204824, 138.252924],  # JP
+    ]
+)
+
+
+def test_geodesic_model_is_exact():
+    expected = [geodesic(ORIGIN, tuple(p)).kilometers for p in POINTS]
+    assert batch_distances(ORIGIN, POINTS, GEODESIC) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize(
+    "model, points, tolerance",
+    [
+        (HAVERSINE, POINTS, 0.005),
+        (EQUIRECTANGULAR, POINTS[:3], 0.005),  # only accurate for short distances
+    ],
+)
+def test_approximate_models_error_bounds(model, points, tolerance):
+    exact = batch_distances(ORIGIN, points, GEODESIC)
+    approx = batch_distances(ORIGIN, points, model)
+    assert approx == pytest.approx(exact, rel=tolerance, abs=1e-9)
+
+
+@pytest.mark.parametrize("model", DISTANCE_MODELS)
+def test_nan_rows_and_empty_input(model):
+    distances = batch_distances(ORIGIN, np.array([[np.nan, np.nan], POINTS[1]]), model)
+    assert np.isnan(distances[0]) and distances[1] > 0
+    assert batch_distances(ORIGIN, np.empty((0, 2)), model).shape == (0,)
+
+
+def test_unknown_model():
+    with pytest.raises(ValueError, match="Unknown distance model 'manhattan'"):
+        batch_distances(ORIGIN, POINTS, "manhattan")
+
+
+def test_resolve_coordinates_marks_unresolved():
+    coords = resolve_coordinates(["DE", "Atlantis", "DE"], Geocoder())
+    assert coords.shape == (3, 2)
+    assert np.isnan(coords[1]).all()
+    assert (coords[0] == coords[2]).all()
+
+
+@pytest.mark.parametrize("model", DISTANCE_MODELS)
+def test_location_score_batch_matches_single(model):
+    policy = ConsumerPolicy("DE", ["f1"], 0)
+    providers = [
+        Provider(str(i), 10, loc, ["f1"])
+        for i, loc in enumerate(["DE", "FR", "NL", "JP", "Atlantis"])
+    ]
+    batch = LocationScore.score_batch(providers, policy, distance_model=model)
+    single = [LocationScore.score(p, policy, distance_model=model) for p in providers]
+    assert batch.tolist() == pytest.approx(single)
+    assert batch[0] == 1.0 and batch[3] == 0.0 and batch[4] == 0.0
+
+
+def test_geodesic_distance_to_the_origin_is_zero():
+    origin = (52.52, 13.405)
+    coords = np.array([origin, (np.nan, np.nan), origin])
+    distances = batch_distances(origin, coords, GEODESIC)
+    assert distances[0] == distances[2] == 0.0
+    assert np.isnan(distances[1])
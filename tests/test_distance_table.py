@@ -0,0 +1,154 @@
+import numpy as np
+import pytest
+
+from benchmarks.synthetic import StubGeocoder, generate_policies, generate_providers
+from filters.location_filter import LocationFilter
+from geo.distance import GEODESIC, HAVERSINE, batch_distances
+from geo.distance_table import DistanceTable
+from indexes.provider_indexes import ProviderIndexes
+from pairing_system.system import PairingSystem
+from scoring.location_score import LocationScore
+
+
+@pytest.fixture
+def geocoder():
+    return StubGeocoder(
+        {"US": (38.0, -97.0), "CA": (60.0, -95.0), "DE": (51.0, 9.0), "FR": (46.0, 2.0)}
+    )
+
+
+@pytest.mark.parametrize("model", [GEODESIC, HAVERSINE])
+def test_rows_match_batch_distances(geocoder, model):
+    table = DistanceTable(geocoder, model, ["US", "CA", "DE"])
+    expected = batch_distances(
+        geocoder.coordinates["US"],
+        np.array([geocoder.coordinates[loc] for loc in ("US", "CA", "DE")]),
+        model,
+    )
+    assert table.row("US").tolist() == expected.tolist()
+    assert table.distances("US", ["DE", "US", "DE"]).tolist() == [
+        expected[2],
+        expected[0],
+        expected[2],
+    ]
+
+
+def test_rows_are_computed_once_and_extended(geocoder):
+    table = DistanceTable(geocoder, HAVERSINE, ["US", "CA"])
+    table.row("US")
+    assert geocoder.calls == 2
+
+    table.row("US")
+    assert geocoder.calls == 2
+    # A new location is geocoded once and only the missing column is computed
+    assert len(table.distances("US", ["FR"])) == 1
+    assert geocoder.calls == 3
+    assert len(table.row("US")) == 3 == len(table)
+    assert table.row("FR")[table.id_of("FR")] == 0.0
+
+
+def test_unresolved_locations(geocoder):
+    table = DistanceTable(geocoder, HAVERSINE)
+    assert np.isnan(table.distances("US", ["Atlantis"])).all()
+    assert np.isnan(table.distances("Atlantis", ["US", "DE"])).all()
+
+
+def test_save_and_load(tmp_path, geocoder):
+    table = DistanceTable(geocoder, HAVERSINE, ["US", "CA", "DE"])
+    row = table.row("DE").copy()
+    table.save(tmp_path / "distances.npz")
+
+    loaded = DistanceTable.load(tmp_path / "distances.npz", geocoder)
+    calls = geocoder.calls
+    assert loaded.locations == ["US", "CA", "DE"]
+    assert loaded.distance_model == HAVERSINE
+    assert loaded.row("DE").tolist() == row.tolist()
+    assert geocoder.calls == calls
+    assert loaded.distances("DE", ["FR"])[0] == table.distances("DE", ["FR"])[0]
+
+
+def test_scorer_and_filter_read_the_table():
+    providers = generate_providers(3000, seed=7)
+    policies = generate_policies(10, seed=7)
+    geocoder = StubGeocoder.for_locations(
+        providers.locations + [p.required_location for p in policies]
+    )
+    indexes = ProviderIndexes(providers)
+    candidates = providers.to_providers()
+    table = DistanceTable(geocoder, GEODESIC)
+    location_filter = LocationFilter(geocoder)
+
+    for policy in policies:
+        expected = location_filter.select(indexes, policy, False, 1500.0)
+        selected = location_filter.select(
+            indexes, policy, False, 1500.0, distance_table=table
+        )
+        assert selected.tolist() == expected.tolist()
+
+        expected = LocationScore.score_batch(candidates, policy, 1500.0, geocoder)
+        scores = LocationScore.score_batch(
+            candidates, policy, 1500.0, distance_table=table
+        )
+        assert scores.tolist() == expected.tolist()
+    assert len(table) <= len(geocoder.coordinates)
+
+
+def test_system_distance_model_must_match(geocoder):
+    with pytest.raises(ValueError):
+        PairingSystem(
+            distance_model=GEODESIC, distance_table=DistanceTable(geocoder, HAVERSINE)
+        )
+
+
+def test_origins_are_bounded_and_not_interned(geocoder):
+    table = DistanceTable(geocoder, HAVERSINE, ["US", "DE"], max_rows=2)
+    for origin in ["CA", "FR", "Atlantis", "Nowhere"]:
+        table.distances(origin, ["US"])
+    assert len(table) == 2
+    assert table.origins == ["Atlantis", "Nowhere"]
+
+    table.row("FR")
+    assert table.origins == ["Nowhere", "FR"]
+
+
+def test_saved_rows_are_loaded(tmp_path, geocoder):
+    table = DistanceTable(geocoder, HAVERSINE, ["US", "DE"], max_rows=1)
+    row = table.row("CA").copy()
+    table.save(tmp_path / "distances.npz")
+
+    loaded = DistanceTable.load(tmp_path / "distances.npz", geocoder)
+    calls = geocoder.calls
+    assert loaded.origins == ["CA"]
+    assert loaded.row("CA").tolist() == row.tolist()
+    assert geocoder.calls == calls
+
+
+def test_system_adopts_or_rejects_the_table_geocoder(geocoder):
+    table = DistanceTable(geocoder, GEODESIC)
+    assert PairingSystem(distance_table=table).geocoder is geocoder
+    with pytest.raises(ValueError, match="another geocoder"):
+        PairingSystem(geocoder=StubGeocoder({}), distance_table=table)
+
+
+def test_unresolved_locations_are_retried(geocoder):
+    table = DistanceTable(geocoder, HAVERSINE, ["US"], retry_seconds=0.0)
+    assert np.isnan(table.distances("US", ["Atlantis"])).all()
+    assert np.isnan(table.row("Atlantis")).all()
+
+    # The geocoder recovers (e.g. after an outage): both are resolved again
+    geocoder.coordinates["Atlantis"] = (30.0, -40.0)
+    expected = batch_distances((38.0, -97.0), np.array([(30.0, -40.0)]), HAVERSINE)
+    assert table.distances("US", ["Atlantis"]).tolist() == expected.tolist()
+    assert table.distances("Atlantis", ["US"]).tolist() == expected.tolist()
+
+
+def test_unresolved_locations_are_not_saved(tmp_path, geocoder):
+    table = DistanceTable(geocoder, HAVERSINE, ["US", "Atlantis", "DE"])
+    row = table.row("US").copy()
+    table.row("Nowhere")
+    table.save(tmp_path / "distances.npz")
+
+    loaded = DistanceTable.load(tmp_path / "distances.npz", geocoder)
+    assert loaded.locations == ["US", "DE"]
+    assert loaded.origins == ["US"]
+    assert loaded.row("US").tolist() == [row[0], row[2]]
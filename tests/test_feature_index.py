@@ -0,0 +1,65 @@
+import random
+
+import numpy as np
+import pytest
+
+from filters.feature_filter import FeatureFilter
+from indexes.feature_index import FeatureIndex
+from indexes.postings import intersect_sorted
+from models.policy import ConsumerPolicy
+from models.provider import Provider
+
+
+@pytest.fixture(scope="module")
+def providers():
+    rng = random.Random(3)
+    features = [f"f{i}" for i in range(8)]
+    return [
+        Provider(f"P{i}", 10, "US", rng.sample(features, rng.randint(0, 5)))
+        for i in range(500)
+    ]
+
+
+@pytest.mark.parametrize(
+    "required", [[], ["f0"], ["f1", "f2"], ["f3", "f3", "f4", "f5"], ["missing"]]
+)
+def test_candidates_match_feature_filter(providers, required):
+    index = FeatureIndex.from_providers(providers)
+    policy = ConsumerPolicy("US", required, 0)
+    expected = [p.address for p in FeatureFilter().filter(providers, policy)]
+    ids = index.candidates(required)
+    assert [providers[i].address for i in ids] == expected
+
+
+def test_candidates_within_restricts_result(providers):
+    index = FeatureIndex.from_providers(providers)
+    within = np.arange(0, 500, 7)
+    ids = index.candidates(["f1"], within=within)
+    assert set(ids.tolist()) == set(index.postings("f1").tolist()) & set(within.tolist())
+
+
+def test_postings_and_counts():
+    index = FeatureIndex.from_providers(
+        [
+            Provider("A", 1, "US", ["f1", "f2", "f1"]),
+            Provider("B", 1, "US", ["f2"]),
+        ]
+    )
+    assert index.postings("f2").tolist() == [0, 1]
+    assert index.count("f1") == 1
+    assert index.count("f9") == 0 and "f9" not in index
+    assert index.candidates([]).tolist() == [0, 1]
+
+
+@pytest.mark.parametrize(
+    "small, large, expected",
+    [
+        ([1, 5, 9], [0, 1, 2, 5, 10], [1, 5]),
+        ([], [1, 2], []),
+        ([3], [], []),
+        ([7, 8], [1, 2], []),
+    ],
+)
+def test_intersect_sorted(small, large, expected):
+    result = intersect_sorted(np.array(small, dtype=np.intp), np.array(large, dtype=np.intp))
+    assert result.tolist() == expected
@@ -0,0 +1,49 @@
+import pytest
+
+from geo.gazetteer import Gazetteer
+from geo.geocoder import Geocoder
+
+
+@pytest.fixture
+def gazetteer():
+    return Gazetteer.default()
+
+
+def test_gazetteer_covers_iso_3166(gazetteer):
+    assert len(gazetteer) == 249
+
+
+@pytest.mark.parametrize(
+    "location", ["US", "us", "USA", "United States", "  united   states  "]
+)
+def test_gazetteer_lookup_variants(gazetteer, location):
+    assert gazetteer.lookup(location) == pytest.approx((37.09024, -95.712891))
+
+
+@pytest.mark.parametrize("location", ["UK", "GB", "GBR", "Great Britain"])
+def test_gazetteer_aliases(gazetteer, location):
+    assert gazetteer.entry(location).alpha2 == "GB"
+
+
+@pytest.mark.parametrize("location", ["", "Atlantis", "New York"])
+def test_gazetteer_unknown_location(gazetteer, location):
+    assert gazetteer.lookup(location) is None
+    assert location not in gazetteer
+
+
+def test_geocoder_does_not_go_online_by_default(monkeypatch):
+    geocoder = Geocoder()
+    monkeypatch.setattr(
+        geocoder, "_online", lambda: pytest.fail("online geocoder was used")
+    )
+    assert geocoder.geocode("DE") == pytest.approx((51.165691, 10.451526))
+    assert geocoder.geocode("Berlin") is None
+
+
+def test_geocoder_online_fallback_for_free_form_strings(monkeypatch):
+    class FakeLocation:
+        latitude, longitude = 52.52, 13.405
+
+    geocoder = Geocoder(online_fallback=True)
+    monkeypatch.setattr(geocoder, "_online", lambda: lambda location: FakeLocation)
+    assert geocoder.geocode("Berlin") == (52.52, 13.405)
@@ -0,0 +1,132 @@
+import pytest
+
+from geo.geocode_cache import GeocodeCache
+from geo.geocoder import Geocoder, GeocoderUnavailable
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def cache(tmp_path, clock):
+    return GeocodeCache(
+        tmp_path / "geocode.sqlite", ttl_seconds=100, negative_ttl_seconds=10, clock=clock
+    )
+
+
+def test_cache_round_trip_and_persistence(cache, tmp_path, clock):
+    cache.put("Berlin", (52.52, 13.405))
+    assert cache.get("Berlin") == (True, (52.52, 13.405))
+
+    reopened = GeocodeCache(tmp_path / "geocode.sqlite", clock=clock)
+    assert reopened.get("Berlin") == (True, (52.52, 13.405))
+    assert reopened.get("Paris") == (False, None)
+
+
+def test_negative_entries_expire_before_positive_ones(cache, clock):
+    cache.put("Berlin", (52.52, 13.405))
+    cache.put("Atlantis", None)
+    assert cache.get("Atlantis") == (True, None)
+
+    clock.now += 50
+    assert cache.get("Atlantis") == (False, None)
+    assert cache.get("Berlin") == (True, (52.52, 13.405))
+    assert cache.purge_expired() == 1
+    assert len(cache) == 1
+
+    clock.now += 100
+    assert cache.get("Berlin") == (False, None)
+
+
+@pytest.mark.parametrize("ttl, negative_ttl", [(0, 10), (10, -1)])
+def test_invalid_ttls(tmp_path, ttl, negative_ttl):
+    with pytest.raises(ValueError, match="TTLs must be positive"):
+        GeocodeCache(tmp_path / "g.sqlite", ttl_seconds=ttl, negative_ttl_seconds=negative_ttl)
+
+
+def test_geocoder_persists_online_results(cache, monkeypatch):
+    calls = []
+
+    def lookup(location):
+        calls.append(location)
+        return (52.52, 13.405) if location == "Berlin" else None
+
+    geocoder = Geocoder(online_fallback=True, cache=cache)
+    monkeypatch.setattr(geocoder, "_lookup_online", lookup)
+    assert geocoder.warm(["Berlin", "Atlantis", "Berlin", "US"]) == {
+        "Berlin": (52.52, 13.405),
+        "Atlantis": None,
+        "US": (37.09024, -95.712891),
+    }
+    assert calls == ["Berlin", "Atlantis"]
+
+    # A fresh worker sharing the store never goes online
+    other = Geocoder(online_fallback=True, cache=cache)
+    monkeypatch.setattr(other, "_lookup_online", lambda location: pytest.fail())
+    assert other.geocode("Berlin") == (52.52, 13.405)
+    assert other.geocode("Atlantis") is None
+
+
+def test_geocoder_does_not_cache_transient_errors(cache, monkeypatch):
+    geocoder = Geocoder(online_fallback=True, cache=cache)
+
+    def unavailable(location):
+        raise GeocoderUnavailable("timeout")
+
+    monkeypatch.setattr(geocoder, "_lookup_online", unavailable)
+    assert geocoder.geocode("Berlin") is None
+    assert cache.get("Berlin") == (False, None)
+
+    monkeypatch.setattr(geocoder, "_lookup_online", lambda location: (52.52, 13.405))
+    assert geocoder.geocode("Berlin") == (52.52, 13.405)
+
+
+def test_geocoder_reads_a_warmed_cache_without_the_online_fallback(cache, monkeypatch):
+    cache.put("berlin", (52.52, 13.405))
+    geocoder = Geocoder(online_fallback=False, cache=cache)
+    monkeypatch.setattr(geocoder, "_lookup_online", lambda location: pytest.fail())
+
+    assert geocoder.geocode("  BERLIN ") == (52.52, 13.405)
+    assert geocoder.geocode("Atlantis") is None
+    assert geocoder.stats.cache_hits == 1
+    assert geocoder.prefetch(["Berlin", "Atlantis", "US"]) == 1
+
+
+def test_geocoder_normalizes_keys(cache, monkeypatch):
+    calls = []
+
+    def lookup(location):
+        calls.append(location)
+        return (52.52, 13.405)
+
+    geocoder = Geocoder(online_fallback=True, cache=cache)
+    monkeypatch.setattr(geocoder, "_lookup_online", lookup)
+    assert geocoder.geocode("Berlin") == geocoder.geocode(" berlin  ") == (52.52, 13.405)
+    assert calls == ["Berlin"]
+    assert cache.get("berlin") == (True, (52.52, 13.405))
+
+
+def test_geocoder_memo_is_bounded(monkeypatch):
+    calls = []
+
+    def lookup(location):
+        calls.append(location)
+        return (0.0, 0.0)
+
+    geocoder = Geocoder(online_fallback=True, memo_size=2)
+    monkeypatch.setattr(geocoder, "_lookup_online", lookup)
+    for location in ["a", "b", "a", "c", "a", "b"]:
+        geocoder.geocode(location)
+    assert len(geocoder._memo) == 2
+    # "b" was the least recently used when "c" came in
+    assert calls == ["a", "b", "c", "b"]
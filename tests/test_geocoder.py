@@ -0,0 +1,115 @@
+import threading
+import time
+
+import pytest
+
+from filters.location_filter import LocationFilter
+from geo.geocoder import Geocoder, GeocoderUnavailable, shared_geocoder
+from models.policy import ConsumerPolicy
+from models.provider import Provider
+from pairing_system.system import PairingSystem
+from scoring.location_score import LocationScore
+
+PLACES = {"Springfield": (39.8, -89.6), "Shelbyville": (39.4, -88.8)}
+
+
+@pytest.fixture
+def lookups(monkeypatch):
+    # Offline stand-in for Nominatim, slow enough for lookups to overlap
+    calls = []
+
+    def lookup_online(self, location):
+        calls.append(location)
+        time.sleep(0.05)
+        if location == "Broken":
+            raise GeocoderUnavailable("timeout")
+        return PLACES.get(location)
+
+    monkeypatch.setattr(Geocoder, "_lookup_online", lookup_online)
+    return calls
+
+
+def test_one_shared_geocoder():
+    assert LocationFilter._geocoder is LocationScore._geocoder is shared_geocoder()
+
+
+def test_concurrent_lookups_are_single_flight(lookups):
+    geocoder = Geocoder(online_fallback=True)
+    barrier = threading.Barrier(8)
+    results = []
+
+    def worker():
+        barrier.wait()
+        results.append(geocoder.geocode("Springfield"))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == [PLACES["Springfield"]] * 8
+    assert lookups == ["Springfield"]
+    assert geocoder.stats.coalesced + geocoder.stats.memo_hits == 7
+
+
+def test_failed_lookups_are_not_cached(lookups):
+    geocoder = Geocoder(online_fallback=True)
+    assert geocoder.geocode("Broken") is None
+    assert geocoder.geocode("Broken") is None
+    assert lookups == ["Broken", "Broken"]
+
+
+def test_prefetch(lookups):
+    geocoder = Geocoder(online_fallback=True)
+    locations = ["US", "Springfield", "Shelbyville", "Springfield", "Germany"]
+    assert geocoder.prefetch(locations) == 2
+    assert geocoder.prefetch(locations) == 0
+    assert sorted(lookups) == ["Shelbyville", "Springfield"]
+    assert Geocoder().prefetch(["Springfield"]) == 0
+
+
+def test_one_lookup_per_location_per_process(lookups):
+    geocoder = Geocoder(online_fallback=True)
+    providers = [
+        Provider("A", 100, "Springfield", ["f1"]),
+        Provider("B", 50, "Shelbyville", ["f1"]),
+        Provider("C", 70, "Springfield", ["f1"]),
+        Provider("D", 90, "US", ["f1"]),
+    ]
+    system = PairingSystem(strict=False, max_distance_km=500, geocoder=geocoder)
+    for min_stake in (0, 60, 80):
+        system.get_pairing_list(providers, ConsumerPolicy("Springfield", [], min_stake))
+    assert sorted(lookups) == ["Shelbyville", "Springfield"]
+
+
+@pytest.mark.parametrize("strict", [True, False])
+def test_queries_prefetch_only_the_locations_they_resolve(lookups, strict):
+    geocoder = Geocoder(online_fallback=True)
+    prefetched = []
+    prefetch = geocoder.prefetch
+
+    def recording_prefetch(locations):
+        prefetched.append(list(locations))
+        return prefetch(locations)
+
+    geocoder.prefetch = recording_prefetch
+    providers = [
+        Provider("A", 100, "Springfield", ["f1"]),
+        Provider("B", 50, "Shelbyville", ["f1"]),
+    ]
+    system = PairingSystem(strict=strict, geocoder=geocoder)
+    policy = ConsumerPolicy("Springfield", ["f1"], 0)
+    system.filter_providers(providers, policy)
+    system.filter_providers(providers, policy)
+
+    if strict:
+        assert prefetched == [["Springfield"], ["Springfield"]]
+        assert lookups == ["Springfield"]
+    else:
+        # Provider locations are prefetched until the distance table has them
+        assert prefetched == [
+            ["Springfield", "Springfield", "Shelbyville"],
+            ["Springfield"],
+        ]
+        assert sorted(lookups) == ["Shelbyville", "Springfield"]
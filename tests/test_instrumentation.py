@@ -0,0 +1,135 @@
+import pytest
+
+from geo.geocoder import Geocoder
+from instrumentation.metrics import Instrumentation, geocoder_collector
+from instrumentation.tracing import NULL_TRACE, QueryTrace
+from models.policy import ConsumerPolicy
+from models.provider import Provider
+from pairing_system.system import PairingSystem
+
+
+@pytest.fixture
+def providers():
+    return [
+        Provider("A", 100, "US", ["f1", "f2"]),
+        Provider("B", 50, "US", ["f1"]),
+        Provider("C", 200, "DE", ["f1", "f2", "f3"]),
+        Provider("D", 80, "US", ["f1", "f3"]),
+        Provider("E", 120, "US", ["f1"]),
+    ]
+
+
+@pytest.fixture
+def policy():
+    return ConsumerPolicy(
+        required_location="US", required_features=["f1"], min_stake=60
+    )
+
+
+def test_pairing_list_trace(providers, policy):
+    system = PairingSystem(
+        instrumentation=Instrumentation(), backend="serial", cache_lists=True
+    )
+    results = system.get_pairing_list(providers, policy, k=2)
+    trace = system.last_trace
+
+    assert trace.name == "get_pairing_list"
+    assert trace.attributes == {"k": 2, "result_cache": "miss"}
+    stages = [span.stage for span in trace.spans]
+    assert stages[:2] == ["prefetch", "plan"]
+    assert stages[-4:] == [
+        "materialize",
+        "score.location",
+        "score.stake_feature",
+        "select",
+    ]
+    filters = [span for span in trace.spans if span.stage.startswith("filter.")]
+    assert {span.stage for span in filters} == {
+        "filter.location",
+        "filter.feature",
+        "filter.stake",
+    }
+    assert filters[0].candidates_in is None
+    for before, after in zip(filters, filters[1:]):
+        assert after.candidates_in == before.candidates_out
+    assert filters[-1].candidates_out == 3
+
+    scoring = trace.spans[-2]
+    assert scoring.candidates_in == 3
+    assert scoring.attributes == {"backend": "serial", "chunks": 1}
+    assert trace.seconds >= sum(span.seconds for span in trace.spans) > 0
+
+    # A repeat is answered by the result cache without running any stage
+    assert system.get_pairing_list(providers, policy, k=2) == results
+    assert system.last_trace.attributes["result_cache"] == "hit"
+    assert system.last_trace.spans == []
+
+
+def test_nested_calls_share_one_trace(providers, policy):
+    instrumentation = Instrumentation()
+    system = PairingSystem(instrumentation=instrumentation)
+    system.get_pairing_page(providers, policy, k=2)
+    assert [t["query"] for t in instrumentation.recent_traces()] == ["get_pairing_page"]
+    system.rank_providers(providers, policy)
+    assert system.last_trace.name == "rank_providers"
+    assert system._trace is NULL_TRACE
+
+
+def test_sinks_receive_finished_traces(providers, policy):
+    received = []
+    system = PairingSystem(instrumentation=Instrumentation(sinks=[received.append]))
+    system.filter_providers(providers, policy)
+    assert len(received) == 1 and isinstance(received[0], QueryTrace)
+    assert received[0].to_dict()["spans"][-1]["stage"] == "materialize"
+
+
+def test_prometheus_export(providers, policy):
+    instrumentation = Instrumentation(buckets=(0.5, 0.001))
+    system = PairingSystem(instrumentation=instrumentation, cache_lists=True)
+    system.get_pairing_list(providers, policy)
+    system.get_pairing_list(providers, policy)
+    text = instrumentation.to_prometheus()
+
+    assert "# TYPE pairing_stage_seconds histogram" in text
+    assert 'pairing_stage_seconds_bucket{stage="plan",le="0.001"}' in text
+    assert 'pairing_stage_seconds_bucket{stage="plan",le="+Inf"} 1' in text
+    assert 'pairing_query_seconds_count{query="get_pairing_list"} 2' in text
+    assert 'pairing_queries_total{query="get_pairing_list"} 2' in text
+    assert 'pairing_stage_candidates_in_total{stage="select"} 3' in text
+    assert 'pairing_scoring_chunks_total{backend="serial"} 1' in text
+    assert "pairing_result_cache_hits_total 1" in text
+    assert "# TYPE pairing_result_cache_entries gauge" in text
+    assert 'pairing_geocoder_gazetteer_hits_total{geocoder="shared"}' in text
+
+
+def test_geocoder_stats():
+    geocoder = Geocoder(online_fallback=False)
+    assert geocoder.geocode("US") is not None
+    assert geocoder.geocode("Atlantis") is None
+    assert geocoder.stats.gazetteer_hits == 1
+    assert geocoder.stats.online_lookups == 0
+
+    samples = {s.name: s for s in geocoder_collector("test", geocoder)()}
+    assert samples["pairing_geocoder_gazetteer_hits_total"].value == 1
+    assert samples["pairing_geocoder_gazetteer_hits_total"].labels == (
+        ("geocoder", "test"),
+    )
+
+
+def test_disabled_by_default(providers, policy):
+    system = PairingSystem()
+    system.get_pairing_list(providers, policy)
+    assert system.last_trace is None
+    assert system._trace is NULL_TRACE
+    with NULL_TRACE.span("stage", 3) as span:
+        span.candidates_out = 1
+    assert NULL_TRACE.attributes == {}
+
+
+def test_batch_trace(providers, policy):
+    system = PairingSystem(instrumentation=Instrumentation(), backend="serial")
+    system.get_pairing_lists(providers, [policy, policy, ConsumerPolicy("DE")])
+    trace = system.last_trace
+    assert [span.stage for span in trace.spans] == ["plan", "distance_matrix", "pair"]
+    assert trace.spans[-1].candidates_in == 2
+    assert trace.spans[-1].attributes == {"backend": "serial", "workers": 1}
@@ -5,6 +5,12 @@ from models.policy import ConsumerPolicy
 from models.provider import Provider
 
 
+@pytest.fixture
+def online_geocoding(monkeypatch):
+    # City names are not in the offline gazetteer; opt in to Nominatim
+    monkeypatch.setattr(LocationFilter._geocoder, "online_fallback", True)
+
+
 @pytest.fixture
 def providers():
     return [
@@ -21,7 +27,7 @@ def providers():
         (False, ["A", "B"]),  # close geographic match
     ],
 )
-def test_location_filter_modes(providers, strict, expected):
+def test_location_filter_modes(online_geocoding, providers, strict, expected):
     policy = ConsumerPolicy(
         required_location="New York", required_features=["f1"], min_stake=10
     )
@@ -35,3 +41,15 @@ def test_location_filter_no_matches():
     providers = [Provider("A", 100, "London", ["f1"])]
     filtered = LocationFilter().filter(providers, policy, strict=True)
     assert filtered == []
+
+
+def test_location_filter_flexible_offline_country_codes():
+    policy = ConsumerPolicy("DE", ["f1"], 10)
+    providers = [
+        Provider("A", 100, "FR", ["f1"]),
+        Provider("B", 100, "AUT", ["f1"]),
+        Provider("C", 100, "JP", ["f1"]),
+        Provider("D", 100, "Atlantis", ["f1"]),
+    ]
+    filtered = LocationFilter().filter(providers, policy, strict=False)
+    assert sorted(p.address for p in filtered) == ["A", "B"]
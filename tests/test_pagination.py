@@ -0,0 +1,124 @@
+import pytest
+
+from models.policy import ConsumerPolicy
+from models.provider import Provider
+from pairing_system.system import PairingSystem
+
+
+@pytest.fixture
+def providers():
+    # Stakes repeat, so several providers tie on score
+    return [
+        Provider(f"P{i:02d}", 50 + (i % 4) * 10, "US", ["f1", "f2"][: 1 + i % 2])
+        for i in range(23)
+    ]
+
+
+@pytest.fixture
+def policy():
+    return ConsumerPolicy("US", ["f1"], 0)
+
+
+def addresses(pairing_scores):
+    return [ps.provider.address for ps in pairing_scores]
+
+
+def test_rank_providers_breaks_ties_by_address(providers, policy):
+    ranked = PairingSystem().rank_providers(providers, policy)
+    keys = [(-ps.score, ps.provider.address) for ps in ranked]
+    assert keys == sorted(keys)
+
+
+@pytest.mark.parametrize("k", [1, 5, 20, 100])
+def test_get_pairing_list_top_k(providers, policy, k):
+    system = PairingSystem()
+    expected = addresses(system.rank_providers(providers, policy))[:k]
+    assert addresses(system.get_pairing_list(providers, policy, k=k)) == expected
+
+
+@pytest.mark.parametrize("k", [0, -3])
+def test_invalid_k(providers, policy, k):
+    with pytest.raises(ValueError, match="k must be a positive integer"):
+        PairingSystem().get_pairing_list(providers, policy, k=k)
+
+
+@pytest.mark.parametrize("evict", [False, True])
+def test_pages_cover_full_ranking(providers, policy, evict):
+    system = PairingSystem()
+    expected = addresses(system.rank_providers(providers, policy))
+
+    pages, cursor = [], None
+    while True:
+        if evict:
+            # Session lost (e.g. LRU eviction): the cursor alone must suffice
+            system._sessions = type(system._sessions)()
+        page = system.get_pairing_page(providers, policy, k=5, cursor=cursor)
+        pages.append(addresses(page.results))
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+
+    assert [len(p) for p in pages] == [5, 5, 5, 5, 3]
+    assert sum(pages, []) == expected
+    assert len(system._sessions) == 0
+
+
+def test_empty_result_page(providers):
+    page = PairingSystem().get_pairing_page(providers, ConsumerPolicy("JP", [], 0))
+    assert page.results == [] and page.next_cursor is None
+
+
+def test_cursor_from_another_query_is_rejected(providers, policy):
+    system = PairingSystem()
+    cursor = system.get_pairing_page(providers, policy, k=5).next_cursor
+    with pytest.raises(ValueError, match="does not match this query"):
+        system.get_pairing_page(providers, ConsumerPolicy("US", ["f2"], 0), cursor=cursor)
+
+
+@pytest.mark.parametrize("cursor", ["not-base64!", "W10=", ""])
+def test_malformed_cursor(providers, policy, cursor):
+    with pytest.raises(ValueError, match="Invalid pagination cursor"):
+        PairingSystem().get_pairing_page(providers, policy, cursor=cursor)
+
+
+def test_evicted_session_keeps_duplicate_addresses(policy):
+    providers = [Provider("dup", 50, "US", ["f1"]) for _ in range(4)]
+    system = PairingSystem()
+    pages, cursor = [], None
+    while True:
+        system._sessions = type(system._sessions)()
+        page = system.get_pairing_page(providers, policy, k=1, cursor=cursor)
+        pages += [id(ps.provider) for ps in page.results]
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+    assert sorted(pages) == sorted(id(p) for p in providers)
+
+
+def test_cursor_is_rejected_after_the_list_changes(providers, policy):
+    system = PairingSystem()
+    cursor = system.get_pairing_page(providers, policy, k=5).next_cursor
+    providers[0] = Provider("P00", 999, "US", ["f1"])
+    with pytest.raises(ValueError, match="does not match this query"):
+        system.get_pairing_page(providers, policy, cursor=cursor)
+
+
+def test_cursor_matches_an_equal_copy_of_the_list(providers, policy):
+    system = PairingSystem()
+    cursor = system.get_pairing_page(providers, policy, k=5).next_cursor
+    page = system.get_pairing_page(list(providers), policy, k=5, cursor=cursor)
+    assert len(page.results) == 5
+
+
+def test_replayed_cursor_returns_the_same_page(providers, policy):
+    system = PairingSystem()
+    first = system.get_pairing_page(providers, policy, k=3)
+    second = system.get_pairing_page(providers, policy, k=3, cursor=first.next_cursor)
+    replayed = system.get_pairing_page(providers, policy, k=3, cursor=first.next_cursor)
+    assert addresses(replayed.results) == addresses(second.results)
+    # Both cursors stay usable
+    third = system.get_pairing_page(providers, policy, k=3, cursor=second.next_cursor)
+    again = system.get_pairing_page(providers, policy, k=3, cursor=replayed.next_cursor)
+    assert addresses(third.results) == addresses(again.results)
+    expected = addresses(system.rank_providers(providers, policy))
+    assert addresses(third.results) == expected[6:9]
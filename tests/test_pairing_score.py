@@ -1,3 +1,5 @@
+import json
+
 import pytest
 
 from models.pairing_score import PairingScore
@@ -47,3 +49,35 @@ def test_component_value_out_of_range(sample_provider):
         ValueError, match="Component score 'feature' must be between 0.0 and 1.0"
     ):
         PairingScore(provider=sample_provider, score=0.9, components={"feature": 1.5})
+
+
+def test_unchecked_components_mapping(sample_provider):
+    ps = PairingScore.unchecked(sample_provider, 0.5, (0.25, 0.5, 0.75))
+    assert ps.score == 0.5
+    assert ps.components["feature_score"] == 0.5
+    assert list(ps.components) == ["stake_score", "feature_score", "location_score"]
+    assert dict(ps.components) == {
+        "stake_score": 0.25,
+        "feature_score": 0.5,
+        "location_score": 0.75,
+    }
+    with pytest.raises(KeyError):
+        ps.components["stake"]
+
+
+def test_unchecked_equals_validated(sample_provider):
+    unchecked = PairingScore.unchecked(sample_provider, 0.5, (0.25, 0.5, 0.75))
+    validated = PairingScore(
+        provider=sample_provider,
+        score=0.5,
+        components={"stake_score": 0.25, "feature_score": 0.5, "location_score": 0.75},
+    )
+    assert unchecked == validated and validated == unchecked
+    assert repr(unchecked) == repr(validated)
+    assert unchecked != PairingScore.unchecked(sample_provider, 0.5, (0.25, 0.5, 0.7))
+
+
+def test_unchecked_components_are_json_serializable(sample_provider):
+    ps = PairingScore.unchecked(sample_provider, 0.5, (0.25, 0.5, 0.75))
+    assert isinstance(ps.components, dict)
+    assert json.loads(json.dumps(ps.components)) == dict(ps.components)
@@ -34,3 +34,10 @@ def test_invalid_min_stake(min_stake):
         ConsumerPolicy(
             required_location="US", required_features=["f1"], min_stake=min_stake
         )
+
+
+def test_canonical_form_ignores_feature_order_and_duplicates():
+    a = ConsumerPolicy(required_location="US", required_features=["f2", "f1"], min_stake=5)
+    b = ConsumerPolicy(required_location="US", required_features=["f1", "f2", "f1"], min_stake=5)
+    assert a.canonical() == b.canonical() == ("US", ("f1", "f2"), 5)
+    assert hash(a.canonical()) == hash(b.canonical())
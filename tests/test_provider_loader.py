@@ -0,0 +1,150 @@
+import json
+
+import numpy as np
+import pytest
+
+from loaders.provider_loader import (
+    ProviderLoadError,
+    detect_format,
+    iter_providers,
+    load_providers,
+    read_columnar,
+    write_columnar,
+)
+from models.provider import Provider
+from models.provider_table import ProviderTable
+
+
+@pytest.fixture
+def providers():
+    return [
+        Provider("A", 100, "US", ["f1", "f2"]),
+        Provider("B", 50, "UK", []),
+        Provider("C", 200, "DE", ["f1", "f2", "f3"]),
+    ]
+
+
+def write_jsonl(path, records):
+    path.write_text("\n".join(json.dumps(r) for r in records) + "\n")
+
+
+def write_csv(path, rows):
+    path.write_text("\n".join(["address,stake,location,features"] + rows) + "\n")
+
+
+def as_records(providers):
+    return [
+        {"address": p.address, "stake": p.stake, "location": p.location, "features": p.features}
+        for p in providers
+    ]
+
+
+@pytest.mark.parametrize("trusted", [False, True])
+def test_jsonl_round_trip(tmp_path, providers, trusted):
+    path = tmp_path / "providers.jsonl"
+    write_jsonl(path, as_records(providers))
+    assert load_providers(str(path), trusted=trusted) == providers
+    chunks = list(iter_providers(str(path), chunk_size=2, trusted=trusted))
+    assert [len(c) for c in chunks] == [2, 1]
+
+
+@pytest.mark.parametrize("trusted", [False, True])
+def test_csv_round_trip(tmp_path, providers, trusted):
+    path = tmp_path / "providers.csv"
+    write_csv(path, ["A,100,US,f1|f2", "B,50,UK,", "C,200,DE,f1|f2|f3"])
+    assert load_providers(str(path), trusted=trusted) == providers
+
+
+def test_columnar_round_trip(tmp_path, providers):
+    path = tmp_path / "providers.npz"
+    write_columnar(providers, str(path))
+    table = load_providers(str(path))
+    assert isinstance(table, ProviderTable)
+    assert table.to_providers() == providers
+    assert [p for chunk in iter_providers(str(path), chunk_size=2) for p in chunk] == providers
+
+
+@pytest.mark.parametrize("trusted", [False, True])
+def test_bad_rows_are_reported_together(tmp_path, trusted):
+    path = tmp_path / "providers.csv"
+    write_csv(path, ["A,100,US,f1", "B,-5,US,f1", "C,abc,US,", ",10,US,", "D,10,DE,"])
+    with pytest.raises(ProviderLoadError) as info:
+        load_providers(str(path), trusted=trusted)
+    assert [line for line, _ in info.value.errors] == [3, 4, 5]
+    assert "3 invalid provider rows" in str(info.value)
+
+    errors = []
+    loaded = load_providers(str(path), trusted=trusted, errors=errors)
+    assert [p.address for p in loaded] == ["A", "D"]
+    assert len(errors) == 3
+
+
+def test_jsonl_bad_records(tmp_path):
+    path = tmp_path / "providers.jsonl"
+    path.write_text('{"address": "A", "stake": 1, "location": "US"}\n{not json}\n{"address": "B"}\n')
+    errors = []
+    assert [p.address for p in load_providers(str(path), errors=errors)] == ["A"]
+    assert [line for line, _ in errors] == [2, 3]
+    assert "Missing field" in errors[1][1]
+
+
+def test_columnar_validation(tmp_path, providers):
+    table = ProviderTable.from_providers(providers)
+    table.stakes = np.array([100, -1, 200])
+    path = tmp_path / "bad.npz"
+    write_columnar(table, str(path))
+    with pytest.raises(ProviderLoadError, match="line 2"):
+        read_columnar(str(path))
+
+
+def test_detect_format():
+    assert detect_format("a/b.JSONL") == "jsonl"
+    assert detect_format("b.ndjson") == "jsonl"
+    assert detect_format("b.npz") == "columnar"
+    with pytest.raises(ProviderLoadError, match="Cannot detect"):
+        detect_format("providers.txt")
+
+
+def test_csv_without_required_columns(tmp_path):
+    path = tmp_path / "providers.csv"
+    path.write_text("address,location\nA,US\n")
+    with pytest.raises(ProviderLoadError, match=r"missing columns \['stake'\]"):
+        load_providers(str(path))
+
+
+def test_trusted_load_reports_wrong_field_types(tmp_path):
+    path = tmp_path / "providers.jsonl"
+    path.write_text(
+        '{"address": "A", "stake": 1, "location": "US"}\n'
+        '{"address": "B", "stake": "5", "location": "US"}\n'
+        '{"address": 7, "stake": 5, "location": "US"}\n'
+    )
+    errors = []
+    loaded = load_providers(str(path), trusted=True, errors=errors)
+    assert [p.address for p in loaded] == ["A"]
+    assert [line for line, _ in errors] == [2, 3]
+
+
+def test_bulk_unchecked_matches_constructor(providers):
+    built = Provider.bulk_unchecked(
+        (p.address, p.stake, p.location, p.features) for p in providers
+    )
+    assert built == providers
+
+
+def test_trusted_and_validated_loads_agree(tmp_path):
+    path = tmp_path / "providers.jsonl"
+    path.write_text(
+        '{"address": "A", "stake": 1, "location": "US"}\n'
+        '{"address": "B", "stake": 1.5, "location": "US"}\n'
+        '{"address": "C", "stake": true, "location": "US"}\n'
+        '{"address": "D", "stake": -1, "location": "US"}\n'
+        '{"address": "E", "stake": 2, "location": "DE"}\n'
+    )
+    trusted_errors, validated_errors = [], []
+    trusted = load_providers(str(path), trusted=True, errors=trusted_errors)
+    validated = load_providers(str(path), errors=validated_errors)
+    assert trusted == validated
+    assert [p.address for p in trusted] == ["A", "B", "C", "E"]
+    assert trusted_errors == validated_errors
+    assert [line for line, _ in trusted_errors] == [4]
@@ -0,0 +1,127 @@
+import pytest
+
+from geo.geocoder import Geocoder
+from indexes.postings import IncrementalPostings
+from indexes.stake_index import IncrementalStakeIndex
+from models.policy import ConsumerPolicy
+from models.provider import Provider
+from pairing_system.registry import ProviderRegistry
+from pairing_system.system import PairingSystem
+
+
+@pytest.fixture
+def providers():
+    return [
+        Provider("A", 100, "US", ["f1", "f2"]),
+        Provider("B", 50, "US", ["f1"]),
+        Provider("C", 200, "DE", ["f1", "f2", "f3"]),
+        Provider("D", 80, "US", ["f1", "f3"]),
+        Provider("E", 120, "FR", ["f1"]),
+    ]
+
+
+@pytest.fixture
+def policy():
+    return ConsumerPolicy(required_location="US", required_features=["f1"], min_stake=60)
+
+
+def test_registry_basics(providers):
+    registry = ProviderRegistry(providers)
+    assert len(registry) == 5
+    assert "C" in registry and "Z" not in registry
+    assert list(registry) == providers
+    assert registry.get("D") == providers[3]
+    assert registry.snapshot() is registry.snapshot()
+
+    with pytest.raises(ValueError, match="already registered"):
+        registry.add(Provider("A", 1, "US", []))
+    with pytest.raises(KeyError):
+        registry.remove("Z")
+    with pytest.raises(KeyError):
+        registry.update_stake("Z", 10)
+
+
+def test_maxima_follow_changes(providers):
+    registry = ProviderRegistry(providers)
+    assert (registry.max_stake, registry.max_features) == (200, 3)
+
+    registry.remove("C")
+    assert (registry.max_stake, registry.max_features) == (120, 2)
+
+    registry.update_stake("B", 500)
+    registry.update_features("E", ["f1", "f2", "f3", "f4"])
+    assert (registry.max_stake, registry.max_features) == (500, 4)
+
+    registry.update_stake("B", 10)
+    assert registry.max_stake == 120
+    assert registry.get("B").stake == 10
+
+    for provider in list(registry):
+        registry.remove(provider.address)
+    assert (registry.max_stake, registry.max_features) == (1, 1)
+
+
+def test_version_invalidates_snapshot(providers):
+    registry = ProviderRegistry(providers)
+    first = registry.snapshot()
+    version = registry.version
+    registry.update_stake("A", 1)
+    assert registry.version > version
+    assert registry.snapshot() is not first
+    assert registry.snapshot()[0].stake == 1
+
+
+def test_incremental_postings():
+    postings = IncrementalPostings()
+    postings.add(3, ["x", "y"])
+    postings.add(1, ["x"])
+    assert postings.postings("x").tolist() == [1, 3]
+    assert postings.count("y") == 1
+    postings.remove(3, ["x", "y"])
+    assert postings.postings("x").tolist() == [1]
+    assert "y" not in postings
+    assert postings.all_ids().tolist() == [1]
+
+
+def test_incremental_stake_index():
+    stakes = IncrementalStakeIndex()
+    for i, stake in enumerate([100, 50, 200, 80]):
+        stakes.add(i, stake)
+    assert stakes.count_at_least(80) == 3
+    assert stakes.ids_at_least(80).tolist() == [0, 2, 3]
+    stakes.remove(2, 200)
+    assert stakes.max_stake == 100
+    assert stakes.ids_at_least(60).tolist() == [0, 3]
+
+
+@pytest.mark.parametrize("strict", [True, False])
+def test_queries_match_plain_list(providers, policy, strict):
+    registry = ProviderRegistry(providers)
+    registry.add(Provider("F", 90, "CA", ["f1"]))
+    registry.remove("A")
+    registry.update_stake("D", 300)
+    system = PairingSystem(strict=strict, geocoder=Geocoder(), distance_model="haversine")
+
+    expected = system.get_pairing_list(registry.snapshot(), policy)
+    assert system.get_pairing_list(registry, policy) == expected
+    assert system.filter_providers(registry, policy) == system.filter_providers(
+        registry.snapshot(), policy
+    )
+    assert system.get_pairing_lists(registry, [policy]) == [expected]
+    assert system.get_pairing_page(registry, policy, k=2).results == expected[:2]
+
+
+def test_provider_set_normalization(providers, policy):
+    registry = ProviderRegistry(providers)
+    system = PairingSystem(normalization="provider_set")
+    results = system.get_pairing_list(registry, policy)
+    # A has the highest stake among candidates but C (not a candidate) sets the max
+    top = results[0]
+    assert top.provider.address == "A"
+    assert top.components["stake_score"] == pytest.approx(100 / 200, abs=1e-4)
+    assert top.components["feature_score"] == pytest.approx(2 / 3, abs=1e-4)
+    assert system.get_pairing_list(providers, policy) == results
+    assert system.get_pairing_lists(registry, [policy]) == [results]
+
+    with pytest.raises(ValueError, match="Unknown normalization"):
+        PairingSystem(normalization="global")
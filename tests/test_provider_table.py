@@ -0,0 +1,99 @@
+import numpy as np
+import pytest
+
+from geo.geocoder import Geocoder
+from indexes.postings import PostingsIndex
+from models.policy import ConsumerPolicy
+from models.provider import Provider
+from models.provider_table import ProviderTable
+from pairing_system.system import PairingSystem
+
+
+@pytest.fixture
+def providers():
+    return [
+        Provider("A", 100, "US", ["f1", "f2"]),
+        Provider("B", 50, "US", ["f1"]),
+        Provider("C", 200, "DE", ["f1", "f2", "f3"]),
+        Provider("D", 80, "US", ["f1", "f3"]),
+        Provider("E", 120, "Atlantis", []),
+    ]
+
+
+def test_round_trip(providers):
+    table = ProviderTable.from_providers(providers)
+    assert len(table) == 5
+    assert table.to_providers() == providers
+    assert list(table) == providers
+    assert table.provider(2) == providers[2]
+    assert table.take([3, 0, 3]) == [providers[3], providers[0], providers[3]]
+    assert table.take([]) == []
+
+
+def test_columns_are_interned(providers):
+    table = ProviderTable.from_providers(providers)
+    assert table.locations == ["US", "DE", "Atlantis"]
+    assert table.location_ids.tolist() == [0, 0, 1, 0, 2]
+    assert table.features == ["f1", "f2", "f3"]
+    assert table.feature_offsets.tolist() == [0, 2, 3, 6, 8, 8]
+    assert table.feature_counts.tolist() == [2, 1, 3, 2, 0]
+    assert table.stakes.tolist() == [100, 50, 200, 80, 120]
+
+
+def test_resolve_coordinates(providers):
+    table = ProviderTable.from_providers(providers)
+    coords = table.resolve(Geocoder())
+    assert coords.shape == (5, 2)
+    assert (coords[0] == coords[1]).all()
+    assert np.isnan(coords[4]).all()
+    assert table.nbytes() > 0
+
+
+def test_empty_table():
+    table = ProviderTable.from_providers([])
+    assert len(table) == 0 and table.to_providers() == []
+
+
+def test_mismatched_columns():
+    with pytest.raises(ValueError, match="same length"):
+        ProviderTable(["A"], np.array([1, 2]), ["US"], np.array([0]), [], [0, 0], [])
+    with pytest.raises(ValueError, match="feature_offsets"):
+        ProviderTable(["A"], np.array([1]), ["US"], np.array([0]), [], [0], [])
+
+
+def test_unvalidated_rows_are_checked_when_materialized():
+    table = ProviderTable(
+        ["A", "B"], np.array([1, -5]), ["US"], np.array([0, 0]), [], [0, 0, 0], []
+    )
+    assert not table.validated
+    assert table.provider(0) == Provider("A", 1, "US", [])
+    with pytest.raises(ValueError, match="Stake"):
+        table.provider(1)
+    assert table.errors() == [(2, "Stake must be a non-negative integer")]
+    assert not table.validated
+
+    table.stakes[1] = 5
+    assert table.errors() == [] and table.validated
+    assert table.subset([1]).validated
+
+
+def test_postings_from_pairs_deduplicates():
+    index = PostingsIndex.from_pairs(
+        np.array([0, 0, 1, 2, 2]), np.array([1, 1, 0, 1, 0]), ["x", "y"], 3
+    )
+    assert index.postings("x").tolist() == [1, 2]
+    assert index.postings("y").tolist() == [0, 2]
+    assert len(index) == 3
+
+
+@pytest.mark.parametrize("strict", [True, False])
+def test_pairing_system_accepts_table(providers, strict):
+    policy = ConsumerPolicy("US", ["f1"], 60)
+    table = ProviderTable.from_providers(providers)
+    system = PairingSystem(strict=strict)
+    assert system.filter_providers(table, policy) == system.filter_providers(
+        providers, policy
+    )
+    assert system.get_pairing_list(table, policy) == system.get_pairing_list(
+        providers, policy
+    )
@@ -0,0 +1,102 @@
+import random
+
+import pytest
+
+from filters.feature_filter import FeatureFilter
+from filters.location_filter import LocationFilter
+from filters.stake_filter import StakeFilter
+from indexes.stake_index import StakeIndex
+from models.policy import ConsumerPolicy
+from models.provider import Provider
+from pairing_system.system import PairingSystem
+
+
+@pytest.fixture(scope="module")
+def providers():
+    rng = random.Random(11)
+    locations = ["US", "CA", "DE", "FR", "JP", "PL"]
+    features = ["f1", "f2", "f3", "rare"]
+    return [
+        Provider(
+            f"P{i}",
+            rng.randint(0, 1000),
+            rng.choice(locations),
+            [f for f in features[:3] if rng.random() < 0.6]
+            + (["rare"] if i % 97 == 0 else []),
+        )
+        for i in range(2000)
+    ]
+
+
+def naive_filter(providers, policy, strict):
+    providers = LocationFilter().filter(providers, policy, strict)
+    for Filter in [FeatureFilter, StakeFilter]:
+        providers = Filter().filter(providers, policy)
+    return providers
+
+
+def test_stake_index_bisect():
+    index = StakeIndex.from_providers(
+        [Provider(str(i), stake, "US") for i, stake in enumerate([50, 10, 30, 50])]
+    )
+    assert index.count_at_least(30) == 3
+    assert index.ids_at_least(30).tolist() == [0, 2, 3]
+    assert index.ids_at_least(51).tolist() == []
+    assert index.ids_at_least(30, within=index.ids_at_least(0)[:2]).tolist() == [0]
+    assert index.max_stake == 50
+
+
+@pytest.mark.parametrize("strict", [True, False])
+@pytest.mark.parametrize(
+    "location, features, min_stake",
+    [
+        ("US", ["f1"], 0),
+        ("DE", ["f1", "f2"], 500),
+        ("FR", ["rare"], 100),
+        ("JP", [], 990),
+        ("Atlantis", ["f1"], 0),
+        ("CA", ["missing"], 10),
+    ],
+)
+def test_planned_filter_matches_naive_pipeline(
+    providers, strict, location, features, min_stake
+):
+    policy = ConsumerPolicy(location, features, min_stake)
+    system = PairingSystem(strict=strict)
+    assert system.filter_providers(providers, policy) == naive_filter(
+        providers, policy, strict
+    )
+
+
+@pytest.mark.parametrize(
+    "features, min_stake, first",
+    [
+        (["f1"], 995, "stake"),  # very high stake prunes first
+        (["rare"], 10, "feature"),  # rare feature drives the query
+        (["f1"], 10, "location"),
+    ],
+)
+def test_planner_runs_most_selective_predicate_first(
+    providers, features, min_stake, first
+):
+    system = PairingSystem(strict=False)
+    policy = ConsumerPolicy("DE", features, min_stake)
+    system.filter_providers(providers, policy)
+    assert system.last_plan.order[0] == first
+    assert system.explain(providers, policy) == system.last_plan
+    assert str(system.last_plan).startswith("QueryPlan over 2000 providers")
+
+
+def test_planner_skips_predicates_that_cannot_prune(providers):
+    system = PairingSystem()
+    plan = system.explain(providers, ConsumerPolicy("US", [], 0))
+    assert plan.order == ("location",)
+
+
+@pytest.mark.parametrize("location", ["DE", "JP", "Atlantis"])
+def test_flexible_location_estimate_is_exact(providers, location):
+    system = PairingSystem(strict=False)
+    policy = ConsumerPolicy(location, [], 0)
+    step = system.explain(providers, policy).steps[0]
+    assert step.predicate == "location"
+    assert step.estimated_matches == len(system.filter_providers(providers, policy))
@@ -0,0 +1,98 @@
+import pytest
+
+from models.policy import ConsumerPolicy
+from models.provider import Provider
+from models.provider_table import ProviderTable
+from pairing_system.registry import ProviderRegistry
+from pairing_system.result_cache import ResultCache
+from pairing_system.system import PairingSystem
+
+
+@pytest.fixture
+def providers():
+    return [
+        Provider("A", 100, "US", ["f1", "f2"]),
+        Provider("B", 50, "US", ["f1"]),
+        Provider("C", 200, "DE", ["f1", "f2", "f3"]),
+        Provider("D", 80, "US", ["f1", "f3"]),
+        Provider("E", 120, "US", ["f1"]),
+    ]
+
+
+@pytest.fixture
+def policy():
+    return ConsumerPolicy(required_location="US", required_features=["f1"], min_stake=60)
+
+
+def test_repeat_queries_hit_the_cache(providers, policy):
+    system = PairingSystem(cache_lists=True)
+    first = system.get_pairing_list(providers, policy)
+    equivalent = ConsumerPolicy("US", ["f1", "f1"], 60)
+    assert system.get_pairing_list(providers, equivalent) == first
+    assert (system.result_cache.hits, system.result_cache.misses) == (1, 1)
+
+    # Callers may modify the returned list without affecting the cache
+    first.clear()
+    assert len(system.get_pairing_list(providers, policy)) == 3
+
+
+def test_settings_and_k_are_part_of_the_key(providers, policy):
+    system = PairingSystem(cache_lists=True)
+    system.get_pairing_list(providers, policy, k=1)
+    system.get_pairing_list(providers, policy, k=2)
+    system.strict_location_match = False
+    system.get_pairing_list(providers, policy, k=2)
+    assert system.result_cache.hits == 0
+    assert len(system.result_cache) == 3
+
+
+def test_provider_set_changes_invalidate(providers, policy):
+    system = PairingSystem(cache_lists=True)
+    registry = ProviderRegistry(providers)
+    before = system.get_pairing_list(registry, policy)
+    registry.update_stake("E", 1000)
+    after = system.get_pairing_list(registry, policy)
+    assert system.result_cache.hits == 0
+    assert after[0].provider.address == "E" != before[0].provider.address
+
+    other = list(providers)
+    system.get_pairing_list(other, policy)
+    other.append(Provider("F", 900, "US", ["f1"]))
+    assert system.get_pairing_list(other, policy)[0].provider.address == "F"
+    # Replaced in place, same length
+    other[-1] = Provider("F", 900, "DE", ["f1"])
+    assert system.get_pairing_list(other, policy)[0].provider.address == "A"
+    assert system.result_cache.hits == 0
+
+
+def test_lists_are_not_cached_by_default(providers, policy):
+    system = PairingSystem()
+    system.get_pairing_list(providers, policy)
+    system.get_pairing_list(providers, policy)
+    assert len(system.result_cache) == 0 and system.result_cache.misses == 0
+
+    table = ProviderTable.from_providers(providers)
+    system.get_pairing_list(table, policy)
+    system.get_pairing_list(table, policy)
+    assert system.result_cache.hits == 1
+
+
+def test_lru_eviction():
+    cache = ResultCache(maxsize=2)
+    cache.bind("providers", 1)
+    cache.put("a", ())
+    cache.put("b", ())
+    assert cache.get("a") == ()
+    cache.put("c", ())
+    assert cache.get("b") is None
+    assert len(cache) == 2
+    assert cache.hit_rate == pytest.approx(0.5)
+
+
+def test_disabled_cache(providers, policy):
+    system = PairingSystem(result_cache_size=0)
+    system.get_pairing_list(providers, policy)
+    system.get_pairing_list(providers, policy)
+    assert len(system.result_cache) == 0 and system.result_cache.hits == 0
+    with pytest.raises(ValueError):
+        ResultCache(-1)
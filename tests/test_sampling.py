@@ -0,0 +1,148 @@
+import random
+from collections import Counter
+
+import pytest
+
+from benchmarks.synthetic import StubGeocoder, generate_policies, generate_providers
+from instrumentation.metrics import Instrumentation
+from models.policy import ConsumerPolicy
+from models.provider import Provider
+from pairing_system.sampling import STAKE, AliasTable, consumer_rng
+from pairing_system.system import PairingSystem
+
+
+def providers():
+    return [
+        Provider("A", 100, "US", ["f1", "f2"]),
+        Provider("B", 50, "US", ["f1"]),
+        Provider("C", 200, "US", ["f1", "f2", "f3"]),
+        Provider("D", 0, "US", ["f1"]),
+        Provider("E", 150, "DE", ["f1"]),
+    ]
+
+
+def test_alias_table_draws_proportionally():
+    weights = [1.0, 0.0, 3.0, 6.0]
+    table = AliasTable(weights)
+    rng = random.Random(7)
+    counts = Counter(table.draw(rng) for _ in range(50_000))
+    assert counts[1] == 0
+    for i, weight in enumerate(weights):
+        assert counts[i] / 50_000 == pytest.approx(weight / 10, abs=0.01)
+
+
+def test_alias_table_validation():
+    with pytest.raises(ValueError, match="positive"):
+        AliasTable([0.0, 0.0])
+    with pytest.raises(ValueError, match="non-negative"):
+        AliasTable([1.0, -1.0])
+
+
+def test_sample_draws_distinct_indexes_without_replacement():
+    table = AliasTable([100.0, 1.0, 1.0, 0.0, 1.0])
+    rng = random.Random(3)
+    for _ in range(200):
+        drawn = table.sample(10, rng)
+        assert sorted(drawn) == [0, 1, 2, 4]
+
+    # First draw proportional to the weights, the second among the rest
+    table = AliasTable([2.0, 1.0, 1.0])
+    seconds = Counter(tuple(table.sample(2, rng)) for _ in range(40_000))
+    assert seconds[(0, 1)] / 40_000 == pytest.approx(0.5 * 0.5, abs=0.01)
+    assert seconds[(1, 0)] / 40_000 == pytest.approx(0.25 * 2 / 3, abs=0.01)
+
+
+def test_consumer_rng_is_reproducible():
+    assert consumer_rng("alice", 3).random() == consumer_rng("alice", 3).random()
+    assert consumer_rng("alice", 3).random() != consumer_rng("alice", 4).random()
+    assert consumer_rng("alice", 3).random() != consumer_rng("bob", 3).random()
+
+
+def test_sample_pairing_list_is_seeded_per_consumer_and_epoch():
+    system = PairingSystem(strict=True)
+    policy = ConsumerPolicy("US", ["f1"], 0)
+    draw = lambda consumer, epoch: [
+        r.provider.address
+        for r in system.sample_pairing_list(providers(), policy, consumer, epoch, k=2)
+    ]
+    assert draw("alice", 1) == draw("alice", 1)
+    assert len(set(draw("alice", 1))) == 2
+    assert len({tuple(draw(f"consumer{i}", 0)) for i in range(30)}) > 1
+
+
+def test_sampled_scores_match_the_ranking():
+    system = PairingSystem(strict=True)
+    policy = ConsumerPolicy("US", ["f1"], 0)
+    ranked = {
+        r.provider.address: r
+        for r in system.get_pairing_list(providers(), policy, 10)
+    }
+    sampled = system.sample_pairing_list(providers(), policy, "alice", k=10)
+    assert sorted(r.provider.address for r in sampled) == ["A", "B", "C", "D"]
+    assert all(r == ranked[r.provider.address] for r in sampled)
+
+
+def test_stake_weighting_never_draws_zero_stake():
+    system = PairingSystem(strict=True)
+    policy = ConsumerPolicy("US", ["f1"], 0)
+    for i in range(20):
+        sampled = system.sample_pairing_list(
+            providers(), policy, f"c{i}", k=5, weighting=STAKE
+        )
+        assert sorted(r.provider.address for r in sampled) == ["A", "B", "C"]
+    with pytest.raises(ValueError, match="weighting"):
+        system.sample_pairing_list(providers(), policy, "c", weighting="luck")
+    with pytest.raises(ValueError, match="k must"):
+        system.sample_pairing_list(providers(), policy, "c", k=0)
+
+
+def test_sampling_spreads_load():
+    table = generate_providers(2_000, seed=2)
+    policy = ConsumerPolicy(generate_policies(1, seed=2)[0].required_location, [], 0)
+    geocoder = StubGeocoder.for_locations(table.locations + [policy.required_location])
+    system = PairingSystem(strict=False, geocoder=geocoder)
+    top = {r.provider.address for r in system.get_pairing_list(table, policy, 5)}
+    picked = Counter(
+        r.provider.address
+        for i in range(200)
+        for r in system.sample_pairing_list(table, policy, f"consumer{i}", k=5)
+    )
+    assert len(picked) > 50
+    assert sum(picked[address] for address in top) < 200 * 5 / 2
+
+
+def test_pool_is_built_once_per_candidate_set():
+    instrumentation = Instrumentation()
+    system = PairingSystem(
+        strict=True, instrumentation=instrumentation, cache_lists=True
+    )
+    policy = ConsumerPolicy("US", ["f1"], 0)
+    provider_list = providers()
+    pools = []
+    for consumer in ("a", "b", "c"):
+        system.sample_pairing_list(provider_list, policy, consumer)
+        stages = [span.stage for span in system.last_trace.spans]
+        pools.append(system.last_trace.attributes["sampling_pool"])
+        assert stages[-1] == "sample"
+        assert ("alias_table" in stages) == (consumer == "a")
+    assert pools == ["miss", "hit", "hit"]
+
+    # A changed provider set gets a new pool
+    provider_list.append(Provider("F", 10, "US", ["f1"]))
+    system.sample_pairing_list(provider_list, policy, "a")
+    assert system.last_trace.attributes["sampling_pool"] == "miss"
+
+    # So does a provider replaced in place
+    provider_list[0] = Provider("A", 100, "DE", ["f1", "f2"])
+    drawn = system.sample_pairing_list(provider_list, policy, "a", k=10)
+    assert system.last_trace.attributes["sampling_pool"] == "miss"
+    assert "A" not in {r.provider.address for r in drawn}
+
+
+def test_pool_cache_has_its_own_bound():
+    system = PairingSystem(strict=True, sampling_pool_cache_size=1)
+    table = generate_providers(200, seed=1)
+    for location in ("US", "DE", "FR"):
+        system.sample_pairing_list(table, ConsumerPolicy(location), "a")
+    assert len(system._sampling_pools) == 1
+    assert system.result_cache.maxsize == 1024
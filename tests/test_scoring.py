@@ -7,6 +7,12 @@ from scoring.location_score import LocationScore
 from scoring.stake_score import StakeScore
 
 
+@pytest.fixture
+def online_geocoding(monkeypatch):
+    # City names are not in the offline gazetteer; opt in to Nominatim
+    monkeypatch.setattr(LocationScore._geocoder, "online_fallback", True)
+
+
 @pytest.fixture
 def provider_set():
     return [
@@ -74,7 +80,24 @@ def test_feature_score(features, required, expected):
         ("InvalidCity", "New York", (0.0, 0.0)),  # geocode fails
     ],
 )
-def test_location_score(provider_loc, policy_loc, expected_range):
+def test_location_score(online_geocoding, provider_loc, policy_loc, expected_range):
+    provider = Provider("X", 100, provider_loc, ["f1"])
+    policy = ConsumerPolicy(policy_loc, ["f1"], 10)
+    result = LocationScore.score(provider, policy)
+    low, high = expected_range
+    assert low <= result <= high
+
+
+@pytest.mark.parametrize(
+    "provider_loc, policy_loc, expected_range",
+    [
+        ("US", "USA", (1.0, 1.0)),  # alpha-2 and alpha-3 resolve to the same point
+        ("FR", "Germany", (0.5, 0.7)),  # neighbouring countries
+        ("US", "JP", (0.0, 0.0)),  # beyond max distance
+        ("Atlantis", "US", (0.0, 0.0)),  # unknown to the gazetteer, no fallback
+    ],
+)
+def test_location_score_offline(provider_loc, policy_loc, expected_range):
     provider = Provider("X", 100, provider_loc, ["f1"])
     policy = ConsumerPolicy(policy_loc, ["f1"], 10)
     result = LocationScore.score(provider, policy)
@@ -0,0 +1,152 @@
+import asyncio
+import json
+import threading
+
+import pytest
+
+from models.policy import ConsumerPolicy
+from models.provider import Provider
+from pairing_system.service import PairingService
+from pairing_system.system import PairingSystem
+
+
+def sample_providers():
+    return [
+        Provider("A", 100, "US", ["f1", "f2"]),
+        Provider("B", 50, "US", ["f1"]),
+        Provider("C", 200, "DE", ["f1", "f2", "f3"]),
+        Provider("E", 120, "US", ["f1"]),
+    ]
+
+
+@pytest.fixture
+def service():
+    service = PairingService(PairingSystem(), sample_providers)
+    yield service
+    service.close()
+
+
+async def _request(port, method, path, body=None):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    data = json.dumps(body).encode() if body is not None else b""
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nContent-Length: {len(data)}\r\n"
+        f"Connection: close\r\n\r\n".encode()
+        + data
+    )
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, payload = response.partition(b"\r\n\r\n")
+    return int(head.split()[1]), json.loads(payload)
+
+
+def test_identical_concurrent_queries_are_coalesced(service):
+    release = threading.Event()
+    calls = []
+    get_pairing_list = service.system.get_pairing_list
+
+    def slow_pairing_list(providers, policy, k):
+        calls.append(policy)
+        release.wait(5)
+        return get_pairing_list(providers, policy, k)
+
+    service.system.get_pairing_list = slow_pairing_list
+
+    async def scenario():
+        await service.reload()
+        policy = ConsumerPolicy("US", ["f1"], 60)
+        tasks = [asyncio.ensure_future(service.pair(policy, 2)) for _ in range(5)]
+        await asyncio.sleep(0.05)
+        release.set()
+        return await asyncio.gather(*tasks)
+
+    results = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert (service.computed, service.coalesced) == (1, 4)
+    assert all(r == results[0] for r in results)
+    assert [r.provider.address for r in results[0]] == ["A", "E"]
+
+
+def test_http_endpoints(service):
+    async def scenario():
+        server = await service.start("127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            responses = [
+                await _request(port, "GET", "/health"),
+                await _request(
+                    port, "POST", "/pair", {"location": "US", "features": ["f1"], "k": 1}
+                ),
+                await _request(port, "POST", "/pair", {"features": ["f1"]}),
+                await _request(port, "POST", "/reload"),
+                await _request(port, "GET", "/pair"),
+                await _request(port, "GET", "/missing"),
+                await _request(
+                    port,
+                    "POST",
+                    "/sample",
+                    {"location": "US", "features": ["f1"], "k": 2, "consumer": "c1"},
+                ),
+                await _request(port, "POST", "/sample", {"location": "US"}),
+            ]
+        return responses
+
+    (
+        health,
+        pair,
+        invalid,
+        reload,
+        wrong_method,
+        missing,
+        sample,
+        sample_invalid,
+    ) = asyncio.run(scenario())
+    assert health == (200, {"status": "ok", "providers": 4, "generation": 1})
+    assert pair[0] == 200
+    assert [r["address"] for r in pair[1]["results"]] == ["A"]
+    assert set(pair[1]["results"][0]["components"]) == {
+        "stake_score",
+        "feature_score",
+        "location_score",
+    }
+    assert invalid[0] == 400
+    assert reload == (200, {"providers": 4})
+    assert service.generation == 2
+    assert wrong_method[0] == 405
+    assert missing[0] == 404
+    assert sample[0] == 200
+    addresses = [r["address"] for r in sample[1]["results"]]
+    assert len(set(addresses)) == 2 and set(addresses) <= {"A", "B", "E"}
+    assert sample_invalid[0] == 400
+
+
+@pytest.mark.parametrize(
+    "path, body",
+    [
+        ("/pair", {"location": "US", "k": True}),
+        ("/sample", {"location": "US", "consumer": "c1", "epoch": False}),
+    ],
+)
+def test_booleans_are_not_integers(service, path, body):
+    status, payload = asyncio.run(service.handle("POST", path, json.dumps(body).encode()))
+    assert status == 400 and "integer" in payload["error"]
+
+
+def test_unexpected_errors_answer_500(service):
+    def failing_pairing_list(providers, policy, k):
+        raise ValueError("max_features must be greater than 0")
+
+    service.system.get_pairing_list = failing_pairing_list
+
+    async def scenario():
+        server = await service.start("127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            failed = await _request(port, "POST", "/pair", {"location": "US"})
+            health = await _request(port, "GET", "/health")
+        return failed, health
+
+    failed, health = asyncio.run(scenario())
+    assert failed == (500, {"error": "max_features must be greater than 0"})
+    assert health[0] == 200
@@ -0,0 +1,159 @@
+import pickle
+
+import numpy as np
+import pytest
+
+from benchmarks.synthetic import StubGeocoder, generate_policies, generate_providers
+from models.policy import ConsumerPolicy
+from models.provider import Provider
+from pairing_system.sharding import (
+    HASH,
+    REGION,
+    LocalTransport,
+    ShardedPairingSystem,
+    hash_partition,
+    region_partition,
+)
+from pairing_system.system import (
+    CANDIDATES,
+    PROVIDER_SET,
+    THRESHOLD,
+    PairingSystem,
+)
+
+
+@pytest.fixture(scope="module")
+def table():
+    return generate_providers(3_000, seed=5)
+
+
+@pytest.fixture(scope="module")
+def policies():
+    return generate_policies(12, seed=5)
+
+
+@pytest.fixture(scope="module")
+def geocoder(table, policies):
+    return StubGeocoder.for_locations(
+        table.locations + [p.required_location for p in policies]
+    )
+
+
+def as_tuples(results):
+    return [(r.provider, r.score, dict(r.components)) for r in results]
+
+
+def test_partitions_cover_every_row_once(table):
+    for rows in (hash_partition(table, 4), region_partition(table, 4)[0]):
+        assert len(rows) == 4
+        merged = np.sort(np.concatenate(rows))
+        assert np.array_equal(merged, np.arange(len(table)))
+
+
+def test_region_partition_keeps_locations_together(table):
+    rows, routes = region_partition(table, 3)
+    for shard, shard_rows in enumerate(rows):
+        for location_id in np.unique(table.location_ids[shard_rows]).tolist():
+            assert routes[table.locations[location_id]] == shard
+    assert set(routes) == {table.locations[i] for i in np.unique(table.location_ids)}
+
+
+def test_table_subset(table):
+    ids = [5, 2, 2999, 0]
+    assert table.subset(ids).to_providers() == table.take(ids)
+    assert len(table.subset([])) == 0
+
+
+@pytest.mark.parametrize("partitioning", [HASH, REGION])
+@pytest.mark.parametrize("strict", [True, False])
+@pytest.mark.parametrize("normalization", [CANDIDATES, PROVIDER_SET])
+def test_matches_single_process(
+    table, policies, geocoder, partitioning, strict, normalization
+):
+    single = PairingSystem(
+        strict=strict,
+        geocoder=geocoder,
+        backend="serial",
+        normalization=normalization,
+        result_cache_size=0,
+    )
+    with ShardedPairingSystem(
+        table,
+        shards=3,
+        partitioning=partitioning,
+        transport="local",
+        strict=strict,
+        geocoder=geocoder,
+        normalization=normalization,
+    ) as sharded:
+        results = sharded.get_pairing_lists(policies, k=7)
+    for policy, result in zip(policies, results):
+        assert as_tuples(result) == as_tuples(single.get_pairing_list(table, policy, 7))
+
+
+def test_threshold_ranking_and_weights(table, policies, geocoder):
+    options = dict(
+        strict=False, geocoder=geocoder, weights=(2.0, 1.0, 0.5), ranking=THRESHOLD
+    )
+    single = PairingSystem(backend="serial", result_cache_size=0, **options)
+    with ShardedPairingSystem(table, shards=4, transport="local", **options) as sharded:
+        for policy in policies[:4]:
+            assert as_tuples(sharded.get_pairing_list(policy, 10)) == as_tuples(
+                single.get_pairing_list(table, policy, 10)
+            )
+
+
+def test_normalization_spans_shards():
+    # Each shard alone would normalize its own stakes to 1.0
+    providers = [
+        Provider("a", 10, "US", ["f1"]),
+        Provider("b", 40, "DE", ["f1", "f2"]),
+    ]
+    policy = ConsumerPolicy("US", ["f1"], 0)
+    single = PairingSystem(strict=False, max_distance_km=10_000, backend="serial")
+    with ShardedPairingSystem(
+        providers,
+        shards=2,
+        partitioning=REGION,
+        transport="local",
+        strict=False,
+        max_distance_km=10_000,
+    ) as sharded:
+        assert sorted(sharded.shard_sizes) == [1, 1]
+        result = sharded.get_pairing_list(policy, 5)
+    assert as_tuples(result) == as_tuples(single.get_pairing_list(providers, policy, 5))
+    assert result[-1].components["stake_score"] == 0.25
+
+
+def test_strict_region_queries_reach_one_shard(table, geocoder):
+    transport = LocalTransport()
+    with ShardedPairingSystem(
+        table, shards=4, partitioning=REGION, transport=transport, geocoder=geocoder
+    ) as sharded:
+        location = table.locations[int(table.location_ids[0])]
+        assert len(sharded.shards_for(ConsumerPolicy(location, [], 0))) == 1
+        assert sharded.shards_for(ConsumerPolicy("Atlantis", [], 0)) == []
+        assert sharded.get_pairing_list(ConsumerPolicy("Atlantis", [], 0)) == []
+    # Candidates kept by `prepare` are released by `rank`
+    assert all(not shard._pending for shard in transport.shards)
+
+
+def test_process_transport(table, policies, geocoder):
+    single = PairingSystem(geocoder=geocoder, backend="serial", result_cache_size=0)
+    with ShardedPairingSystem(
+        table, shards=2, transport="process", geocoder=geocoder
+    ) as sharded:
+        results = sharded.get_pairing_lists(policies[:5], k=5)
+    for policy, result in zip(policies, results):
+        assert pickle.loads(pickle.dumps(result)) == result
+        assert as_tuples(result) == as_tuples(single.get_pairing_list(table, policy, 5))
+
+
+def test_validation(table):
+    with pytest.raises(ValueError, match="partitioning"):
+        ShardedPairingSystem(table, partitioning="range", transport="local")
+    with pytest.raises(ValueError, match="transport"):
+        ShardedPairingSystem(table, transport="carrier-pigeon")
+    with ShardedPairingSystem(table, shards=2, transport="local") as sharded:
+        with pytest.raises(ValueError, match="k must"):
+            sharded.get_pairing_list(ConsumerPolicy("US", [], 0), 0)
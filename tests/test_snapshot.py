@@ -0,0 +1,150 @@
+import mmap
+import pickle
+import struct
+
+import numpy as np
+import pytest
+
+from benchmarks.synthetic import StubGeocoder, generate_policies, generate_providers
+from loaders.provider_loader import ProviderLoadError
+from loaders.snapshot import SnapshotTable, load_snapshot, save_snapshot
+from models.provider import Provider
+from models.provider_table import ProviderTable
+from models.string_column import StringColumn
+from pairing_system.system import PairingSystem
+
+
+@pytest.fixture
+def providers():
+    return [
+        Provider("A", 100, "US", ["f1", "f2"]),
+        Provider("Bé", 50, "UK", []),
+        Provider("C", 200, "DE", ["f1", "f2", "f3"]),
+    ]
+
+
+def test_round_trip(tmp_path, providers):
+    path = tmp_path / "providers.snap"
+    save_snapshot(providers, str(path))
+    table = load_snapshot(str(path))
+    assert isinstance(table, SnapshotTable)
+    assert table.to_providers() == providers
+    assert table.coords is None
+    assert table.locations == ["US", "UK", "DE"]
+    assert table.features == ["f1", "f2", "f3"]
+
+
+def buffer_of(array):
+    while isinstance(array, np.ndarray):
+        array = array.base
+    return array.obj if isinstance(array, memoryview) else array
+
+
+def test_columns_are_read_only_views_of_the_mapping(tmp_path, providers):
+    path = tmp_path / "providers.snap"
+    save_snapshot(providers, str(path))
+    table = load_snapshot(str(path))
+    assert isinstance(table.addresses, StringColumn)
+    for column in (table.stakes, table.location_ids, table.feature_ids):
+        assert isinstance(buffer_of(column), mmap.mmap)
+        assert not column.flags.writeable
+        with pytest.raises(ValueError):
+            column[0] = 1
+
+
+def test_coordinates_are_stored(tmp_path, providers):
+    path = tmp_path / "providers.snap"
+    geocoder = StubGeocoder({"US": (38.0, -97.0), "DE": (51.0, 9.0)})
+    save_snapshot(providers, str(path), geocoder)
+    coords = load_snapshot(str(path)).coords
+    assert coords.shape == (3, 2)
+    assert coords[0].tolist() == [38.0, -97.0]
+    assert np.isnan(coords[1]).all()
+
+
+def test_round_trip_of_a_snapshot(tmp_path):
+    table = generate_providers(500, seed=3)
+    first, second = tmp_path / "a.snap", tmp_path / "b.snap"
+    save_snapshot(table, str(first))
+    save_snapshot(load_snapshot(str(first)), str(second))
+    assert first.read_bytes() == second.read_bytes()
+    assert load_snapshot(str(second)).to_providers() == table.to_providers()
+
+
+def test_empty_provider_set(tmp_path):
+    path = tmp_path / "empty.snap"
+    save_snapshot([], str(path))
+    assert len(load_snapshot(str(path))) == 0
+
+
+def test_pickle_remaps_the_file(tmp_path, providers):
+    path = tmp_path / "providers.snap"
+    save_snapshot(providers, str(path))
+    table = load_snapshot(str(path))
+    data = pickle.dumps(table)
+    assert len(data) < 200
+    copy = pickle.loads(data)
+    assert isinstance(copy, SnapshotTable)
+    assert copy.to_providers() == providers
+
+
+def test_rejects_other_files(tmp_path, providers):
+    path = tmp_path / "providers.snap"
+    path.write_bytes(b"")
+    with pytest.raises(ProviderLoadError, match="too short"):
+        load_snapshot(str(path))
+    path.write_bytes(b"not a snapshot at all")
+    with pytest.raises(ProviderLoadError, match="bad magic"):
+        load_snapshot(str(path))
+
+    save_snapshot(providers, str(path))
+    data = bytearray(path.read_bytes())
+    struct.pack_into("<I", data, 8, 99)
+    path.write_bytes(bytes(data))
+    with pytest.raises(ProviderLoadError, match="version 99"):
+        load_snapshot(str(path))
+
+
+def test_rejects_truncated_files(tmp_path, providers):
+    path = tmp_path / "providers.snap"
+    save_snapshot(providers, str(path))
+    path.write_bytes(path.read_bytes()[:-100])
+    with pytest.raises(ProviderLoadError, match="past the end"):
+        load_snapshot(str(path))
+
+
+def test_verify_reports_bad_rows(tmp_path, providers):
+    table = ProviderTable.from_providers(providers)
+    table.stakes = np.array([100, -1, 200])
+    path = tmp_path / "bad.snap"
+    save_snapshot(table, str(path))
+    assert len(load_snapshot(str(path))) == 3
+    with pytest.raises(ProviderLoadError, match="line 2"):
+        load_snapshot(str(path), verify=True)
+
+
+def test_string_column():
+    column = StringColumn.from_strings(["a", "", "žluť", "xyz"])
+    assert len(column) == 4
+    assert list(column) == ["a", "", "žluť", "xyz"]
+    assert column[2] == "žluť"
+    assert column[-1] == "xyz"
+    assert column[1:3] == ["", "žluť"]
+    with pytest.raises(IndexError):
+        column[4]
+
+
+def test_pairing_on_a_snapshot_matches_the_table(tmp_path):
+    table = generate_providers(2_000, seed=1)
+    path = tmp_path / "providers.snap"
+    save_snapshot(table, str(path))
+    snapshot = load_snapshot(str(path))
+    policies = generate_policies(5, seed=1)
+    geocoder = StubGeocoder.for_locations(
+        table.locations + [p.required_location for p in policies]
+    )
+    system = PairingSystem(geocoder=geocoder, backend="serial", result_cache_size=0)
+    for policy in policies:
+        assert system.get_pairing_list(snapshot, policy) == system.get_pairing_list(
+            table, policy
+        )
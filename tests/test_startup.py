@@ -0,0 +1,64 @@
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Generous upper bounds: they catch an eager heavy import or an index built
+# up front, not noise between machines
+IMPORT_BUDGET_SECONDS = 3.0
+FIRST_RESULT_BUDGET_SECONDS = 2.0
+
+_COLD_START = """
+import json, sys, time
+
+start = time.perf_counter()
+from models.policy import ConsumerPolicy
+from models.provider import Provider
+from pairing_system.system import PairingSystem
+imported = time.perf_counter()
+
+providers = [
+    Provider("A", 100, "US", ["feature1"]),
+    Provider("B", 50, "US", ["feature1", "feature2"]),
+    Provider("C", 200, "DE", ["feature1"]),
+]
+system = PairingSystem(strict={strict})
+results = system.get_pairing_list(providers, ConsumerPolicy("US", ["feature1"], 10))
+done = time.perf_counter()
+
+print(json.dumps({{
+    "import_seconds": imported - start,
+    "first_result_seconds": done - imported,
+    "results": [r.provider.address for r in results],
+    "geopy": sorted(m for m in sys.modules if m.split(".")[0] == "geopy"),
+}}))
+"""
+
+
+def cold_start(strict: bool) -> dict:
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    output = subprocess.run(
+        [sys.executable, "-c", _COLD_START.format(strict=strict)],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output)
+
+
+def test_strict_cold_start_never_imports_geopy():
+    run = cold_start(strict=True)
+    assert run["results"] == ["A", "B"]
+    assert run["geopy"] == []
+    assert run["import_seconds"] < IMPORT_BUDGET_SECONDS
+    assert run["first_result_seconds"] < FIRST_RESULT_BUDGET_SECONDS
+
+
+def test_flexible_cold_start_imports_geopy_on_first_use():
+    run = cold_start(strict=False)
+    assert run["results"][:2] == ["A", "B"]
+    assert "geopy.distance" in run["geopy"]
@@ -67,3 +67,19 @@ def test_filter_returns_too_many(providers, policy):
     system = PairingSystem()
     filtered = system.filter_providers(providers, policy)
     assert len(filtered) == 4
+
+
+def test_indexes_follow_in_place_list_changes(providers, policy):
+    system = PairingSystem(result_cache_size=0)
+    assert [p.address for p in system.filter_providers(providers, policy)] == [
+        "A",
+        "D",
+        "E",
+    ]
+
+    # Same list object and length, different content
+    providers[0] = Provider("A", 100, "DE", ["f1"])
+    assert [p.address for p in system.filter_providers(providers, policy)] == [
+        "D",
+        "E",
+    ]
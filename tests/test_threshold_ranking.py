@@ -0,0 +1,119 @@
+import pytest
+
+from benchmarks.synthetic import StubGeocoder, generate_policies, generate_providers
+from geo.distance import HAVERSINE
+from models.policy import ConsumerPolicy
+from models.provider import Provider
+from pairing_system.backends import SerialBackend
+from pairing_system.ranking import ranked_entries, threshold_top_k
+from pairing_system.system import EXHAUSTIVE, THRESHOLD, PairingSystem
+
+
+@pytest.fixture(scope="module")
+def table():
+    return generate_providers(3000, seed=5)
+
+
+@pytest.fixture(scope="module")
+def geocoder(table):
+    policies = generate_policies(20, seed=5)
+    return StubGeocoder.for_locations(
+        table.locations + [p.required_location for p in policies]
+    )
+
+
+def _system(geocoder, ranking, weights=(1, 1, 1)):
+    return PairingSystem(
+        strict=False,
+        max_distance_km=3000,
+        geocoder=geocoder,
+        distance_model=HAVERSINE,
+        backend="serial",
+        result_cache_size=0,
+        weights=weights,
+        ranking=ranking,
+    )
+
+
+@pytest.mark.parametrize("weights", [(1, 1, 1), (0.2, 0.3, 2.0), (1, 0, 1)])
+@pytest.mark.parametrize("k", [1, 5, 50])
+def test_same_results_as_exhaustive(table, geocoder, weights, k):
+    exhaustive = _system(geocoder, EXHAUSTIVE, weights)
+    threshold = _system(geocoder, THRESHOLD, weights)
+    for policy in generate_policies(20, seed=5):
+        expected = exhaustive.get_pairing_list(table, policy, k)
+        assert threshold.get_pairing_list(table, policy, k) == expected
+
+
+def _location_counter(scored):
+    def location_scores(block):
+        scored.extend(p.address for p in block)
+        return [1.0 if p.location == "US" else 0.0 for p in block]
+
+    return location_scores
+
+
+def test_prunes_location_scoring():
+    providers = [
+        Provider(f"P{i:04d}", i, "US" if i % 2 else "DE", ["f1"] * (i % 3))
+        for i in range(2000)
+    ]
+    scored = []
+    entries, count = threshold_top_k(
+        providers,
+        ConsumerPolicy("US"),
+        _location_counter(scored),
+        SerialBackend(),
+        k=5,
+    )
+    assert count == len(scored) < len(providers) // 2
+
+    all_entries = ranked_entries(
+        providers,
+        ConsumerPolicy("US"),
+        [1.0 if p.location == "US" else 0.0 for p in providers],
+        SerialBackend(),
+    )
+    assert entries == sorted(all_entries)[:5]
+
+
+def test_zero_weight_location_is_never_computed():
+    providers = [Provider(f"P{i}", i + 1, "US", ["f1"]) for i in range(10)]
+    scored = []
+    entries, count = threshold_top_k(
+        providers,
+        ConsumerPolicy("US"),
+        _location_counter(scored),
+        SerialBackend(),
+        k=3,
+        weights=(1.0, 1.0, 0.0),
+    )
+    assert count == 0 and scored == []
+    assert [entry[1] for entry in entries] == ["P9", "P8", "P7"]
+    assert entries[0][3] == (1.0, 1.0, 0.0)
+
+
+def test_weighted_score():
+    providers = [Provider("A", 100, "US", ["f1"]), Provider("B", 50, "US", ["f1"])]
+    system = PairingSystem(weights=(3, 1, 0))
+    top = system.get_pairing_list(providers, ConsumerPolicy("US", ["f1"]), k=1)[0]
+    assert top.provider.address == "A"
+    assert top.score == pytest.approx(1.0)
+    assert top.components["location_score"] == 0.0
+    assert system.rank_providers(providers, ConsumerPolicy("US"))[1].score == (
+        pytest.approx((3 * 0.5 + 1) / 4)
+    )
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {"weights": (1, 1)},
+        {"weights": (1, -1, 1)},
+        {"weights": (0, 0, 0)},
+        {"ranking": "fastest"},
+    ],
+)
+def test_invalid_settings(kwargs):
+    with pytest.raises(ValueError):
+        PairingSystem(**kwargs)